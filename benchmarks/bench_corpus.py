@@ -0,0 +1,164 @@
+"""Microbenchmark y chequeo de exactitud de las funciones puras de extracción.
+
+Recorre el corpus versionado de ``benchmarks/corpus/`` (post, foto, video,
+reel, watch, share y feed de página) y, por documento, mide cada función sobre
+strings/HTML y compara su salida con ``corpus/expected.json``. Así se puede
+optimizar el parseo y las regex sabiendo si se pierde exactitud: cualquier
+diferencia se imprime y el script termina con código 1.
+
+Uso:
+    python benchmarks/bench_corpus.py [--repeat 5] [--only video,reel]
+    python benchmarks/bench_corpus.py --update-expected   # tras un cambio de salida intencional
+
+El HTML se parsea una vez fuera de la medición salvo en ``extract_page``, que
+mide justamente ese parseo.
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from typing import Any, Callable, Dict, List, Tuple
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from html_extract import extract_page, parser_backend  # noqa: E402
+from scraper_selenium import (  # noqa: E402
+    FacebookSeleniumScraper, _extract_meta_image_candidates, _is_candidate_image_src,
+)
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+MIN_SAMPLE_SECONDS = 0.02
+
+
+def load_corpus(corpus_dir: str = CORPUS_DIR) -> Tuple[Dict, List[Dict]]:
+    with open(os.path.join(corpus_dir, 'manifest.json'), 'r', encoding='utf-8') as fh:
+        manifest = json.load(fh)
+    documents = []
+    for entry in manifest['documents']:
+        with open(os.path.join(corpus_dir, entry['file']), 'r', encoding='utf-8') as fh:
+            documents.append(dict(entry, html=fh.read()))
+    return manifest, documents
+
+
+def candidate_images(page) -> List[str]:
+    """Filtro de imágenes de ``scrape_post_by_url`` (src y luego data-src, sin repetir)."""
+    images, seen = [], set()
+    for src in page.img_srcs + page.img_data_srcs:
+        if src not in seen and _is_candidate_image_src(src):
+            seen.add(src)
+            images.append(src)
+    return images
+
+
+def page_summary(page) -> Dict:
+    """Lo que ``scrape_post_by_url`` y el descubrimiento de posts leen de un ``PageExtract``."""
+    return {
+        'text': page.longest_data_ft_text(20) or page.first_long_line(30),
+        'has_video': page.has_video,
+        'hrefs': len(page.hrefs),
+        'post_links': sum(1 for href in page.hrefs if '/posts/' in href or '/photo' in href),
+    }
+
+
+def build_cases(scraper: FacebookSeleniumScraper, doc: Dict) -> Dict[str, Callable[[], Any]]:
+    """Funciones a medir para un documento; cada una retorna algo serializable a JSON."""
+    html = doc['html']
+    page = extract_page(html)
+    soup = BeautifulSoup(html, 'html.parser')
+    video_url = scraper.extract_video_url(page, page_source=html)
+    candidates = list(doc.get('candidates') or [])
+    if video_url and video_url not in candidates:
+        candidates.append(video_url)
+
+    return {
+        'extract_page': lambda: page_summary(extract_page(html)),
+        'extract_video_url': lambda: scraper.extract_video_url(page, page_source=html),
+        '_is_candidate_image_src': lambda: candidate_images(page),
+        '_extract_meta_image_candidates': lambda: _extract_meta_image_candidates(soup),
+        'normalize_video_url': lambda: [scraper.normalize_video_url(url) for url in candidates],
+        'parse_facebook_url': lambda: scraper.parse_facebook_url(doc['url']),
+        'order_video_candidates': lambda: scraper.order_video_candidates(candidates),
+    }
+
+
+def measure(func: Callable[[], Any], repeat: int) -> Tuple[float, Any]:
+    """Segundos por llamada (mejor de ``repeat`` muestras de al menos MIN_SAMPLE_SECONDS) y la salida."""
+    started = time.perf_counter()
+    result = func()
+    single = max(time.perf_counter() - started, 1e-7)
+    number = max(1, int(MIN_SAMPLE_SECONDS / single))
+    best = single
+    for _ in range(repeat):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - started) / number)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--only', help='documentos a correr, separados por coma')
+    parser.add_argument('--corpus', default=CORPUS_DIR)
+    parser.add_argument('--update-expected', action='store_true', help='reescribir expected.json con las salidas actuales')
+    args = parser.parse_args()
+
+    manifest, documents = load_corpus(args.corpus)
+    if args.only:
+        wanted = {name.strip() for name in args.only.split(',')}
+        documents = [doc for doc in documents if doc['name'] in wanted]
+
+    expected_path = os.path.join(args.corpus, 'expected.json')
+    expected: Dict = {'corpus_version': manifest['version'], 'documents': {}}
+    if os.path.exists(expected_path):
+        with open(expected_path, 'r', encoding='utf-8') as fh:
+            expected = json.load(fh)
+    if expected.get('corpus_version') != manifest['version'] and not args.update_expected:
+        print(f"expected.json es de la versión {expected.get('corpus_version')} del corpus "
+              f"y el manifest de la {manifest['version']}: correr con --update-expected")
+        return 1
+
+    scraper = FacebookSeleniumScraper(headless=True)
+    print(f"corpus v{manifest['version']}  backend: {parser_backend()}")
+    failures = 0
+    for doc in documents:
+        cases = build_cases(scraper, doc)
+        outputs = expected['documents'].setdefault(doc['name'], {})
+        print(f"\n{doc['name']} ({len(doc['html']) / 1024:.0f} KB)")
+        for name, func in cases.items():
+            seconds, result = measure(func, args.repeat)
+            result = json.loads(json.dumps(result))
+            if args.update_expected:
+                outputs[name] = result
+                status = 'guardado'
+            elif name not in outputs:
+                status = 'SIN ESPERADO'
+                failures += 1
+            elif outputs[name] != result:
+                status = 'DIFF'
+                failures += 1
+            else:
+                status = 'OK'
+            print(f"  {name:32} {seconds * 1e6:10.1f} µs  {status}")
+            if status == 'DIFF':
+                print(f"    esperado: {json.dumps(outputs[name], ensure_ascii=False)[:500]}")
+                print(f"    obtenido: {json.dumps(result, ensure_ascii=False)[:500]}")
+
+    if args.update_expected:
+        expected['corpus_version'] = manifest['version']
+        with open(expected_path, 'w', encoding='utf-8') as fh:
+            json.dump(expected, fh, indent=2, ensure_ascii=False)
+            fh.write('\n')
+        print(f"\nSalidas guardadas en {expected_path}")
+        return 0
+
+    print(f"\n{'Sin diferencias' if not failures else f'{failures} salidas distintas de las esperadas'}")
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
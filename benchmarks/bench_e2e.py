@@ -0,0 +1,287 @@
+"""Benchmark end-to-end sin red: la API real contra un Facebook/fbcdn local.
+
+Levanta ``fixture_server.FixtureServer``, apunta Chrome y el cliente HTTP del
+scraper a él (``SCRAPER_UPSTREAM_PROXY``), arranca la app de FastAPI con
+uvicorn en un puerto local y lanza ``/scrape``, ``/scrape/video`` y
+``/scrape/page`` a concurrencias fijas. Cada solicitud usa un post distinto
+para no medir la caché.
+
+Reporta p50/p95/p99, solicitudes por segundo, RSS máximo de los navegadores
+(árbol de procesos hijos) y bytes servidos por el servidor de fixtures, y los
+compara con la línea base guardada (``baseline_e2e.json``): una p95 o un rps
+peor que ``--tolerance`` es una regresión y el script termina con código 1.
+
+Uso:
+    python benchmarks/bench_e2e.py [--scenarios video,post,page] [--concurrency 1,4,8]
+                                   [--requests 20] [--save-baseline]
+
+Las variables ``SCRAPER_*`` del entorno se respetan (tamaño del pool, modo
+pestañas, ``SCRAPER_HTTP_FAST_PATH``...). Sin Chrome instalado solo el
+escenario ``video`` por el camino HTTP (tier 0) puede completar.
+"""
+import argparse
+import itertools
+import json
+import os
+import socket
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+import requests
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fixture_server import FixtureServer  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline_e2e.json')
+
+_post_ids = itertools.count(100000)
+
+
+def _next_post_id() -> int:
+    return next(_post_ids)
+
+
+# Cada escenario: (método, ruta, generador del cuerpo/parámetros por solicitud)
+SCENARIOS: Dict[str, Callable[[str], Dict]] = {
+    'video': lambda base: {
+        'method': 'GET', 'url': f"{base}/scrape/video",
+        'params': {'url': f"http://m.facebook.com/BenchPage/videos/{_next_post_id()}"},
+    },
+    'post': lambda base: {
+        'method': 'POST', 'url': f"{base}/scrape",
+        'json': {'url': f"http://m.facebook.com/BenchPage/posts/{_next_post_id()}"},
+    },
+    'page': lambda base: {
+        'method': 'POST', 'url': f"{base}/scrape/page",
+        'json': {'page_url': f"http://m.facebook.com/BenchPage{_next_post_id()}", 'num_posts': 5},
+    },
+}
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * pct / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+def browser_rss() -> int:
+    """RSS de los procesos hijos (chromedriver + Chrome); 0 sin /proc."""
+    from browser_supervisor import process_tree_rss
+
+    total = 0
+    try:
+        tasks = os.listdir('/proc/self/task')
+    except OSError:
+        return 0
+    for tid in tasks:
+        try:
+            with open(f'/proc/self/task/{tid}/children', 'r') as fh:
+                children = [int(pid) for pid in fh.read().split()]
+        except (OSError, ValueError):
+            continue
+        for pid in children:
+            total += process_tree_rss(pid) or 0
+    return total
+
+
+class RssSampler:
+    """Máximo de ``browser_rss`` mientras corre un escenario."""
+
+    def __init__(self, interval: float = 0.25):
+        self.interval = interval
+        self.peak = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='bench-rss', daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak = max(self.peak, browser_rss())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, browser_rss())
+
+
+def start_app(port: int):
+    """Importa la app (después de configurar el entorno) y la sirve con uvicorn en un hilo."""
+    import uvicorn
+
+    import main_selenium
+
+    config = uvicorn.Config(main_selenium.app, host='127.0.0.1', port=port, log_level='warning')
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, name='bench-app', daemon=True)
+    thread.start()
+    deadline = time.monotonic() + 30
+    while not server.started:
+        if time.monotonic() > deadline or not thread.is_alive():
+            raise RuntimeError('La app no arrancó')
+        time.sleep(0.05)
+    return server, thread
+
+
+def run_level(base: str, scenario: str, concurrency: int, total: int, fixtures: FixtureServer) -> Dict:
+    session = requests.Session()
+    session.trust_env = False
+    adapter = requests.adapters.HTTPAdapter(pool_maxsize=max(concurrency, 10))
+    session.mount('http://', adapter)
+
+    def one(_):
+        spec = SCENARIOS[scenario](base)
+        method = spec.pop('method')
+        started = time.perf_counter()
+        try:
+            status = session.request(method, timeout=300, **spec).status_code
+        except requests.RequestException:
+            status = None
+        return status, time.perf_counter() - started
+
+    # Una solicitud de calentamiento (lanzar Chrome, abrir conexiones) fuera de la medición
+    one(None)
+    bytes_before = fixtures.stats.snapshot()['bytes']
+    with RssSampler() as rss:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            outcomes = list(executor.map(one, range(total)))
+        elapsed = time.perf_counter() - started
+    bytes_after = fixtures.stats.snapshot()['bytes']
+
+    latencies = [latency for status, latency in outcomes if status == 200]
+    statuses: Dict[str, int] = {}
+    for status, _ in outcomes:
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+    fetched = {kind: bytes_after.get(kind, 0) - bytes_before.get(kind, 0) for kind in bytes_after}
+    return {
+        'scenario': scenario,
+        'concurrency': concurrency,
+        'requests': total,
+        'ok': len(latencies),
+        'statuses': statuses,
+        'p50': percentile(latencies, 50),
+        'p95': percentile(latencies, 95),
+        'p99': percentile(latencies, 99),
+        'rps': round(len(latencies) / elapsed, 3) if elapsed else None,
+        'browser_rss_mb': round(rss.peak / (1024 * 1024), 1),
+        'bytes_fetched': fetched,
+    }
+
+
+def compare(results: List[Dict], baseline: Dict, tolerance: float) -> List[str]:
+    regressions = []
+    for row in results:
+        key = f"{row['scenario']}@{row['concurrency']}"
+        base = baseline.get('results', {}).get(key)
+        if not base:
+            continue
+        if row['ok'] < row['requests'] and base.get('ok') == base.get('requests'):
+            regressions.append(f"{key}: {row['requests'] - row['ok']} solicitudes fallaron (línea base sin fallos)")
+        if base.get('p95') and row['p95'] and row['p95'] > base['p95'] * (1 + tolerance):
+            regressions.append(f"{key}: p95 {row['p95']:.3f}s vs {base['p95']:.3f}s")
+        if base.get('rps') and row['rps'] is not None and row['rps'] < base['rps'] * (1 - tolerance):
+            regressions.append(f"{key}: rps {row['rps']:.2f} vs {base['rps']:.2f}")
+    return regressions
+
+
+def _fmt(value: Optional[float]) -> str:
+    return f"{value:.3f}" if value is not None else '-'
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scenarios', default='video,post,page')
+    parser.add_argument('--concurrency', default='1,4,8')
+    parser.add_argument('--requests', type=int, default=20, help='solicitudes por escenario y concurrencia')
+    parser.add_argument('--latency', type=float, default=0.05, help='latencia de facebook.com (s)')
+    parser.add_argument('--cdn-latency', type=float, default=0.02, help='latencia de fbcdn (s)')
+    parser.add_argument('--throughput', type=float, default=5_000_000, help='bytes/s por conexión a fbcdn')
+    parser.add_argument('--video-size', type=int, default=8 * 1024 * 1024)
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE)
+    parser.add_argument('--save-baseline', action='store_true', help='guardar estos resultados como línea base')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='margen antes de marcar una regresión')
+    parser.add_argument('--output', help='guardar los resultados en este JSON')
+    args = parser.parse_args()
+
+    scenarios = [name.strip() for name in args.scenarios.split(',') if name.strip()]
+    unknown = set(scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"escenarios desconocidos: {', '.join(sorted(unknown))}")
+    levels = [int(level) for level in args.concurrency.split(',')]
+
+    fixtures = FixtureServer(latency=args.latency, cdn_latency=args.cdn_latency,
+                             throughput=args.throughput, video_size=args.video_size).start()
+    # Antes de importar la app: la configuración se lee al importar
+    os.environ['SCRAPER_UPSTREAM_PROXY'] = fixtures.proxy_url
+    os.environ.setdefault('SCRAPER_HOST_MIN_INTERVAL', '0')
+    os.environ.setdefault('SCRAPER_MAX_CONCURRENT', str(max(levels) * 2))
+    os.environ.setdefault('SCRAPER_POOL_MAX_WAITING', str(max(levels) * 2))
+
+    port = _free_port()
+    server, thread = start_app(port)
+    base = f"http://127.0.0.1:{port}"
+
+    results = []
+    try:
+        for scenario in scenarios:
+            for level in levels:
+                row = run_level(base, scenario, level, args.requests, fixtures)
+                results.append(row)
+                print(f"{scenario:6} c={level:<3} ok={row['ok']}/{row['requests']} "
+                      f"p50={_fmt(row['p50'])} p95={_fmt(row['p95'])} p99={_fmt(row['p99'])} "
+                      f"rps={row['rps']} rss={row['browser_rss_mb']}MB bytes={row['bytes_fetched']}", flush=True)
+    finally:
+        server.should_exit = True
+        thread.join(timeout=30)
+        fixtures.stop()
+
+    report = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'settings': {key: value for key, value in vars(args).items() if key not in ('baseline', 'output', 'save_baseline')},
+        'results': {f"{row['scenario']}@{row['concurrency']}": row for row in results},
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as fh:
+            json.dump(report, fh, indent=2)
+
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as fh:
+            json.dump(report, fh, indent=2)
+        print(f"Línea base guardada en {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("Sin línea base: ejecutar con --save-baseline para guardarla")
+        return 0
+    with open(args.baseline, 'r', encoding='utf-8') as fh:
+        baseline = json.load(fh)
+    regressions = compare(results, baseline, args.tolerance)
+    for line in regressions:
+        print(f"REGRESIÓN {line}")
+    if not regressions:
+        print(f"Sin regresiones frente a {os.path.basename(args.baseline)} (tolerancia {args.tolerance:.0%})")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,113 @@
+"""Microbenchmark: extracción en una pasada (html_extract) vs BeautifulSoup multi-pasada.
+
+Uso:
+    python benchmarks/bench_extraction.py [pagina.html ...] [--repeat N]
+
+Sin argumentos genera una página sintética de varios MB con la forma de m.facebook.com.
+Además de los tiempos, comprueba que ambas implementaciones devuelven lo mismo.
+"""
+import argparse
+import os
+import sys
+import time
+from typing import Dict
+
+from bs4 import BeautifulSoup
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from html_extract import extract_page, parser_backend  # noqa: E402
+from scraper_selenium import _extract_meta_image_candidates, _is_candidate_image_src  # noqa: E402
+
+
+def synthetic_page(posts: int = 3000) -> str:
+    blocks = []
+    for i in range(posts):
+        blocks.append(
+            f'<div data-ft=\'{{"id":{i}}}\'><header><a href="/Page/posts/{i}?ref=feed">Page</a></header>'
+            f'<p>Texto del post número {i} con contenido suficientemente largo para contar.</p>'
+            f'<img src="https://scontent.xx.fbcdn.net/v/t39/{i}_n.jpg?oe=65AB">'
+            f'<img src="https://static.xx.fbcdn.net/rsrc.php/emoji{i}.png">'
+            f'<img data-src="https://scontent.xx.fbcdn.net/v/t39/{i}_lazy.jpg">'
+            f'<script>require("ServerJS").handle({{"playable_url_quality_sd":"https:\\/\\/video.xx.fbcdn.net\\/{i}.mp4"}})</script>'
+            f'</div>'
+        )
+    return (
+        '<html><head><meta property="og:image" content="https://scontent.xx.fbcdn.net/og.jpg">'
+        '<link rel="image_src" href="https://scontent.xx.fbcdn.net/link.jpg"></head><body>'
+        + '\n'.join(blocks)
+        + '<video src="blob:https://m.facebook.com/abc"><source src="https://video.xx.fbcdn.net/v.mp4"></video>'
+        + '</body></html>'
+    )
+
+
+def legacy_extract(html: str) -> Dict:
+    """Reproduce el recorrido anterior de scrape_post_by_url sobre BeautifulSoup."""
+    soup = BeautifulSoup(html, 'html.parser')
+    images = []
+    for img in soup.find_all('img'):
+        src = img.get('src')
+        if _is_candidate_image_src(src) and src not in images:
+            images.append(src)
+    for img in soup.find_all('img', attrs={'data-src': True}):
+        src = img.get('data-src')
+        if _is_candidate_image_src(src) and src not in images:
+            images.append(src)
+    meta = _extract_meta_image_candidates(soup)
+    text = ""
+    for div in soup.find_all('div', {'data-ft': True}):
+        candidate = div.get_text(strip=True)
+        if len(candidate) > 20 and len(candidate) > len(text):
+            text = candidate
+    if not text:
+        lines = [line.strip() for line in soup.get_text().split('\n') if len(line.strip()) > 30]
+        text = lines[0] if lines else ""
+    hrefs = [a['href'] for a in soup.find_all('a', href=True)]
+    return {'images': images, 'meta': meta, 'text': text, 'hrefs': hrefs}
+
+
+def single_pass_extract(html: str) -> Dict:
+    page = extract_page(html)
+    images, seen = [], set()
+    for src in page.img_srcs + page.img_data_srcs:
+        if src not in seen and _is_candidate_image_src(src):
+            seen.add(src)
+            images.append(src)
+    text = page.longest_data_ft_text(20) or page.first_long_line(30)
+    return {'images': images, 'meta': page.meta_image_candidates(), 'text': text, 'hrefs': page.hrefs}
+
+
+def best_of(func, html: str, repeat: int):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func(html)
+        best = min(best, time.perf_counter() - started)
+    return best, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('pages', nargs='*', help='Archivos HTML guardados (page_source)')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    documents = [(path, open(path, encoding='utf-8').read()) for path in args.pages]
+    if not documents:
+        documents = [('<sintética>', synthetic_page())]
+
+    print(f"backend: {parser_backend()}")
+    for name, html in documents:
+        legacy_time, legacy = best_of(legacy_extract, html, args.repeat)
+        fast_time, fast = best_of(single_pass_extract, html, args.repeat)
+        mismatches = [key for key in legacy if legacy[key] != fast[key]]
+        print(
+            f"{name}: {len(html) / 1e6:.1f} MB  legacy {legacy_time * 1000:.0f} ms  "
+            f"single-pass {fast_time * 1000:.0f} ms  x{legacy_time / fast_time:.1f}  "
+            f"{'OK' if not mismatches else 'DIFF: ' + ', '.join(mismatches)}"
+        )
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,262 @@
+"""Servidor local que hace de m.facebook.com y fbcdn para los benchmarks (sin red).
+
+Atiende peticiones directas y como proxy HTTP (``GET http://host/ruta``), así
+que basta con ``SCRAPER_UPSTREAM_PROXY=http://127.0.0.1:<puerto>`` para que
+Chrome y el cliente HTTP del scraper hablen con él. El host decide qué se sirve:
+
+- ``*.facebook.com``: plantillas de ``benchmarks/fixtures/`` (post, video,
+  share y página con scroll infinito) con el id del post sustituido.
+- ``*.fbcdn.net``: bytes sintéticos con ``HEAD`` y ``Range`` (206 +
+  ``Content-Range``); los ``.mp4`` miden ``video_size`` bytes.
+
+``latency`` / ``cdn_latency`` retrasan la respuesta y ``throughput`` limita los
+bytes por segundo de cada conexión a fbcdn, para emular el CDN real.
+
+Uso independiente:
+    python benchmarks/fixture_server.py --port 8765 --cdn-latency 0.05 --throughput 2000000
+"""
+import argparse
+import os
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+_RANGE_RE = re.compile(r'bytes=(\d*)-(\d*)')
+_POST_ID_RE = re.compile(r'/(?:posts|videos|reel|share/[pv])/(\w+)')
+# GIF de 1x1: cualquier imagen de scontent/static
+_PIXEL = (b'GIF89a\x01\x00\x01\x00\x80\x00\x00\x00\x00\x00\xff\xff\xff!\xf9\x04\x01\x00\x00\x00\x00'
+          b',\x00\x00\x00\x00\x01\x00\x01\x00\x00\x02\x02D\x01\x00;')
+_PATTERN = bytes(range(256)) * 256  # 64 KiB que se repiten como cuerpo de los videos
+
+
+class FixtureStats:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.requests: Dict[str, int] = {}
+        self.bytes: Dict[str, int] = {}
+
+    def add(self, kind: str, sent: int):
+        with self._lock:
+            self.requests[kind] = self.requests.get(kind, 0) + 1
+            self.bytes[kind] = self.bytes.get(kind, 0) + sent
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {'requests': dict(self.requests), 'bytes': dict(self.bytes)}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = 'BenchFixtures/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    # -- enrutamiento ---------------------------------------------------------------
+
+    def _target(self) -> Tuple[str, str, str]:
+        """(host, ruta, query); acepta la forma absoluta que envían los clientes a un proxy."""
+        if self.path.startswith('http://') or self.path.startswith('https://'):
+            parsed = urlparse(self.path)
+            host = parsed.hostname or ''
+        else:
+            parsed = urlparse(self.path)
+            host = (self.headers.get('Host') or '').split(':')[0]
+        return host.lower(), parsed.path or '/', parsed.query
+
+    def do_HEAD(self):
+        self._serve(head=True)
+
+    def do_GET(self):
+        self._serve(head=False)
+
+    def do_CONNECT(self):
+        # Sin TLS: los fixtures se piden por http://
+        self.send_error(501, 'CONNECT no soportado')
+
+    def _serve(self, head: bool):
+        host, path, query = self._target()
+        if host.endswith('fbcdn.net'):
+            self._serve_cdn(path, head)
+        elif host.endswith('facebook.com'):
+            self._serve_page(path, query, head)
+        else:
+            self._send(404, b'host desconocido', 'text/plain', head, kind='other')
+
+    # -- facebook -------------------------------------------------------------------
+
+    def _serve_page(self, path: str, query: str, head: bool):
+        config = self.server.config
+        if config['latency']:
+            time.sleep(config['latency'])
+        low = path.lower()
+        match = _POST_ID_RE.search(path)
+        params = parse_qs(query)
+        post_id = match.group(1) if match else (params.get('story_fbid') or params.get('fbid') or ['0'])[0]
+        page = path.strip('/').split('/')[0] or 'BenchPage'
+
+        if '/share/' in low:
+            template = 'share'
+        elif '/videos/' in low or '/reel/' in low or 'watch' in low:
+            template = 'video'
+        elif '/posts/' in low or 'story.php' in low or 'photo.php' in low:
+            template = 'post'
+        elif len([part for part in low.split('/') if part]) == 1:
+            template = 'page'
+        else:
+            self._send(404, b'sin fixture', 'text/plain', head, kind='facebook')
+            return
+
+        html = self.server.render(template, post_id=post_id, page=page,
+                                  page_seed=str(sum(page.encode()) % 9000 + 1000),
+                                  feed_delay_ms=str(int(config['feed_delay'] * 1000)))
+        self._send(200, html.encode('utf-8'), 'text/html; charset=utf-8', head, kind='facebook')
+
+    # -- fbcdn ----------------------------------------------------------------------
+
+    def _serve_cdn(self, path: str, head: bool):
+        config = self.server.config
+        if config['cdn_latency']:
+            time.sleep(config['cdn_latency'])
+        if not path.endswith(('.mp4', '.m3u8')):
+            self._send(200, _PIXEL, 'image/gif', head, kind='cdn_image')
+            return
+
+        total = config['video_size']
+        start, end = 0, total - 1
+        status = 200
+        range_header = self.headers.get('Range')
+        match = _RANGE_RE.match(range_header or '')
+        if match and (match.group(1) or match.group(2)):
+            if match.group(1):
+                start = int(match.group(1))
+                end = min(int(match.group(2)), total - 1) if match.group(2) else total - 1
+            else:
+                start = max(0, total - int(match.group(2)))
+            if start >= total or start > end:
+                self.send_response(416)
+                self.send_header('Content-Range', f'bytes */{total}')
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                self.server.stats.add('cdn_video', 0)
+                return
+            status = 206
+
+        self.send_response(status)
+        self.send_header('Content-Type', 'video/mp4')
+        self.send_header('Accept-Ranges', 'bytes')
+        self.send_header('Content-Length', str(end - start + 1))
+        if status == 206:
+            self.send_header('Content-Range', f'bytes {start}-{end}/{total}')
+        self.end_headers()
+        sent = 0 if head else self._stream_video(start, end)
+        self.server.stats.add('cdn_video', sent)
+
+    def _stream_video(self, start: int, end: int) -> int:
+        throughput = self.server.config['throughput']
+        chunk_size = 64 * 1024
+        sent = 0
+        offset = start
+        started = time.monotonic()
+        try:
+            while offset <= end:
+                length = min(chunk_size, end - offset + 1)
+                pos = offset % len(_PATTERN)
+                chunk = (_PATTERN[pos:] + _PATTERN)[:length]
+                self.wfile.write(chunk)
+                sent += length
+                offset += length
+                if throughput:
+                    # Dormir lo necesario para no superar ``throughput`` bytes/s en esta conexión
+                    ahead = sent / throughput - (time.monotonic() - started)
+                    if ahead > 0:
+                        time.sleep(ahead)
+        except (BrokenPipeError, ConnectionResetError):
+            # El cliente cortó (probes de pocos bytes): normal
+            pass
+        return sent
+
+    # -- respuesta ------------------------------------------------------------------
+
+    def _send(self, status: int, body: bytes, content_type: str, head: bool, kind: str):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        if not head:
+            try:
+                self.wfile.write(body)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+        self.server.stats.add(kind, 0 if head else len(body))
+
+
+class FixtureServer(ThreadingHTTPServer):
+    """Servidor de fixtures en un hilo propio; ``proxy_url`` va en ``SCRAPER_UPSTREAM_PROXY``."""
+
+    daemon_threads = True
+
+    def __init__(self, port: int = 0, latency: float = 0.0, cdn_latency: float = 0.0, throughput: float = 0.0,
+                 video_size: int = 8 * 1024 * 1024, feed_delay: float = 0.2, fixtures_dir: str = FIXTURES_DIR):
+        super().__init__(('127.0.0.1', port), _Handler)
+        self.config = {
+            'latency': latency,
+            'cdn_latency': cdn_latency,
+            'throughput': throughput,
+            'video_size': video_size,
+            'feed_delay': feed_delay,
+        }
+        self.stats = FixtureStats()
+        self._templates: Dict[str, str] = {}
+        for name in ('post', 'video', 'share', 'page'):
+            with open(os.path.join(fixtures_dir, f'{name}.html'), 'r', encoding='utf-8') as fh:
+                self._templates[name] = fh.read()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def proxy_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+
+    def render(self, template: str, **values: str) -> str:
+        html = self._templates[template]
+        for key, value in values.items():
+            html = html.replace('{{' + key + '}}', value)
+        return html
+
+    def start(self) -> 'FixtureServer':
+        self._thread = threading.Thread(target=self.serve_forever, name='bench-fixtures', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=0.0, help='segundos extra por respuesta de facebook.com')
+    parser.add_argument('--cdn-latency', type=float, default=0.0, help='segundos extra por respuesta de fbcdn')
+    parser.add_argument('--throughput', type=float, default=0.0, help='bytes/s por conexión a fbcdn (0 = sin límite)')
+    parser.add_argument('--video-size', type=int, default=8 * 1024 * 1024)
+    args = parser.parse_args()
+
+    server = FixtureServer(port=args.port, latency=args.latency, cdn_latency=args.cdn_latency,
+                           throughput=args.throughput, video_size=args.video_size)
+    print(f"Fixtures en {server.proxy_url} (usar como SCRAPER_UPSTREAM_PROXY)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,105 @@
+"""Salud de los navegadores del pool: cuándo reciclar un Chrome.
+
+Un Chrome que lleva miles de navegaciones, horas abierto o cientos de MB de
+más acaba fallando; uno que se colgó o murió hace fallar todas las solicitudes
+siguientes. ``RecyclePolicy`` decide a partir de las métricas de cada navegador
+(navegaciones, edad, memoria del árbol de procesos y errores seguidos) y
+``ping_driver`` detecta sesiones muertas. El pool usa ambos para reemplazar el
+navegador en segundo plano.
+"""
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def _children(pid: int) -> List[int]:
+    children: List[int] = []
+    try:
+        for tid in os.listdir(f'/proc/{pid}/task'):
+            with open(f'/proc/{pid}/task/{tid}/children', 'r') as fh:
+                children.extend(int(child) for child in fh.read().split())
+    except (OSError, ValueError):
+        pass
+    return children
+
+
+def _rss_bytes(pid: int) -> int:
+    try:
+        with open(f'/proc/{pid}/statm', 'r') as fh:
+            return int(fh.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return 0
+
+
+def process_tree_rss(pid: Optional[int]) -> Optional[int]:
+    """RSS total (bytes) de ``pid`` y sus descendientes; None si /proc no está disponible."""
+    if not pid or not os.path.isdir(f'/proc/{pid}'):
+        return None
+    total = 0
+    pending = [pid]
+    seen = set()
+    while pending:
+        current = pending.pop()
+        if current in seen:
+            continue
+        seen.add(current)
+        total += _rss_bytes(current)
+        pending.extend(_children(current))
+    return total
+
+
+def driver_pid(driver) -> Optional[int]:
+    """PID del chromedriver local (Chrome y sus renderers cuelgan de él); None en Selenium remoto."""
+    try:
+        return driver.service.process.pid
+    except AttributeError:
+        return None
+
+
+def ping_driver(driver) -> bool:
+    """Comando WebDriver barato: False si la sesión o el navegador ya no responden."""
+    try:
+        driver.window_handles
+        return True
+    except Exception as e:
+        logger.warning(f"💀 Sesión de Chrome sin respuesta: {e}")
+        return False
+
+
+class RecyclePolicy:
+    """Límites tras los cuales un navegador se reemplaza (0 desactiva cada límite)."""
+
+    def __init__(self, max_navigations: int = 500, max_age: float = 3600.0, max_rss_mb: float = 1500.0,
+                 max_consecutive_errors: int = 3):
+        self.max_navigations = max(0, max_navigations)
+        self.max_age = max(0.0, max_age)
+        self.max_rss_mb = max(0.0, max_rss_mb)
+        self.max_consecutive_errors = max(0, max_consecutive_errors)
+
+    @classmethod
+    def from_env(cls) -> 'RecyclePolicy':
+        return cls(
+            max_navigations=int(os.environ.get('SCRAPER_RECYCLE_NAVIGATIONS', '500')),
+            max_age=float(os.environ.get('SCRAPER_RECYCLE_MAX_AGE', '3600')),
+            max_rss_mb=float(os.environ.get('SCRAPER_RECYCLE_MAX_RSS_MB', '1500')),
+            max_consecutive_errors=int(os.environ.get('SCRAPER_RECYCLE_MAX_ERRORS', '3')),
+        )
+
+    def reason(self, stats: Dict) -> Optional[str]:
+        """Motivo para reciclar según ``stats`` (navigations, started_at, rss_bytes, errors), o None."""
+        if self.max_consecutive_errors and stats.get('errors', 0) >= self.max_consecutive_errors:
+            return 'errors'
+        if self.max_navigations and stats.get('navigations', 0) >= self.max_navigations:
+            return 'navigations'
+        started_at = stats.get('started_at')
+        if self.max_age and started_at and time.time() - started_at >= self.max_age:
+            return 'age'
+        rss = stats.get('rss_bytes')
+        if self.max_rss_mb and rss and rss >= self.max_rss_mb * 1024 * 1024:
+            return 'memory'
+        return None
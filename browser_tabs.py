@@ -0,0 +1,234 @@
+"""Varias pestañas de un mismo Chrome atendiendo solicitudes concurrentes.
+
+Cada ``FacebookSeleniumScraper`` normal lanza su propio proceso de Chrome
+(cientos de MB). En modo pestañas, un ``BrowserHost`` lanza un solo navegador y
+entrega pestañas (``TabDriver``) que los scrapers usan como si fueran un driver
+propio. WebDriver solo atiende un comando a la vez y siempre sobre la ventana
+activa, así que cada comando toma el lock del navegador y cambia a su pestaña;
+las esperas (carga de página, polls de ``wait_for``) sueltan el lock y las
+demás pestañas avanzan mientras tanto.
+
+El log ``performance`` de chromedriver es uno solo por navegador: el host lo
+lee y reparte las entradas por pestaña (campo ``webview``), de modo que la
+``NetworkCapture`` de cada scrape solo ve sus propias peticiones. Un host lanzado
+sin captura de red (``network_capture=False``) no tiene ese log.
+"""
+import logging
+import threading
+import time
+from typing import Dict, List, Optional
+
+from selenium.common.exceptions import TimeoutException
+
+from network_capture import entry_webview
+from scraper_selenium import _JS_HIDE_WEBDRIVER, FacebookSeleniumScraper
+
+logger = logging.getLogger(__name__)
+
+# Marca en el documento actual: desaparece cuando la navegación crea uno nuevo
+_JS_START_NAVIGATION = "window.__tabNavigationPending = true; window.location.assign(arguments[0]);"
+_JS_NAVIGATION_LOADED = "return !window.__tabNavigationPending && document.readyState === 'complete';"
+
+
+class BrowserHost:
+    """Un proceso de Chrome compartido por varias pestañas."""
+
+    PAGE_LOAD_TIMEOUT = 30.0
+    LOAD_POLL_INTERVAL = 0.1
+    # Entradas de performance guardadas por pestaña sin consumir (descarta las más viejas)
+    MAX_BUFFERED_ENTRIES = 5000
+
+    def __init__(self, index: int, headless: bool = True, network_capture: bool = True):
+        self.index = index
+        self.headless = headless
+        self.network_capture = network_capture
+        self.lock = threading.RLock()
+        self._owner: Optional[FacebookSeleniumScraper] = None
+        self._current_handle: Optional[str] = None
+        self._spare_handle: Optional[str] = None
+        self._tabs: Dict[str, 'TabDriver'] = {}
+        self._log_buffers: Dict[str, List[Dict]] = {}
+
+    @property
+    def driver(self):
+        return self._owner.driver if self._owner is not None else None
+
+    @property
+    def launched(self) -> bool:
+        return self.driver is not None
+
+    @property
+    def open_tabs(self) -> int:
+        with self.lock:
+            return len(self._tabs)
+
+    def _launch(self):
+        # Llamar con self.lock tomado
+        owner = FacebookSeleniumScraper(headless=self.headless, block_images=False,
+                                        network_capture=self.network_capture)
+        owner.setup_driver()
+        self._owner = owner
+        # La ventana inicial se reutiliza como primera pestaña
+        self._spare_handle = owner.driver.current_window_handle
+        self._current_handle = self._spare_handle
+        logger.info(f"🗂️ Navegador {self.index} lanzado en modo pestañas")
+
+    @property
+    def launched_at(self) -> Optional[float]:
+        return self._owner.driver_started_at if self._owner is not None else None
+
+    def ensure_launched(self):
+        with self.lock:
+            if not self.launched:
+                self._launch()
+
+    def activate(self, handle: str):
+        # Llamar con self.lock tomado
+        if self._current_handle != handle:
+            self.driver.switch_to.window(handle)
+            self._current_handle = handle
+
+    def open_tab(self) -> 'TabDriver':
+        """Abre (o reutiliza) una pestaña y retorna su driver."""
+        with self.lock:
+            if not self.launched:
+                self._launch()
+            driver = self.driver
+            if self._spare_handle is not None:
+                handle = self._spare_handle
+                self._spare_handle = None
+                self.activate(handle)
+            else:
+                driver.switch_to.new_window('tab')
+                handle = driver.current_window_handle
+                self._current_handle = handle
+                driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": _JS_HIDE_WEBDRIVER})
+            try:
+                webview = driver.execute_cdp_cmd('Target.getTargetInfo', {})['targetInfo']['targetId']
+            except Exception:
+                # chromedriver usa el id del target como handle de la ventana
+                webview = handle
+            tab = TabDriver(self, handle, webview)
+            self._tabs[handle] = tab
+            self._log_buffers[webview] = []
+            return tab
+
+    def close_tab(self, tab: 'TabDriver'):
+        with self.lock:
+            if self._tabs.pop(tab.handle, None) is None:
+                return
+            self._log_buffers.pop(tab.webview, None)
+            if not self.launched:
+                return
+            try:
+                if self._tabs or self._spare_handle is not None:
+                    self.activate(tab.handle)
+                    self.driver.close()
+                    self._current_handle = None
+                else:
+                    # Chrome se cierra con su última ventana: dejarla en blanco para la próxima pestaña
+                    self.activate(tab.handle)
+                    self.driver.get('about:blank')
+                    self._spare_handle = tab.handle
+            except Exception as e:
+                logger.warning(f"No se pudo cerrar la pestaña {tab.handle}: {e}")
+                self._current_handle = None
+
+    def read_log(self, webview: str) -> List[Dict]:
+        """Entradas de performance nuevas de una pestaña; reparte las de las demás en sus buffers."""
+        with self.lock:
+            try:
+                entries = self.driver.get_log('performance')
+            except Exception as e:
+                logger.debug(f"No se pudo leer performance logs: {e}")
+                entries = []
+            for entry in entries:
+                buffer = self._log_buffers.get(entry_webview(entry))
+                if buffer is not None:
+                    buffer.append(entry)
+                    if len(buffer) > self.MAX_BUFFERED_ENTRIES:
+                        del buffer[:len(buffer) - self.MAX_BUFFERED_ENTRIES]
+            own = self._log_buffers.get(webview)
+            if own is None:
+                return []
+            self._log_buffers[webview] = []
+            return own
+
+    def quit(self):
+        with self.lock:
+            owner = self._owner
+            self._owner = None
+            self._tabs.clear()
+            self._log_buffers.clear()
+            self._current_handle = None
+            self._spare_handle = None
+        if owner is not None:
+            owner.close()
+
+
+class TabDriver:
+    """Driver de una pestaña: la parte de la API de WebDriver que usa el scraper."""
+
+    def __init__(self, host: BrowserHost, handle: str, webview: str):
+        self.host = host
+        self.handle = handle
+        self.webview = webview
+
+    def _call(self, func):
+        with self.host.lock:
+            self.host.activate(self.handle)
+            return func()
+
+    def get(self, url: str):
+        """Como ``WebDriver.get`` pero sin retener el navegador mientras carga la página."""
+        self._call(lambda: self.host.driver.execute_script(_JS_START_NAVIGATION, url))
+        deadline = time.monotonic() + self.host.PAGE_LOAD_TIMEOUT
+        while True:
+            try:
+                if self._call(lambda: self.host.driver.execute_script(_JS_NAVIGATION_LOADED)):
+                    return
+            except Exception:
+                # Documento en transición: reintentar en el siguiente poll
+                pass
+            if time.monotonic() >= deadline:
+                raise TimeoutException(f"La pestaña no terminó de cargar {url}")
+            time.sleep(self.host.LOAD_POLL_INTERVAL)
+
+    def execute_script(self, script: str, *args):
+        return self._call(lambda: self.host.driver.execute_script(script, *args))
+
+    def execute_cdp_cmd(self, cmd: str, cmd_args: Dict):
+        # chromedriver envía los comandos CDP al target de la ventana activa
+        return self._call(lambda: self.host.driver.execute_cdp_cmd(cmd, cmd_args))
+
+    def get_cookies(self):
+        return self._call(lambda: self.host.driver.get_cookies())
+
+    def get_log(self, log_type: str):
+        if log_type != 'performance':
+            return self._call(lambda: self.host.driver.get_log(log_type))
+        return self.host.read_log(self.webview)
+
+    @property
+    def page_source(self) -> str:
+        return self._call(lambda: self.host.driver.page_source)
+
+    @property
+    def current_url(self) -> str:
+        return self._call(lambda: self.host.driver.current_url)
+
+    def quit(self):
+        """Cierra solo esta pestaña; el navegador sigue atendiendo a las demás."""
+        self.host.close_tab(self)
+
+
+class TabScraper(FacebookSeleniumScraper):
+    """Scraper cuyo driver es una pestaña de un ``BrowserHost`` compartido."""
+
+    def __init__(self, host: BrowserHost):
+        super().__init__(headless=host.headless, block_images=False, network_capture=host.network_capture)
+        self.host = host
+
+    def setup_driver(self):
+        self.driver = self.host.open_tab()
+        self._reset_driver_stats()
@@ -0,0 +1,263 @@
+"""Descarga segmentada y reanudable de videos de fbcdn.
+
+fbcdn limita el ancho de banda por conexión, así que un archivo grande se
+divide en rangos (``Range: bytes=a-b``) que se piden en paralelo y se escriben
+en su posición dentro de un archivo ``.part`` preasignado. El avance de cada
+segmento se guarda en ``<destino>.part.json``: si la descarga se interrumpe, la
+siguiente llamada continúa desde ahí. Al terminar se verifica el tamaño contra
+el ``Content-Length`` esperado antes de renombrar al destino final.
+"""
+import json
+import logging
+import os
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from http_client import HttpClient
+
+logger = logging.getLogger(__name__)
+
+_CONTENT_RANGE_RE = re.compile(r'bytes\s+(\d+)-(\d+)/(\d+|\*)')
+
+
+class DownloadError(Exception):
+    """La descarga no se pudo completar o el archivo no tiene el tamaño esperado."""
+
+
+class _Segment:
+    __slots__ = ('index', 'start', 'end', 'done')
+
+    def __init__(self, index: int, start: int, end: int, done: int = 0):
+        self.index = index
+        self.start = start
+        self.end = end  # inclusivo
+        self.done = done
+
+    @property
+    def length(self) -> int:
+        return self.end - self.start + 1
+
+    @property
+    def complete(self) -> bool:
+        return self.done >= self.length
+
+
+def _resource_key(url: str) -> str:
+    # Las URLs firmadas de fbcdn cambian de query en cada resolución; el recurso es el mismo
+    parsed = urlparse(url)
+    return f"{parsed.netloc}{parsed.path}"
+
+
+class SegmentedDownloader:
+    """Descarga por rangos en paralelo con punto de control en un archivo auxiliar."""
+
+    CHECKPOINT_INTERVAL = 1.0
+
+    def __init__(self, client: HttpClient, segments: int = 4, min_segment_size: int = 2 * 1024 * 1024,
+                 chunk_size: int = 256 * 1024, retries: int = 3, timeout: float = 30.0):
+        self.client = client
+        self.segments = max(1, segments)
+        self.min_segment_size = max(1, min_segment_size)
+        self.chunk_size = chunk_size
+        self.retries = max(0, retries)
+        self.timeout = timeout
+
+    # -- tamaño y soporte de rangos ------------------------------------------------
+
+    def _probe(self, url: str, request_kwargs: Dict) -> Dict:
+        """Pide el primer byte para conocer el tamaño total y si el servidor acepta rangos."""
+        headers = dict(request_kwargs.get('headers') or {})
+        headers['Range'] = 'bytes=0-0'
+        with self.client.get(url, stream=True, timeout=(8, self.timeout),
+                             **dict(request_kwargs, headers=headers)) as r:
+            if r.status_code == 206:
+                match = _CONTENT_RANGE_RE.search(r.headers.get('Content-Range') or '')
+                total = int(match.group(3)) if match and match.group(3) != '*' else None
+                return {'status': r.status_code, 'total': total, 'ranges': total is not None}
+            if r.status_code == 200:
+                cl = r.headers.get('Content-Length')
+                return {'status': r.status_code, 'total': int(cl) if cl and cl.isdigit() else None, 'ranges': False}
+            raise DownloadError(f"El servidor respondió {r.status_code}")
+
+    def _plan(self, total: int) -> List[_Segment]:
+        count = max(1, min(self.segments, total // self.min_segment_size))
+        size = -(-total // count)
+        return [_Segment(i, start, min(start + size, total) - 1) for i, start in enumerate(range(0, total, size))]
+
+    # -- punto de control ---------------------------------------------------------
+
+    @staticmethod
+    def _load_checkpoint(sidecar: str, resource: str, total: int) -> Optional[List[_Segment]]:
+        try:
+            with open(sidecar, 'r', encoding='utf-8') as fh:
+                state = json.load(fh)
+        except (OSError, ValueError):
+            return None
+        if state.get('resource') != resource or state.get('total') != total:
+            return None
+        try:
+            return [_Segment(i, int(s), int(e), int(d)) for i, (s, e, d) in enumerate(state['segments'])]
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    @staticmethod
+    def _save_checkpoint(sidecar: str, resource: str, total: int, segments: List[_Segment]):
+        tmp_path = f"{sidecar}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            json.dump({
+                'resource': resource,
+                'total': total,
+                'segments': [[seg.start, seg.end, seg.done] for seg in segments],
+            }, fh)
+        os.replace(tmp_path, sidecar)
+
+    # -- descarga -----------------------------------------------------------------
+
+    def _fetch_segment(self, url: str, request_kwargs: Dict, part_path: str, segment: _Segment, on_progress):
+        attempts = 0
+        while not segment.complete:
+            offset = segment.start + segment.done
+            headers = dict(request_kwargs.get('headers') or {})
+            headers['Range'] = f'bytes={offset}-{segment.end}'
+            try:
+                with self.client.get(url, stream=True, timeout=(8, self.timeout),
+                                     **dict(request_kwargs, headers=headers)) as r:
+                    if r.status_code != 206:
+                        raise DownloadError(f"Rango {offset}-{segment.end}: el servidor respondió {r.status_code}")
+                    match = _CONTENT_RANGE_RE.search(r.headers.get('Content-Range') or '')
+                    if not match or int(match.group(1)) != offset:
+                        raise DownloadError(f"Content-Range inesperado para {offset}-{segment.end}")
+
+                    with open(part_path, 'r+b') as fh:
+                        fh.seek(offset)
+                        for chunk in r.iter_content(chunk_size=self.chunk_size):
+                            if not chunk:
+                                continue
+                            chunk = chunk[:segment.length - segment.done]
+                            fh.write(chunk)
+                            fh.flush()
+                            segment.done += len(chunk)
+                            on_progress()
+                            if segment.complete:
+                                break
+                if not segment.complete:
+                    raise DownloadError(f"Rango {offset}-{segment.end} terminó antes de tiempo")
+            except Exception as e:
+                attempts += 1
+                if attempts > self.retries:
+                    raise
+                logger.warning(f"Segmento {segment.index} falló ({e}), reintentando desde {segment.start + segment.done}")
+                time.sleep(min(2.0, 0.5 * attempts))
+
+    def _fetch_whole(self, url: str, request_kwargs: Dict, part_path: str, total: Optional[int]) -> int:
+        """Sin soporte de rangos: una sola conexión desde el principio."""
+        written = 0
+        with self.client.get(url, stream=True, timeout=(8, self.timeout), **request_kwargs) as r:
+            if r.status_code != 200:
+                raise DownloadError(f"El servidor respondió {r.status_code}")
+            with open(part_path, 'wb') as fh:
+                for chunk in r.iter_content(chunk_size=self.chunk_size):
+                    fh.write(chunk)
+                    written += len(chunk)
+        if total is not None and written != total:
+            raise DownloadError(f"Se recibieron {written} bytes de {total}")
+        return written
+
+    def download(self, url: str, dest_path: str, headers: Optional[Dict[str, str]] = None,
+                 cookies: Optional[Dict[str, str]] = None, referer: Optional[str] = None,
+                 expected_length: Optional[int] = None, accept_ranges: Optional[bool] = None) -> Dict:
+        """Descarga ``url`` en ``dest_path`` y retorna un resumen.
+
+        ``expected_length`` y ``accept_ranges`` (p. ej. del ``probe`` ya validado)
+        evitan una petición previa; si faltan se averiguan con un rango de 1 byte.
+        """
+        started = time.monotonic()
+        request_kwargs = {'headers': dict(headers or {}), 'cookies': cookies or None, 'referer': referer}
+        part_path = f"{dest_path}.part"
+        sidecar = f"{dest_path}.part.json"
+        resource = _resource_key(url)
+
+        if expected_length is None or accept_ranges is None:
+            info = self._probe(url, request_kwargs)
+            expected_length = info['total'] if expected_length is None else expected_length
+            accept_ranges = info['ranges'] if accept_ranges is None else accept_ranges
+
+        result = {
+            'success': False,
+            'path': dest_path,
+            'url': url,
+            'bytes': 0,
+            'expected_bytes': expected_length,
+            'segments': 1,
+            'resumed_bytes': 0,
+            'elapsed_seconds': None,
+            'error': None,
+        }
+
+        if os.path.exists(dest_path) and expected_length is not None and os.path.getsize(dest_path) == expected_length:
+            result.update(success=True, bytes=expected_length, elapsed_seconds=0.0)
+            return result
+
+        os.makedirs(os.path.dirname(os.path.abspath(dest_path)), exist_ok=True)
+
+        if not accept_ranges or not expected_length:
+            written = self._fetch_whole(url, request_kwargs, part_path, expected_length)
+            os.replace(part_path, dest_path)
+            result.update(success=True, bytes=written,
+                          elapsed_seconds=round(time.monotonic() - started, 3))
+            return result
+
+        segments = self._load_checkpoint(sidecar, resource, expected_length) if os.path.exists(part_path) else None
+        if segments is None:
+            segments = self._plan(expected_length)
+            # Archivo preasignado: cada segmento escribe en su posición
+            with open(part_path, 'wb') as fh:
+                fh.truncate(expected_length)
+        resumed = sum(seg.done for seg in segments)
+        if resumed:
+            logger.info(f"⏯️ Reanudando descarga: {resumed}/{expected_length} bytes ya presentes")
+
+        lock = threading.Lock()
+        last_checkpoint = [time.monotonic()]
+
+        def on_progress():
+            now = time.monotonic()
+            if now - last_checkpoint[0] < self.CHECKPOINT_INTERVAL:
+                return
+            with lock:
+                if now - last_checkpoint[0] >= self.CHECKPOINT_INTERVAL:
+                    last_checkpoint[0] = now
+                    self._save_checkpoint(sidecar, resource, expected_length, segments)
+
+        self._save_checkpoint(sidecar, resource, expected_length, segments)
+        pending = [seg for seg in segments if not seg.complete]
+        try:
+            if pending:
+                with ThreadPoolExecutor(max_workers=len(pending), thread_name_prefix="segment") as executor:
+                    futures = [executor.submit(self._fetch_segment, url, request_kwargs, part_path, seg, on_progress)
+                               for seg in pending]
+                    for future in futures:
+                        future.result()
+        finally:
+            with lock:
+                self._save_checkpoint(sidecar, resource, expected_length, segments)
+
+        size = os.path.getsize(part_path)
+        downloaded = sum(seg.done for seg in segments)
+        if size != expected_length or downloaded != expected_length:
+            raise DownloadError(f"Tamaño final {size} (descargados {downloaded}) distinto del esperado {expected_length}")
+
+        os.replace(part_path, dest_path)
+        os.remove(sidecar)
+        result.update(
+            success=True,
+            bytes=expected_length,
+            segments=len(segments),
+            resumed_bytes=resumed,
+            elapsed_seconds=round(time.monotonic() - started, 3),
+        )
+        return result
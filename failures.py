@@ -0,0 +1,91 @@
+"""Clasificación de los fallos de scraping.
+
+Cada resultado fallido lleva ``error_category`` y ``retryable`` para que el
+cliente sepa si tiene sentido reintentar:
+
+- ``not_found``: la página cargó pero no hay video/post (borrado, sin video).
+- ``login_wall``: Facebook redirigió al login o a un checkpoint (post privado).
+- ``timeout``: la navegación o una espera del driver agotó su tiempo.
+- ``driver_error``: Chrome/chromedriver falló (sesión caída, pestaña cerrada...).
+- ``network_error``: DNS, conexión rechazada o cortada, proxy.
+- ``busy``: sin navegador o lugar de admisión libre (429).
+- ``invalid``: la entrada no es una URL de Facebook.
+- ``error``: cualquier otra excepción.
+
+``not_found``, ``login_wall`` e ``invalid`` son deterministas: repetir la
+solicitud da lo mismo. Los dos primeros se pueden cachear
+(``NegativeResultCache``); el resto es transitorio y no se cachea.
+"""
+import socket
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from selenium.common.exceptions import TimeoutException, WebDriverException
+
+NOT_FOUND = 'not_found'
+LOGIN_WALL = 'login_wall'
+TIMEOUT = 'timeout'
+DRIVER_ERROR = 'driver_error'
+NETWORK_ERROR = 'network_error'
+BUSY = 'busy'
+INVALID = 'invalid'
+ERROR = 'error'
+
+DETERMINISTIC = frozenset({NOT_FOUND, LOGIN_WALL, INVALID})
+
+# Errores de navegación de Chrome (``unknown error: net::ERR_...``) que son de red, no del driver
+_CHROME_NETWORK_ERRORS = ('net::err_', 'err_connection', 'err_name_not_resolved', 'err_proxy', 'err_internet_disconnected')
+_CHROME_TIMEOUT_ERRORS = ('timed out receiving message from renderer', 'net::err_timed_out')
+_LOGIN_PATHS = ('/login', '/checkpoint', '/cookie/consent')
+
+
+def classify_exception(error: BaseException) -> str:
+    """Categoría de una excepción del driver, del cliente HTTP o de sockets."""
+    message = str(error).lower()
+    if isinstance(error, (TimeoutException, requests.Timeout, socket.timeout, TimeoutError)):
+        return TIMEOUT
+    if isinstance(error, WebDriverException):
+        if any(marker in message for marker in _CHROME_TIMEOUT_ERRORS):
+            return TIMEOUT
+        if any(marker in message for marker in _CHROME_NETWORK_ERRORS):
+            return NETWORK_ERROR
+        return DRIVER_ERROR
+    if isinstance(error, (requests.ConnectionError, ConnectionError, socket.gaierror)):
+        return NETWORK_ERROR
+    return ERROR
+
+
+def is_login_wall(url: Optional[str]) -> bool:
+    """True si ``url`` (la URL final tras redirecciones) es el login o un checkpoint de Facebook."""
+    if not url:
+        return False
+    parsed = urlparse(url)
+    if 'facebook.com' not in (parsed.hostname or ''):
+        return False
+    path = parsed.path.lower()
+    # Segmentos completos (/login, /login/..., /login.php): /loginradius/posts/1 es un post real
+    return any(path == prefix or path.startswith((prefix + '/', prefix + '.')) for prefix in _LOGIN_PATHS)
+
+
+def is_retryable(category: Optional[str]) -> bool:
+    return category not in DETERMINISTIC
+
+
+def failure(error: str, category: str, **fields) -> Dict:
+    """Resultado fallido con su categoría."""
+    result = {'success': False, 'error': error}
+    result.update(fields)
+    return tag(result, category)
+
+
+def tag(result: Dict, category: str) -> Dict:
+    """Agrega ``error_category`` y ``retryable`` a un resultado fallido (en el mismo dict)."""
+    result['error_category'] = category
+    result['retryable'] = is_retryable(category)
+    return result
+
+
+def category_of(result: Dict) -> str:
+    """Categoría de un resultado fallido; los que no la traen se tratan como ``error``."""
+    return result.get('error_category') or ERROR
@@ -0,0 +1,196 @@
+"""Extracción en una sola pasada del HTML de una página de Facebook.
+
+En lugar de construir un árbol BeautifulSoup y recorrerlo varias veces
+(``find_all('img')``, meta tags, ``div[data-ft]``, ``get_text()``...), un
+recolector basado en eventos recorre el documento una vez y guarda solo lo que
+usan los scrapers: imágenes, meta tags, textos, el primer ``<video>`` y los
+enlaces. Usa el parser de lxml si está instalado y, si no, ``html.parser`` de la
+biblioteca estándar.
+"""
+from html.parser import HTMLParser
+from typing import Dict, List, Optional
+
+try:
+    from lxml import etree as _lxml_etree
+except ImportError:
+    _lxml_etree = None
+
+# Contenido que BeautifulSoup.get_text() no considera texto visible. ``<noscript>`` sí cuenta:
+# get_text() lo incluye (en /share suele ser el único texto, "Para continuar, inicia sesión...")
+_NON_TEXT_TAGS = frozenset(('script', 'style', 'template'))
+
+
+class PageExtract:
+    """Resultado de una pasada: todo lo que los scrapers consultan del HTML."""
+
+    def __init__(self):
+        self.img_srcs: List[str] = []
+        self.img_data_srcs: List[str] = []
+        self.meta_property: Dict[str, str] = {}
+        self.meta_name: Dict[str, str] = {}
+        self.image_src_link: Optional[str] = None
+        self.data_ft_texts: List[str] = []
+        self.video_src: Optional[str] = None
+        self.video_source_src: Optional[str] = None
+        self.has_video = False
+        self.hrefs: List[str] = []
+        self.text_parts: List[str] = []
+
+    def meta(self, key: str) -> Optional[str]:
+        """Primer ``content`` de ``<meta property=key>``, o de ``<meta name=key>``."""
+        return self.meta_property.get(key) or self.meta_name.get(key)
+
+    def meta_image_candidates(self) -> List[str]:
+        candidates: List[str] = []
+        for prop in ('og:image', 'og:image:url', 'og:image:secure_url', 'twitter:image'):
+            content = self.meta(prop)
+            if content and content not in candidates:
+                candidates.append(content)
+        if self.image_src_link and self.image_src_link not in candidates:
+            candidates.append(self.image_src_link)
+        return candidates
+
+    def longest_data_ft_text(self, min_length: int = 20) -> str:
+        best = ""
+        for text in self.data_ft_texts:
+            if len(text) > min_length and len(text) > len(best):
+                best = text
+        return best
+
+    def first_long_line(self, min_length: int = 30) -> str:
+        """Primera línea del texto visible con más de ``min_length`` caracteres."""
+        for line in ''.join(self.text_parts).split('\n'):
+            stripped = line.strip()
+            if len(stripped) > min_length:
+                return stripped
+        return ""
+
+
+class _Collector:
+    """Recolector con la interfaz de "target" de lxml (start/end/data/close)."""
+
+    def __init__(self):
+        self.result = PageExtract()
+        self._skip_depth = 0
+        self._div_depth = 0
+        # Pila de divs con data-ft abiertos: (profundidad, fragmentos de texto)
+        self._data_ft_stack: List[tuple] = []
+        self._in_first_video = False
+
+    def start(self, tag, attrs):
+        tag = tag.lower() if isinstance(tag, str) else ''
+        result = self.result
+        if tag in _NON_TEXT_TAGS:
+            self._skip_depth += 1
+        elif tag == 'img':
+            src = attrs.get('src')
+            if src:
+                result.img_srcs.append(src)
+            data_src = attrs.get('data-src')
+            if data_src:
+                result.img_data_srcs.append(data_src)
+        elif tag == 'a':
+            href = attrs.get('href')
+            if href:
+                result.hrefs.append(href)
+        elif tag == 'div':
+            self._div_depth += 1
+            if 'data-ft' in attrs:
+                self._data_ft_stack.append((self._div_depth, []))
+        elif tag == 'meta':
+            content = attrs.get('content')
+            if content is not None:
+                prop = attrs.get('property')
+                if prop and prop not in result.meta_property:
+                    result.meta_property[prop] = content
+                name = attrs.get('name')
+                if name and name not in result.meta_name:
+                    result.meta_name[name] = content
+        elif tag == 'link':
+            rel = attrs.get('rel')
+            if result.image_src_link is None and rel and 'image_src' in rel.lower() and attrs.get('href'):
+                result.image_src_link = attrs['href']
+        elif tag == 'video':
+            if not result.has_video:
+                result.has_video = True
+                result.video_src = attrs.get('src') or attrs.get('data-src')
+                self._in_first_video = True
+        elif tag == 'source':
+            if self._in_first_video and result.video_source_src is None:
+                result.video_source_src = attrs.get('src')
+
+    def end(self, tag):
+        tag = tag.lower() if isinstance(tag, str) else ''
+        if tag in _NON_TEXT_TAGS:
+            if self._skip_depth:
+                self._skip_depth -= 1
+        elif tag == 'div':
+            if self._data_ft_stack and self._data_ft_stack[-1][0] == self._div_depth:
+                _, parts = self._data_ft_stack.pop()
+                self.result.data_ft_texts.append(''.join(parts))
+            if self._div_depth:
+                self._div_depth -= 1
+        elif tag == 'video':
+            self._in_first_video = False
+
+    def data(self, text):
+        if self._skip_depth or not text:
+            return
+        self.result.text_parts.append(text)
+        if self._data_ft_stack:
+            stripped = text.strip()
+            if stripped:
+                for _, parts in self._data_ft_stack:
+                    parts.append(stripped)
+
+    def close(self):
+        # Divs con data-ft sin cerrar (HTML truncado)
+        while self._data_ft_stack:
+            _, parts = self._data_ft_stack.pop()
+            self.result.data_ft_texts.append(''.join(parts))
+        return self.result
+
+
+class _StdlibParser(HTMLParser):
+    def __init__(self, collector: _Collector):
+        super().__init__(convert_charrefs=True)
+        self._collector = collector
+
+    def handle_starttag(self, tag, attrs):
+        self._collector.start(tag, {k: (v if v is not None else '') for k, v in attrs})
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in ('img', 'meta', 'link', 'source', 'br', 'input', 'hr'):
+            self._collector.end(tag)
+
+    def handle_endtag(self, tag):
+        self._collector.end(tag)
+
+    def handle_data(self, data):
+        self._collector.data(data)
+
+
+def parser_backend() -> str:
+    return 'lxml' if _lxml_etree is not None else 'html.parser'
+
+
+def extract_page(html: Optional[str]) -> PageExtract:
+    """Recorre ``html`` una sola vez y retorna un ``PageExtract``."""
+    collector = _Collector()
+    if not html:
+        return collector.close()
+
+    if _lxml_etree is not None:
+        try:
+            parser = _lxml_etree.HTMLParser(target=collector, recover=True, remove_comments=True)
+            parser.feed(html)
+            return parser.close()
+        except Exception:
+            # Documento que libxml2 no acepta: repetir con el parser estándar
+            collector = _Collector()
+
+    parser = _StdlibParser(collector)
+    parser.feed(html)
+    parser.close()
+    return collector.close()
@@ -0,0 +1,106 @@
+"""Cliente HTTP compartido (sin navegador) con pool de conexiones.
+
+Todas las peticiones salientes que no pasan por Chrome (probes, ranking de
+candidatos, previews de /share) usan una única ``requests.Session`` para
+reutilizar conexiones TCP/TLS a los mismos hosts de fbcdn y facebook.
+"""
+import threading
+from http.cookiejar import DefaultCookiePolicy
+from typing import Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"
+DEFAULT_REFERER = "https://m.facebook.com/"
+
+
+class HttpClient:
+    """Sesión thread-safe con pool por host, keep-alive, reintentos y cabeceras por defecto."""
+
+    def __init__(self, pool_hosts: int = 10, pool_maxsize: int = 20, retries: int = 2,
+                 backoff_factor: float = 0.3, default_headers: Optional[Dict[str, str]] = None,
+                 proxy: Optional[str] = None):
+        self.pool_hosts = pool_hosts
+        self.pool_maxsize = pool_maxsize
+        retry = Retry(
+            total=retries,
+            connect=retries,
+            read=retries,
+            status=retries,
+            backoff_factor=backoff_factor,
+            status_forcelist=(500, 502, 503, 504),
+            allowed_methods=frozenset(['HEAD', 'GET']),
+            raise_on_status=False,
+        )
+        self._adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=pool_maxsize, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount('https://', self._adapter)
+        self.session.mount('http://', self._adapter)
+        # Las cookies se pasan por petición: no compartir las de respuestas entre clientes
+        self.session.cookies.set_policy(DefaultCookiePolicy(allowed_domains=[]))
+        self.session.headers.update({
+            "User-Agent": DEFAULT_USER_AGENT,
+            "Referer": DEFAULT_REFERER,
+            "Connection": "keep-alive",
+        })
+        if default_headers:
+            self.session.headers.update(default_headers)
+        if proxy:
+            self.session.proxies.update({'http': proxy, 'https': proxy})
+
+        self._lock = threading.Lock()
+        self._requests_total = 0
+        self._errors_total = 0
+
+    def request(self, method: str, url: str, referer: Optional[str] = None,
+                headers: Optional[Dict[str, str]] = None, **kwargs) -> requests.Response:
+        merged = dict(headers) if headers else {}
+        if referer:
+            merged.setdefault("Referer", referer)
+        with self._lock:
+            self._requests_total += 1
+        try:
+            return self.session.request(method, url, headers=merged, **kwargs)
+        except requests.RequestException:
+            with self._lock:
+                self._errors_total += 1
+            raise
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault('allow_redirects', True)
+        return self.request('GET', url, **kwargs)
+
+    def head(self, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault('allow_redirects', True)
+        return self.request('HEAD', url, **kwargs)
+
+    def stats(self) -> Dict:
+        """Conexiones abiertas frente a peticiones servidas, por host."""
+        hosts = {}
+        pools = self._adapter.poolmanager.pools
+        for key in pools.keys():
+            pool = pools.get(key)
+            if pool is None:
+                continue
+            host = f"{key.key_scheme}://{key.key_host}"
+            entry = hosts.setdefault(host, {"connections_opened": 0, "requests": 0})
+            entry["connections_opened"] += pool.num_connections
+            entry["requests"] += pool.num_requests
+
+        opened = sum(h["connections_opened"] for h in hosts.values())
+        served = sum(h["requests"] for h in hosts.values())
+        with self._lock:
+            requests_total = self._requests_total
+            errors_total = self._errors_total
+        return {
+            "pool_hosts": self.pool_hosts,
+            "pool_maxsize": self.pool_maxsize,
+            "requests_total": requests_total,
+            "errors_total": errors_total,
+            "connections_opened": opened,
+            "connections_reused": max(0, served - opened),
+            "hosts": hosts,
+        }
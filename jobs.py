@@ -0,0 +1,139 @@
+"""Cola de trabajos en proceso para ejecutar scrapes de forma asíncrona.
+
+``POST /jobs`` encola un trabajo y devuelve su id; un conjunto acotado de hilos
+trabajadores los ejecuta en orden de llegada y el cliente consulta el estado con
+``GET /jobs/{id}`` (opcionalmente esperando con long-poll).
+"""
+import logging
+import queue
+import threading
+import time
+import uuid
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+
+class JobQueueFullError(Exception):
+    """La cola de trabajos alcanzó su tamaño máximo."""
+
+
+class Job:
+    def __init__(self, kind: str, params: Dict[str, Any], func: Callable[[], Dict]):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.params = params
+        self.func = func
+        self.status = JOB_QUEUED
+        self.result: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.created_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.finished = threading.Event()
+
+    def to_dict(self) -> Dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "params": self.params,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobManager:
+    """Cola FIFO acotada + hilos trabajadores + almacén de trabajos con expiración."""
+
+    def __init__(self, workers: int = 1, max_queued: int = 100, ttl_seconds: float = 600.0):
+        self.workers = max(1, workers)
+        self.max_queued = max(1, max_queued)
+        self.ttl_seconds = ttl_seconds
+        self._queue: "queue.Queue[Job]" = queue.Queue(maxsize=self.max_queued)
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        self._threads: List[threading.Thread] = []
+
+    def _ensure_workers(self):
+        # Los hilos se arrancan con el primer trabajo, no al importar el módulo
+        if self._threads:
+            return
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._worker, name=f"scrape-job-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def _purge_expired(self):
+        cutoff = time.time() - self.ttl_seconds
+        expired = [job_id for job_id, job in self._jobs.items() if job.finished_at and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
+
+    def submit(self, kind: str, params: Dict[str, Any], func: Callable[[], Dict]) -> Job:
+        """Encola ``func``; su resultado (dict con ``success``) queda en el trabajo."""
+        job = Job(kind, params, func)
+        with self._lock:
+            self._purge_expired()
+            self._ensure_workers()
+            try:
+                self._queue.put_nowait(job)
+            except queue.Full:
+                raise JobQueueFullError(f"La cola de trabajos está llena ({self.max_queued})")
+            self._jobs[job.id] = job
+        logger.info(f"🧾 Trabajo {job.id} encolado ({kind})")
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def wait(self, job_id: str, timeout: float) -> Optional[Job]:
+        """Long-poll: espera hasta ``timeout`` segundos a que el trabajo termine."""
+        job = self.get(job_id)
+        if job is not None and timeout > 0:
+            job.finished.wait(timeout)
+        return job
+
+    def _worker(self):
+        while True:
+            job = self._queue.get()
+            job.status = JOB_RUNNING
+            job.started_at = time.time()
+            try:
+                result = job.func()
+                job.result = result
+                if result.get('success'):
+                    job.status = JOB_DONE
+                else:
+                    job.status = JOB_FAILED
+                    job.error = result.get('error')
+            except Exception as e:
+                logger.error(f"❌ Trabajo {job.id} falló: {e}")
+                job.status = JOB_FAILED
+                job.error = str(e)
+            finally:
+                job.func = None
+                job.finished_at = time.time()
+                job.finished.set()
+                self._queue.task_done()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            counts = {JOB_QUEUED: 0, JOB_RUNNING: 0, JOB_DONE: 0, JOB_FAILED: 0}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+        return {
+            "workers": self.workers,
+            "max_queued": self.max_queued,
+            "queue_depth": self._queue.qsize(),
+            "jobs": counts,
+        }
@@ -1,13 +1,30 @@
-from fastapi import FastAPI, HTTPException, Query
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field, validator
+from pydantic import BaseModel, Field, root_validator, validator
 import logging
-from scraper_selenium import get_scraper_instance, close_scraper_instance
+from scraper_pool import get_scraper_pool, close_scraper_pool, PoolBusyError
+from jobs import JobManager, JobQueueFullError
+from result_cache import NegativeResultCache, VideoResultCache
+from singleflight import SingleFlight
+from failures import BUSY, INVALID, LOGIN_WALL, NOT_FOUND, category_of, classify_exception, is_retryable, tag
+from downloader import SegmentedDownloader
+from metrics import (CACHE_LOOKUPS_TOTAL, COALESCED_TOTAL, CONTENT_TYPE, NEGATIVE_CACHE_HITS_TOTAL, POOL_SLOTS, POOL_WAITING,
+                     REGISTRY, REQUEST_SECONDS, REQUESTS_TOTAL, RESULTS_TOTAL, THROTTLED_TOTAL)
+from tracing import SlowRequestProfiler, start_trace
+from scraper_selenium import BLOCK_PROFILES, FacebookSeleniumScraper, canonical_post_url, get_http_client
+import asyncio
 import atexit
+import hashlib
+import json
 import os
-from threading import Lock
-from contextlib import contextmanager
-from typing import Optional
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from threading import Event, Lock, Thread
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+from typing import AsyncIterator, Callable, ContextManager, Dict, Iterator, List, Optional
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -27,6 +44,67 @@ app.add_middleware(
 )
 
 
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    started = time.perf_counter()
+    status_code = 500
+    try:
+        response = await call_next(request)
+        status_code = response.status_code
+        return response
+    finally:
+        # Plantilla de la ruta (/jobs/{job_id}) para no crear una serie por cada id
+        route = request.scope.get('route')
+        endpoint = getattr(route, 'path', None) or 'unmatched'
+        labels = {'endpoint': endpoint, 'method': request.method, 'status': str(status_code)}
+        REQUEST_SECONDS.observe(time.perf_counter() - started, **labels)
+        REQUESTS_TOTAL.inc(**labels)
+        if status_code == 429:
+            THROTTLED_TOTAL.inc(endpoint=endpoint)
+
+
+# Perfil por muestreo de las N solicitudes /scrape* más lentas (0 = desactivado)
+PROFILE_SLOWEST = int(os.getenv("SCRAPER_PROFILE_SLOWEST", "0"))
+request_profiler = SlowRequestProfiler(
+    keep=PROFILE_SLOWEST,
+    directory=os.getenv("SCRAPER_PROFILE_DIR", "profiles"),
+    interval=float(os.getenv("SCRAPER_PROFILE_INTERVAL", "0.005"))
+) if PROFILE_SLOWEST > 0 else None
+
+
+def _wants_timings(request: Request) -> bool:
+    return (request.query_params.get('debug') == 'timings'
+            or request.headers.get('x-debug-timings', '').lower() in ('1', 'true'))
+
+
+@app.middleware("http")
+async def trace_request(request: Request, call_next):
+    """``?debug=timings`` (o ``X-Debug-Timings: 1``) agrega el árbol de spans a la respuesta JSON."""
+    debug = request.url.path.startswith('/scrape') and _wants_timings(request)
+    if not debug and (request_profiler is None or not request.url.path.startswith('/scrape')):
+        return await call_next(request)
+
+    with start_trace(f"{request.method} {request.url.path}", profiler=request_profiler) as trace:
+        response = await call_next(request)
+    if request_profiler is not None:
+        await run_in_threadpool(request_profiler.finish, trace)
+    if not debug:
+        return response
+
+    if not response.headers.get('content-type', '').startswith('application/json'):
+        # Respuestas en streaming (NDJSON): solo la cabecera, los spans siguen abiertos mientras se transmite
+        response.headers['Server-Timing'] = trace.server_timing()
+        return response
+
+    body = b''.join([chunk async for chunk in response.body_iterator])
+    content = json.loads(body)
+    if isinstance(content, dict):
+        content['timings'] = trace.to_dict()
+    headers = {key: value for key, value in response.headers.items() if key not in ('content-length', 'content-type')}
+    headers['Server-Timing'] = trace.server_timing()
+    return JSONResponse(content, status_code=response.status_code, headers=headers)
+
+
 class PostURLRequest(BaseModel):
     url: str = Field(..., description="URL completa del post de Facebook")
     
@@ -42,9 +120,68 @@ class PageRequest(BaseModel):
     num_posts: int = Field(default=10, ge=1, le=20, description="Número de posts")
 
 
+BATCH_MAX_URLS = int(os.getenv("SCRAPER_BATCH_MAX_URLS", "500"))
+
+
+class VideoBatchRequest(BaseModel):
+    urls: List[str] = Field(..., min_items=1, max_items=BATCH_MAX_URLS, description="URLs de posts de Facebook")
+
+
+class JobRequest(BaseModel):
+    kind: str = Field(..., description="Tipo de trabajo: scrape, images, video, page o download")
+    url: Optional[str] = Field(default=None, description="URL del post (scrape, images, video, download)")
+    page_url: Optional[str] = Field(default=None, description="URL o nombre de la página (page)")
+    num_posts: int = Field(default=10, ge=1, le=20, description="Número de posts (page)")
+
+    @validator('kind')
+    def validate_kind(cls, v):
+        if v not in ('scrape', 'images', 'video', 'page', 'download'):
+            raise ValueError('kind debe ser scrape, images, video, page o download')
+        return v
+
+    @root_validator(skip_on_failure=True)
+    def validate_target(cls, values):
+        if values['kind'] == 'page':
+            if not values.get('page_url'):
+                raise ValueError('page_url es obligatorio para kind=page')
+        elif not values.get('url') or 'facebook.com' not in values['url'].lower():
+            raise ValueError('La URL debe ser de Facebook')
+        return values
+
+
 class BusyError(Exception):
     """Raised when the scraper is already processing the max allowed requests."""
 
+    def __init__(self, message: str = "Se alcanzó el límite de solicitudes simultáneas (SCRAPER_MAX_CONCURRENT)"):
+        super().__init__(message)
+
+
+class ScrapeFailure(HTTPException):
+    """Error de un scrape fallido; la respuesta agrega ``error_category`` y ``retryable`` a ``detail``."""
+
+    def __init__(self, status_code: int, detail: Optional[str], category: str):
+        super().__init__(status_code=status_code, detail=detail)
+        self.category = category
+
+
+@app.exception_handler(ScrapeFailure)
+async def scrape_failure_handler(request: Request, exc: ScrapeFailure):
+    return JSONResponse(status_code=exc.status_code, content={
+        "detail": exc.detail,
+        "error_category": exc.category,
+        "retryable": is_retryable(exc.category)
+    })
+
+
+def _failed(result: Dict, status_code: int = 404, default: Optional[str] = None) -> ScrapeFailure:
+    """``ScrapeFailure`` para un resultado con ``success`` falso."""
+    return ScrapeFailure(status_code, result.get('error', default), category_of(result))
+
+
+def _errored(error: Exception, status_code: int = 500) -> ScrapeFailure:
+    """``ScrapeFailure`` para una excepción no controlada del scrape."""
+    return ScrapeFailure(status_code, str(error), classify_exception(error))
+
 
 class RequestTracker:
     def __init__(self, max_concurrent: int = 1):
@@ -75,32 +212,137 @@ class RequestTracker:
         }
 
 
+scraper_pool = get_scraper_pool()
+
+# Por defecto se admiten tantas solicitudes como navegadores + cola de espera del pool
 request_tracker = RequestTracker(
-    max_concurrent=int(os.getenv("SCRAPER_MAX_CONCURRENT", "1"))
+    max_concurrent=int(os.getenv("SCRAPER_MAX_CONCURRENT", str(scraper_pool.capacity)))
 )
 
+job_manager = JobManager(
+    workers=int(os.getenv("SCRAPER_JOB_WORKERS", str(scraper_pool.slot_count))),
+    max_queued=int(os.getenv("SCRAPER_JOB_QUEUE_SIZE", "100")),
+    ttl_seconds=float(os.getenv("SCRAPER_JOB_TTL", "600"))
+)
+video_cache = VideoResultCache(
+    max_entries=int(os.getenv("SCRAPER_VIDEO_CACHE_SIZE", "1000")),
+    safety_margin=float(os.getenv("SCRAPER_VIDEO_CACHE_MARGIN", "300")),
+    default_ttl=float(os.getenv("SCRAPER_VIDEO_CACHE_DEFAULT_TTL", "0"))
+)
+
+# Fallos deterministas (post borrado, privado, sin video): se responden sin navegador durante un TTL corto
+negative_cache = NegativeResultCache(
+    ttls={
+        NOT_FOUND: float(os.getenv("SCRAPER_NEGATIVE_TTL_NOT_FOUND", "300")),
+        LOGIN_WALL: float(os.getenv("SCRAPER_NEGATIVE_TTL_LOGIN_WALL", "60"))
+    },
+    max_entries=int(os.getenv("SCRAPER_NEGATIVE_CACHE_SIZE", "1000"))
+)
+
+# Scrapes idénticos (operación + URL canónica) en vuelo se ejecutan una sola vez
+scrape_flights = SingleFlight()
+
+POOL_SLOTS.set_function(lambda: {
+    (state,): count for state, count in scraper_pool.usage().items() if state != 'waiting'
+})
+POOL_WAITING.set_function(lambda: {(): scraper_pool.usage()['waiting']})
+
+# Tier 0: intentar resolver videos por HTTP antes de usar un navegador del pool
+HTTP_FAST_PATH = os.getenv("SCRAPER_HTTP_FAST_PATH", "true").lower() == "true"
+# Instancia sin navegador: solo se usan sus heurísticas HTTP (nunca llama a setup_driver)
+http_scraper = FacebookSeleniumScraper(headless=True)
+
+JOB_LEASE_TIMEOUT = float(os.getenv("SCRAPER_JOB_LEASE_TIMEOUT", "600"))
+
+# Lotes de videos: hilos compartidos por todos los lotes (tier 0 por HTTP + espera de navegador)
+batch_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("SCRAPER_BATCH_WORKERS", str(max(4, scraper_pool.slot_count * 2)))),
+    thread_name_prefix="video-batch"
+)
+JOB_MAX_LONG_POLL = 60.0
+
 DEFAULT_BLOCK_IMAGES = os.getenv("SCRAPER_BLOCK_IMAGES", "true").lower() == "true"
+# Fuerza un perfil de BLOCK_PROFILES para todas las solicitudes (vacío = automático)
+BLOCK_PROFILE_OVERRIDE = os.getenv("SCRAPER_BLOCK_PROFILE", "").strip().lower() or None
+if BLOCK_PROFILE_OVERRIDE and BLOCK_PROFILE_OVERRIDE not in BLOCK_PROFILES:
+    raise ValueError(f"SCRAPER_BLOCK_PROFILE inválido: {BLOCK_PROFILE_OVERRIDE} (opciones: {', '.join(BLOCK_PROFILES)})")
 
 
-def should_block_images(url: Optional[str]) -> bool:
-    """Permite desbloquear imágenes en URLs donde son necesarias (p. ej. /share/)."""
-    if not url:
-        return DEFAULT_BLOCK_IMAGES
+def select_block_profile(url: Optional[str], kind: str) -> str:
+    """Perfil de bloqueo de recursos según el tipo de solicitud.
 
-    lowered = url.lower()
+    ``kind`` es "scrape", "images", "video" o "page". Las URLs /share/ necesitan
+    imágenes para resolver la vista previa.
+    """
+    if BLOCK_PROFILE_OVERRIDE:
+        return BLOCK_PROFILE_OVERRIDE
+
+    lowered = (url or "").lower()
     if "/share/" in lowered or "/sharer/" in lowered:
-        return False
+        return "share"
+    if kind == "images":
+        return "images"
+    if not DEFAULT_BLOCK_IMAGES:
+        return "share" if kind == "video" else "images"
+    return "video" if kind == "video" else "text-only"
+
+
+# Proxy de descarga: hilos propios para leer de fbcdn sin ocupar los del servidor ni los de scraping
+DOWNLOAD_CHUNK_SIZE = int(os.getenv("SCRAPER_DOWNLOAD_CHUNK_SIZE", str(256 * 1024)))
+DOWNLOAD_READ_TIMEOUT = float(os.getenv("SCRAPER_DOWNLOAD_READ_TIMEOUT", "30"))
+download_executor = ThreadPoolExecutor(
+    max_workers=int(os.getenv("SCRAPER_DOWNLOAD_WORKERS", "32")),
+    thread_name_prefix="download"
+)
+# Cabeceras capturadas del navegador que no se reenvían a fbcdn (las decide el proxy)
+_DROPPED_UPSTREAM_HEADERS = {'range', 'if-range', 'host', 'connection', 'accept-encoding', 'content-length', 'cookie'}
+_FORWARDED_RESPONSE_HEADERS = ('Content-Type', 'Content-Length', 'Content-Range', 'Accept-Ranges', 'Last-Modified', 'ETag')
+
+# Descargas a disco (POST /download/file y trabajos "download")
+DOWNLOAD_DIR = os.getenv("SCRAPER_DOWNLOAD_DIR", "downloads")
+file_downloader = SegmentedDownloader(
+    get_http_client(),
+    segments=int(os.getenv("SCRAPER_DOWNLOAD_SEGMENTS", "4")),
+    min_segment_size=int(os.getenv("SCRAPER_DOWNLOAD_MIN_SEGMENT", str(2 * 1024 * 1024))),
+    chunk_size=DOWNLOAD_CHUNK_SIZE,
+    timeout=DOWNLOAD_READ_TIMEOUT
+)
+
+
+# Precalentar navegadores al arrancar: /health no reporta "healthy" hasta que estén listos
+PREWARM = os.getenv("SCRAPER_PREWARM", "false").lower() == "true"
+warmup_done = Event()
+warmup_error: Optional[str] = None
+
+
+def _warm_pool():
+    global warmup_error
+    try:
+        scraper_pool.warm()
+    except Exception as e:
+        warmup_error = str(e)
+    finally:
+        warmup_done.set()
+
 
-    return DEFAULT_BLOCK_IMAGES
+@app.on_event("startup")
+def startup_event():
+    if PREWARM:
+        logger.info("🔥 Precalentando navegadores del pool...")
+        Thread(target=_warm_pool, name="pool-warmup", daemon=True).start()
+    else:
+        warmup_done.set()
 
 
 # Cerrar scraper al apagar la aplicación
 @app.on_event("shutdown")
 def shutdown_event():
     logger.info("🔄 Cerrando scraper...")
-    close_scraper_instance()
+    batch_executor.shutdown(wait=False, cancel_futures=True)
+    download_executor.shutdown(wait=False, cancel_futures=True)
+    close_scraper_pool()
 
-atexit.register(close_scraper_instance)
+atexit.register(close_scraper_pool)
 
 
 @app.get("/")
@@ -117,14 +359,24 @@ def root():
             "POST /scrape/page": "Scrapear múltiples posts de una página",
             "GET /scrape/video?url=...": "URL del video (GET)",
             "POST /scrape/video": "URL del video (POST)",
+            "POST /scrape/video/batch": "URLs de video de muchos posts (NDJSON en streaming)",
+            "GET /download?url=...": "Descargar el video del post (proxy con soporte de Range)",
+            "POST /download/file": "Guardar el video en disco (segmentos en paralelo, reanudable)",
+            "POST /jobs": "Encolar un scrape asíncrono (scrape, images, video, page)",
+            "GET /jobs/{id}?wait=...": "Estado/resultado de un trabajo (long-poll opcional)",
             "GET /health": "Health check",
-            "GET /status": "Estado del scraper / ocupación"
+            "GET /status": "Estado del scraper / ocupación",
+            "GET /metrics": "Métricas en formato Prometheus"
         }
     }
 
 
 @app.get("/health")
 def health():
+    if not warmup_done.is_set():
+        return JSONResponse(status_code=503, content={"status": "warming", "version": "2.0.0", "scraper": "Selenium"})
+    if warmup_error:
+        return JSONResponse(status_code=503, content={"status": "unhealthy", "version": "2.0.0", "scraper": "Selenium", "error": warmup_error})
     return {"status": "healthy", "version": "2.0.0", "scraper": "Selenium"}
 
 
@@ -133,86 +385,250 @@ def status():
     snapshot = request_tracker.snapshot()
     snapshot.update({
         "status": "online",
-        "version": "2.0.0"
+        "version": "2.0.0",
+        "pool": scraper_pool.snapshot(),
+        "jobs": job_manager.snapshot(),
+        "video_cache": video_cache.snapshot(),
+        "negative_cache": negative_cache.snapshot(),
+        "http": get_http_client().stats(),
+        "coalescing": scrape_flights.snapshot()
     })
+    if request_profiler is not None:
+        snapshot["profiler"] = request_profiler.snapshot()
     return snapshot
 
 
+@contextmanager
+def _counted(op: str):
+    """Cuenta en ``scraper_results_total`` las excepciones (429 incluidos) de ``op``."""
+    try:
+        yield
+    except (BusyError, PoolBusyError):
+        RESULTS_TOTAL.inc(op=op, outcome='failure', reason=BUSY)
+        raise
+    except Exception as e:
+        RESULTS_TOTAL.inc(op=op, outcome='failure', reason=classify_exception(e))
+        raise
+
+
+def _record_result(op: str, result: Dict, reason: str) -> Dict:
+    """Cuenta el resultado; los fallidos usan su ``error_category`` como motivo."""
+    if result.get('success'):
+        RESULTS_TOTAL.inc(op=op, outcome='success', reason=reason)
+    else:
+        RESULTS_TOTAL.inc(op=op, outcome='failure', reason=category_of(result))
+    return result
+
+
+@app.get("/metrics")
+def metrics():
+    return Response(REGISTRY.render(), media_type=CONTENT_TYPE)
+
+
+def _flight_key(op: str, url: str):
+    return op, canonical_post_url(url)
+
+
+# True dentro de ``_admitted()``: los scrapes que esta solicitud ejecute pasan por request_tracker
+_admission_required: ContextVar[bool] = ContextVar('scraper_admission_required', default=False)
+
+
+def _busy_retry(lease_options: Dict):
+    """Excepciones "ocupado" del líder que una llamada sumada reintenta por su cuenta.
+
+    Los trabajos y lotes (``enforce_queue_limit=False``) esperan navegador sin el
+    límite de cola: si se suman a una solicitud interactiva que recibe 429, no
+    deben fallar con ella.
+    """
+    return (BusyError, PoolBusyError) if lease_options.get('enforce_queue_limit') is False else ()
+
+
+def _coalesce(op: str, url: str, func: Callable[[], Dict], lease_options: Optional[Dict] = None) -> Dict:
+    """Ejecuta ``func`` o, si ya hay un scrape idéntico en vuelo, espera y comparte su resultado."""
+    admit = request_tracker.track if _admission_required.get() else None
+    result, joined = scrape_flights.do(_flight_key(op, url), func, admit=admit,
+                                       retry_on=_busy_retry(lease_options or {}))
+    if joined:
+        COALESCED_TOTAL.inc(op=op)
+        logger.info(f"🔗 Sumada a un scrape en curso ({op}): {url}")
+        _record_result(op, result, 'coalesced')
+    return result
+
+
+def _negative_key(kind: str, url: str):
+    # /scrape e /images-only hacen el mismo scrape del post: comparten entrada
+    return kind, canonical_post_url(url)
+
+
+def _cached_failure(op: str, kind: str, url: str) -> Optional[Dict]:
+    """Fallo determinista reciente de ``url``, si está en la caché negativa."""
+    cached = negative_cache.get(_negative_key(kind, url))
+    if cached is None:
+        return None
+    NEGATIVE_CACHE_HITS_TOTAL.inc(op=op, category=category_of(cached))
+    logger.info(f"🚫 Fallo en caché ({category_of(cached)}): {url}")
+    return _record_result(op, cached, 'cache')
+
+
+@contextmanager
+def _admitted():
+    """Solicitud de un endpoint: ocupa un lugar de ``request_tracker`` solo si ejecuta un scrape.
+
+    Quien se suma a un scrape en vuelo o responde desde una caché no recibe 429.
+    La decisión es atómica en ``SingleFlight.do``. Los trabajos y lotes no pasan por aquí.
+    """
+    token = _admission_required.set(True)
+    try:
+        yield
+    finally:
+        _admission_required.reset(token)
+
+
+def _run_post_scrape(url: str, profile: str, op: str = 'post', **lease_options) -> Dict:
+    cached = _cached_failure(op, 'post', url)
+    if cached is not None:
+        return cached
+
+    def scrape() -> Dict:
+        with _counted(op), scraper_pool.lease(profile=profile, **lease_options) as scraper:
+            result = scraper.scrape_post_by_url(url)
+        negative_cache.put(_negative_key('post', url), result)
+        return _record_result(op, result, 'browser')
+
+    return _coalesce(op, url, scrape, lease_options)
+
+
+def _run_images_scrape(url: str, **lease_options) -> Dict:
+    result = _run_post_scrape(url, profile=select_block_profile(url, "images"), op='images', **lease_options)
+    if not result['success']:
+        return result
+
+    image_urls = [img['url'] for img in result['post']['images']] if result['post'] else []
+    return {
+        'success': True,
+        'url': url,
+        'total_images': len(image_urls),
+        'images': image_urls
+    }
+
+
+def _run_page_scrape(page_url: str, num_posts: int, **lease_options) -> Dict:
+    profile = select_block_profile(page_url, "page")
+    with _counted('page'), scraper_pool.lease(profile=profile, **lease_options) as scraper:
+        # Otros navegadores libres del pool ayudan a scrapear los posts encontrados
+        result = scraper.scrape_page_posts(page_url, num_posts, borrow_scraper=lambda: scraper_pool.try_lease(profile=profile))
+        return _record_result('page', result, 'browser')
+
+
+def _public_result(result: Dict) -> Dict:
+    """Quita los campos privados (``_fetch_context``: cookies y cabeceras del navegador)."""
+    return {key: value for key, value in result.items() if not key.startswith('_')}
+
+
+def _resolve_video(url: str, use_cache: bool = True, **lease_options) -> Dict:
+    """Caché -> tier 0 (HTTP) -> navegador del pool. Incluye los campos privados."""
+    cache_key = canonical_post_url(url)
+    if use_cache:
+        cached = video_cache.get(cache_key)
+        CACHE_LOOKUPS_TOTAL.inc(result='hit' if cached is not None else 'miss')
+        if cached is not None:
+            logger.info(f"⚡ Video en caché: {cache_key}")
+            return _record_result('video', cached, 'cache')
+        cached = _cached_failure('video', 'video', url)
+        if cached is not None:
+            return cached
+
+    return _coalesce('video', url, lambda: _scrape_video(url, cache_key, **lease_options), lease_options)
+
+
+def _scrape_video(url: str, cache_key: str, **lease_options) -> Dict:
+    """Tier 0 (HTTP) y, si no alcanza, navegador del pool; guarda el resultado en caché."""
+    if HTTP_FAST_PATH:
+        try:
+            result = http_scraper.scrape_video_over_http(url)
+        except Exception as e:
+            logger.warning(f"Tier 0 falló, usando navegador: {e}")
+            result = None
+        if result is not None:
+            video_cache.put(cache_key, result)
+            return _record_result('video', result, 'tier0')
+
+    with _counted('video'), scraper_pool.lease(profile=select_block_profile(url, "video"), **lease_options) as scraper:
+        result = scraper.scrape_video_by_url(url)
+
+    if result.get('success'):
+        video_cache.put(cache_key, result)
+    else:
+        negative_cache.put(_negative_key('video', url), result)
+    return _record_result('video', result, 'tier1')
+
+
+def _run_video_scrape(url: str, **lease_options) -> Dict:
+    return _public_result(_resolve_video(url, **lease_options))
+
+
 @app.post("/scrape")
 def scrape_post(request: PostURLRequest):
     try:
-        with request_tracker.track():
+        with _admitted():
             logger.info(f"📬 POST /scrape - URL: {request.url}")
-            scraper = get_scraper_instance(headless=True, block_images=should_block_images(request.url))
-            result = scraper.scrape_post_by_url(request.url)
+            result = _run_post_scrape(request.url, profile=select_block_profile(request.url, "scrape"))
         
         if not result['success']:
-            raise HTTPException(
-                status_code=404,
-                detail=result.get('error', 'Post no encontrado')
-            )
+            raise _failed(result, default='Post no encontrado')
         
         return result
         
-    except BusyError:
+    except (BusyError, PoolBusyError):
         raise HTTPException(status_code=429, detail="El scraper está procesando otra solicitud, intenta nuevamente en unos segundos")
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"❌ Error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _errored(e)
 
 
 @app.get("/scrape")
 def scrape_get(url: str = Query(..., description="URL del post de Facebook")):
     try:
-        with request_tracker.track():
+        with _admitted():
             logger.info(f"📬 GET /scrape - URL: {url}")
             
             if 'facebook.com' not in url.lower():
-                raise HTTPException(status_code=400, detail="Debe ser URL de Facebook")
+                raise ScrapeFailure(400, "Debe ser URL de Facebook", INVALID)
             
-            scraper = get_scraper_instance(headless=True, block_images=should_block_images(url))
-            result = scraper.scrape_post_by_url(url)
+            result = _run_post_scrape(url, profile=select_block_profile(url, "scrape"))
         
         if not result['success']:
-            raise HTTPException(status_code=404, detail=result.get('error'))
+            raise _failed(result)
         
         return result
         
-    except BusyError:
+    except (BusyError, PoolBusyError):
         raise HTTPException(status_code=429, detail="El scraper está ocupado, intenta nuevamente en unos segundos")
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _errored(e)
 
 
 @app.post("/scrape/images-only")
 def scrape_images_only(request: PostURLRequest):
     try:
-        with request_tracker.track():
-            scraper = get_scraper_instance(headless=True, block_images=False)
-            result = scraper.scrape_post_by_url(request.url)
+        with _admitted():
+            result = _run_images_scrape(request.url)
         
         if not result['success']:
-            raise HTTPException(status_code=404, detail=result.get('error'))
-        
-        image_urls = [img['url'] for img in result['post']['images']] if result['post'] else []
+            raise _failed(result)
         
-        return {
-            'success': True,
-            'url': request.url,
-            'total_images': len(image_urls),
-            'images': image_urls
-        }
+        return result
         
-    except BusyError:
+    except (BusyError, PoolBusyError):
         raise HTTPException(status_code=429, detail="El scraper está ocupado, intenta más tarde")
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _errored(e)
 
 
 @app.post("/scrape/page")
@@ -220,67 +636,295 @@ def scrape_page(request: PageRequest):
     try:
         with request_tracker.track():
             logger.info(f"📄 Scrapeando página: {request.page_url}")
-            scraper = get_scraper_instance(headless=True, block_images=DEFAULT_BLOCK_IMAGES)
-            result = scraper.scrape_page_posts(request.page_url, request.num_posts)
+            result = _run_page_scrape(request.page_url, request.num_posts)
         
         if not result['success']:
-            raise HTTPException(status_code=500, detail=result.get('error'))
+            raise _failed(result, status_code=500)
         
         return result
         
-    except BusyError:
+    except (BusyError, PoolBusyError):
         raise HTTPException(status_code=429, detail="El scraper está ocupado, intenta más tarde")
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _errored(e)
 
 
 @app.get("/scrape/video")
 def scrape_video_get(url: str = Query(..., description="URL del post de Facebook")):
     try:
-        with request_tracker.track():
+        with _admitted():
             logger.info(f"📬 GET /scrape/video - URL: {url}")
 
             if 'facebook.com' not in url.lower():
-                raise HTTPException(status_code=400, detail="Debe ser URL de Facebook")
+                raise ScrapeFailure(400, "Debe ser URL de Facebook", INVALID)
 
-            scraper = get_scraper_instance(headless=True, block_images=should_block_images(url))
-            result = scraper.scrape_video_by_url(url)
+            result = _run_video_scrape(url)
 
         if not result.get('success'):
-            raise HTTPException(status_code=404, detail=result.get('error'))
+            raise _failed(result)
 
         return result
 
-    except BusyError:
+    except (BusyError, PoolBusyError):
         raise HTTPException(status_code=429, detail="El scraper está ocupado, intenta nuevamente en unos segundos")
     except HTTPException:
         raise
     except Exception as e:
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _errored(e)
 
 
 @app.post("/scrape/video")
 def scrape_video_post(request: PostURLRequest):
     try:
-        with request_tracker.track():
+        with _admitted():
             logger.info(f"📬 POST /scrape/video - URL: {request.url}")
-            scraper = get_scraper_instance(headless=True, block_images=should_block_images(request.url))
-            result = scraper.scrape_video_by_url(request.url)
+            result = _run_video_scrape(request.url)
+
+        if not result.get('success'):
+            raise _failed(result, default='Video no encontrado')
+
+        return result
+
+    except (BusyError, PoolBusyError):
+        raise HTTPException(status_code=429, detail="El scraper está ocupado, intenta nuevamente en unos segundos")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Error: {e}")
+        raise _errored(e)
+
+
+def _run_video_batch_item(url: str) -> Dict:
+    """Resuelve un elemento del lote; los errores se devuelven como resultado, no se propagan."""
+    if 'facebook.com' not in url.lower():
+        return tag({'success': False, 'url': url, 'error': 'Debe ser URL de Facebook'}, INVALID)
+    try:
+        # Los hilos del lote ya están acotados: esperan navegador sin el límite de cola
+        return _run_video_scrape(url, timeout=JOB_LEASE_TIMEOUT, enforce_queue_limit=False)
+    except (BusyError, PoolBusyError) as e:
+        # También el "ocupado" heredado de un scrape interactivo al que se sumó
+        return tag({'success': False, 'url': url, 'error': str(e)}, BUSY)
+    except Exception as e:
+        logger.error(f"❌ Error en lote ({url}): {e}")
+        return tag({'success': False, 'url': url, 'error': str(e)}, classify_exception(e))
+
+
+def _stream_video_batch(urls: List[str]) -> Iterator[str]:
+    # URLs equivalentes (misma URL canónica) se resuelven una sola vez
+    indexes_by_key: Dict[str, List[int]] = {}
+    first_url: Dict[str, str] = {}
+    for index, url in enumerate(urls):
+        key = canonical_post_url(url)
+        indexes_by_key.setdefault(key, []).append(index)
+        first_url.setdefault(key, url)
+
+    logger.info(f"📦 Lote de videos: {len(urls)} URLs ({len(indexes_by_key)} únicas)")
+    futures = {batch_executor.submit(_run_video_batch_item, first_url[key]): key for key in indexes_by_key}
+    try:
+        for future in as_completed(futures):
+            key = futures[future]
+            result = future.result()
+            for index in indexes_by_key[key]:
+                line = dict(result, index=index, url=urls[index])
+                yield json.dumps(line, ensure_ascii=False) + "\n"
+    finally:
+        # Cliente desconectado: no resolver lo que aún no empezó
+        for future in futures:
+            future.cancel()
+
+
+@app.post("/scrape/video/batch")
+def scrape_video_batch(request: VideoBatchRequest):
+    """Resuelve muchos videos y emite cada resultado (una línea JSON) en cuanto termina."""
+    return StreamingResponse(_stream_video_batch(request.urls), media_type="application/x-ndjson")
+
+
+def _upstream_request_kwargs(result: Dict) -> Dict:
+    """Cabeceras, cookies y referer con los que el navegador pidió el video."""
+    context = result.get('_fetch_context') or {}
+    headers = {
+        key: value for key, value in (context.get('headers') or {}).items()
+        if key.lower() not in _DROPPED_UPSTREAM_HEADERS
+    }
+    # Sin compresión: Content-Length y Content-Range deben corresponder a los bytes reenviados
+    headers['Accept-Encoding'] = 'identity'
+    return {
+        'headers': headers,
+        'cookies': context.get('cookies') or None,
+        'referer': context.get('referer') or result.get('url'),
+    }
+
+
+def _open_upstream(result: Dict, client_headers: Dict[str, str]):
+    """GET en streaming a fbcdn con el contexto del navegador (cabeceras, cookies, referer)."""
+    kwargs = _upstream_request_kwargs(result)
+    kwargs['headers'].update(client_headers)
+    return get_http_client().get(result['video_url'], stream=True, timeout=(8, DOWNLOAD_READ_TIMEOUT), **kwargs)
+
+
+async def _relay(upstream) -> AsyncIterator[bytes]:
+    """Reenvía el cuerpo por bloques; la lectura bloqueante corre en ``download_executor``."""
+    loop = asyncio.get_running_loop()
+    chunks = upstream.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE)
+    try:
+        while True:
+            chunk = await loop.run_in_executor(download_executor, next, chunks, None)
+            if chunk is None:
+                break
+            yield chunk
+    finally:
+        upstream.close()
+
+
+@app.get("/download")
+async def download_video(request: Request, url: str = Query(..., description="URL del post de Facebook")):
+    """Resuelve el video del post y lo transmite al cliente, reenviando ``Range`` para permitir saltos."""
+    if 'facebook.com' not in url.lower():
+        raise ScrapeFailure(400, "Debe ser URL de Facebook", INVALID)
+
+    client_headers = {name: request.headers[name] for name in ('Range', 'If-Range') if name in request.headers}
+    loop = asyncio.get_running_loop()
+    use_cache = True
+    try:
+        # Un intento con caché; si fbcdn rechaza la URL cacheada, se resuelve de nuevo
+        for _ in range(2):
+            with _admitted():
+                result = await run_in_threadpool(_resolve_video, url, use_cache)
+            if not result.get('success') or not result.get('video_url'):
+                raise _failed(result, default='Video no encontrado')
+
+            upstream = await loop.run_in_executor(download_executor, _open_upstream, result, client_headers)
+            if upstream.status_code < 400 or upstream.status_code == 416 or not result.get('cached'):
+                break
+            upstream.close()
+            logger.info(f"♻️ URL en caché rechazada por fbcdn ({upstream.status_code}), resolviendo de nuevo")
+            video_cache.discard(canonical_post_url(url))
+            use_cache = False
+
+    except (BusyError, PoolBusyError):
+        raise HTTPException(status_code=429, detail="El scraper está ocupado, intenta nuevamente en unos segundos")
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"❌ Error abriendo descarga: {e}")
+        raise _errored(e, status_code=502)
+
+    if upstream.status_code >= 400 and upstream.status_code != 416:
+        upstream.close()
+        raise HTTPException(status_code=502, detail=f"fbcdn respondió {upstream.status_code}")
+
+    headers = {name: upstream.headers[name] for name in _FORWARDED_RESPONSE_HEADERS if name in upstream.headers}
+    logger.info(f"⬇️ Descarga {upstream.status_code} {headers.get('Content-Range') or headers.get('Content-Length', '')}: {url}")
+    return StreamingResponse(
+        _relay(upstream),
+        status_code=upstream.status_code,
+        headers=headers,
+        media_type=headers.get('Content-Type', 'video/mp4'),
+    )
+
+
+def _run_file_download(url: str, admit: Callable[[], ContextManager] = nullcontext, **lease_options) -> Dict:
+    """Resuelve el video y lo guarda en DOWNLOAD_DIR; repetir la llamada reanuda la descarga.
+
+    ``admit`` envuelve solo la resolución (``_admitted`` en el endpoint): la descarga,
+    que puede tardar minutos, no ocupa un lugar de admisión. Dos descargas del mismo
+    post escriben el mismo archivo, así que la segunda espera a la primera y
+    comparte su resultado.
+    """
+    cache_key = canonical_post_url(url)
+    result, joined = scrape_flights.do(('download', cache_key), lambda: _download_to_file(url, cache_key, admit, **lease_options),
+                                       retry_on=_busy_retry(lease_options))
+    if joined:
+        logger.info(f"🔗 Sumada a una descarga en curso: {url}")
+    return result
+
+
+def _download_to_file(url: str, cache_key: str, admit: Callable[[], ContextManager], **lease_options) -> Dict:
+    dest_path = os.path.join(DOWNLOAD_DIR, f"video_{hashlib.sha1(cache_key.encode('utf-8')).hexdigest()[:16]}.mp4")
+    use_cache = True
+    while True:
+        with admit():
+            result = _resolve_video(url, use_cache=use_cache, **lease_options)
+        if not result.get('success') or not result.get('video_url'):
+            return _public_result(result)
+
+        probe = result.get('probe') or {}
+        length = str(probe.get('content_length') or '')
+        accept_ranges = probe.get('accept_ranges')
+        try:
+            summary = file_downloader.download(
+                result['video_url'],
+                dest_path,
+                expected_length=int(length) if probe.get('ok') and length.isdigit() else None,
+                accept_ranges=(accept_ranges.lower() == 'bytes') if probe.get('ok') and accept_ranges else None,
+                **_upstream_request_kwargs(result)
+            )
+        except Exception as e:
+            if result.get('cached'):
+                # La URL cacheada pudo expirar: resolver de nuevo y continuar desde el checkpoint
+                logger.info(f"♻️ Descarga con URL en caché falló ({e}), resolviendo de nuevo")
+                video_cache.discard(cache_key)
+                use_cache = False
+                continue
+            logger.error(f"❌ Error descargando {url}: {e}")
+            return tag({'success': False, 'url': url, 'video_url': result['video_url'], 'error': str(e)}, classify_exception(e))
+
+        logger.info(f"💾 Video guardado: {summary['path']} ({summary['bytes']} bytes, {summary['elapsed_seconds']}s)")
+        return {'success': True, 'url': url, 'video_url': result['video_url'], 'file': summary}
+
+
+@app.post("/download/file")
+def download_file(request: PostURLRequest):
+    try:
+        logger.info(f"📬 POST /download/file - URL: {request.url}")
+        result = _run_file_download(request.url, admit=_admitted)
 
         if not result.get('success'):
-            raise HTTPException(status_code=404, detail=result.get('error', 'Video no encontrado'))
+            status_code = 404 if not result.get('video_url') else 502
+            raise _failed(result, status_code=status_code, default='Video no encontrado')
 
         return result
 
-    except BusyError:
+    except (BusyError, PoolBusyError):
         raise HTTPException(status_code=429, detail="El scraper está ocupado, intenta nuevamente en unos segundos")
     except HTTPException:
         raise
     except Exception as e:
         logger.error(f"❌ Error: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
+        raise _errored(e)
+
+
+def _build_job_func(request: JobRequest) -> Callable[[], Dict]:
+    # Los hilos de trabajos ya están acotados: pueden esperar navegador sin el límite de cola
+    lease_options = {'timeout': JOB_LEASE_TIMEOUT, 'enforce_queue_limit': False}
+    if request.kind == 'scrape':
+        return lambda: _run_post_scrape(request.url, profile=select_block_profile(request.url, "scrape"), **lease_options)
+    if request.kind == 'images':
+        return lambda: _run_images_scrape(request.url, **lease_options)
+    if request.kind == 'page':
+        return lambda: _run_page_scrape(request.page_url, request.num_posts, **lease_options)
+    if request.kind == 'download':
+        return lambda: _run_file_download(request.url, **lease_options)
+    return lambda: _run_video_scrape(request.url, **lease_options)
+
+
+@app.post("/jobs", status_code=202)
+def create_job(request: JobRequest):
+    try:
+        job = job_manager.submit(request.kind, request.dict(exclude_none=True), _build_job_func(request))
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    return job.to_dict()
+
+
+@app.get("/jobs/{job_id}")
+def get_job(job_id: str, wait: float = Query(0, ge=0, le=JOB_MAX_LONG_POLL, description="Segundos de long-poll hasta que termine")):
+    job = job_manager.wait(job_id, wait)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Trabajo no encontrado o expirado")
+    return job.to_dict()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,220 @@
+"""Métricas en formato de texto de Prometheus (``GET /metrics``).
+
+Implementación mínima y sin dependencias: contadores, histogramas y gauges con
+etiquetas, protegidos por un lock por métrica. Registrar un valor cuesta un
+diccionario y un ``bisect``, así que la instrumentación puede quedar activa en
+producción. ``stage_timer`` mide cada etapa del scraping en
+``scraper_stage_seconds{stage=...}`` y, si la solicitud se está trazando, la
+agrega como span (ver ``tracing``).
+"""
+import bisect
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import tracing
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(f'{extra[0]}="{extra[1]}"')
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, '')) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.kind}']
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}' for key, value in items]
+
+
+class Gauge(_Metric):
+    """Valor instantáneo; con ``set_function`` se calcula al leer ``/metrics``."""
+
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._function: Optional[Callable[[], Dict[Tuple[str, ...], float]]] = None
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, function: Callable[[], Dict[Tuple[str, ...], float]]):
+        """``function`` retorna ``{valores_de_etiquetas: valor}`` (``{(): valor}`` sin etiquetas)."""
+        self._function = function
+
+    def _samples(self) -> List[str]:
+        if self._function is not None:
+            try:
+                items = sorted(self._function().items())
+            except Exception:
+                items = []
+        else:
+            with self._lock:
+                items = sorted(self._values.items())
+        return [f'{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}' for key, value in items]
+
+
+class Histogram(_Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Por etiquetas: [conteo por bucket (no acumulado)..., +Inf], suma, total
+        self._series: Dict[Tuple[str, ...], List] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = sorted((key, [list(s[0]), s[1], s[2]]) for key, s in self._series.items())
+        lines = []
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float('inf'),), counts):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, ('le', _format_value(bound)))
+                lines.append(f'{self.name}_bucket{labels} {cumulative}')
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f'{self.name}_sum{labels} {_format_value(total)}')
+            lines.append(f'{self.name}_count{labels} {count}')
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[_Metric] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+CONTENT_TYPE = 'text/plain; version=0.0.4'
+
+REQUEST_SECONDS = REGISTRY.register(Histogram(
+    'scraper_request_duration_seconds', 'Duración de cada solicitud HTTP por endpoint.', ('endpoint', 'method', 'status')))
+REQUESTS_TOTAL = REGISTRY.register(Counter(
+    'scraper_requests_total', 'Solicitudes HTTP atendidas por endpoint y código.', ('endpoint', 'method', 'status')))
+THROTTLED_TOTAL = REGISTRY.register(Counter(
+    'scraper_throttled_total', 'Respuestas 429 (navegadores o cola ocupados) por endpoint.', ('endpoint',)))
+STAGE_SECONDS = REGISTRY.register(Histogram(
+    'scraper_stage_seconds', 'Duración de cada etapa del scraping.', ('stage',)))
+RESULTS_TOTAL = REGISTRY.register(Counter(
+    'scraper_results_total', 'Resultados por operación, desenlace y motivo.', ('op', 'outcome', 'reason')))
+COALESCED_TOTAL = REGISTRY.register(Counter(
+    'scraper_coalesced_total', 'Solicitudes que se sumaron a un scrape idéntico en vuelo.', ('op',)))
+CACHE_LOOKUPS_TOTAL = REGISTRY.register(Counter(
+    'scraper_cache_lookups_total', 'Consultas a la caché de videos.', ('result',)))
+NEGATIVE_CACHE_HITS_TOTAL = REGISTRY.register(Counter(
+    'scraper_negative_cache_hits_total', 'Fallos deterministas respondidos desde la caché negativa.', ('op', 'category')))
+VIDEO_CANDIDATES = REGISTRY.register(Histogram(
+    'scraper_video_candidates', 'Candidatos de URL de video rankeados por solicitud.', (),
+    buckets=(1, 2, 3, 5, 8, 13, 21, 34, 55, 89)))
+VALIDATION_BYTES_TOTAL = REGISTRY.register(Counter(
+    'scraper_validation_bytes_total', 'Bytes descargados para validar candidatos de video.'))
+POOL_SLOTS = REGISTRY.register(Gauge(
+    'scraper_pool_slots', 'Slots del pool de navegadores por estado.', ('state',)))
+POOL_WAITING = REGISTRY.register(Gauge(
+    'scraper_pool_waiting', 'Solicitudes esperando un navegador libre.'))
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """Mide el bloque en ``scraper_stage_seconds{stage=...}`` (también si lanza excepción)."""
+    started = time.perf_counter()
+    try:
+        with tracing.span(stage):
+            yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - started, stage=stage)
+
+
+def observe_stage(stage: str, seconds: float, **span_attrs):
+    """Registra una etapa medida aparte (p. ej. la espera del pool) en el histograma y el trace."""
+    STAGE_SECONDS.observe(seconds, stage=stage)
+    tracing.record(stage, seconds, **span_attrs)
+
+
+def timed(stage: str):
+    """Decorador equivalente a ``stage_timer`` para una función completa."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage_timer(stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
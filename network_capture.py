@@ -0,0 +1,157 @@
+"""Captura de red por navegación a partir de los eventos CDP ``Network.*``.
+
+Chrome entrega los eventos de red en el log ``performance`` de chromedriver.
+Antes se acumulaban durante toda la vida del navegador y se parseaba cada
+entrada con ``json.loads``. ``NetworkCapture`` descarta lo pendiente al empezar
+cada navegación, filtra por texto antes de parsear y guarda solo un registro
+compacto de las peticiones de video/imagen.
+"""
+import json
+import logging
+import re
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+_VIDEO_SNIPPETS = ('.mp4', '.m3u8', 'video.fsci')
+_IMAGE_SNIPPETS = ('scontent', 'fbcdn.net/v/')
+_IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp')
+
+_REQUEST_ID_RE = re.compile(r'"requestId":\s*"([^"]+)"')
+_WEBVIEW_RE = re.compile(r'"webview":\s*"([^"]+)"')
+_TRACKED_METHODS = (
+    'Network.requestWillBeSent',
+    'Network.responseReceived',
+    'Network.loadingFinished',
+    'Network.loadingFailed',
+)
+
+
+def entry_webview(entry: Dict) -> Optional[str]:
+    """Target (pestaña) de una entrada del log: chromedriver lo serializa dentro de ``message``."""
+    if entry.get('webview'):
+        return entry['webview']
+    raw = entry.get('message') or ''
+    # "webview" va después de "message" en el JSON: buscar desde el final
+    start = raw.rfind('"webview"')
+    if start < 0:
+        return None
+    match = _WEBVIEW_RE.match(raw, start)
+    return match.group(1) if match else None
+
+
+def classify_resource_url(url: Optional[str]) -> Optional[str]:
+    """'video', 'image' o None según el tipo de recurso que nos interesa."""
+    if not url or url.startswith(('blob:', 'data:')):
+        return None
+    low = url.lower()
+    if any(snippet in low for snippet in _VIDEO_SNIPPETS):
+        return 'video'
+    if any(snippet in low for snippet in _IMAGE_SNIPPETS) and any(ext in low for ext in _IMAGE_EXTENSIONS):
+        return 'image'
+    return None
+
+
+class CapturedRequest:
+    __slots__ = ('request_id', 'url', 'kind', 'headers', 'status', 'mime_type', 'encoded_length', 'finished')
+
+    def __init__(self, request_id: str, url: str, kind: str, headers: Dict[str, str]):
+        self.request_id = request_id
+        self.url = url
+        self.kind = kind
+        self.headers = headers
+        self.status: Optional[int] = None
+        self.mime_type: Optional[str] = None
+        self.encoded_length: Optional[int] = None
+        self.finished = False
+
+
+class NetworkCapture:
+    """Peticiones de video/imagen vistas desde ``begin()`` hasta el último ``collect()``."""
+
+    def __init__(self, webview: Optional[str] = None):
+        # Si se indica, solo se aceptan eventos de esa pestaña (target CDP)
+        self.webview = webview
+        self.requests: Dict[str, CapturedRequest] = {}
+
+    @staticmethod
+    def _read_log(driver) -> List[Dict]:
+        try:
+            return driver.get_log('performance')
+        except Exception as e:
+            logger.debug(f"No se pudo leer performance logs: {e}")
+            return []
+
+    def begin(self, driver):
+        """Descarta eventos pendientes de navegaciones anteriores."""
+        self._read_log(driver)
+        self.requests.clear()
+
+    def collect(self, driver) -> 'NetworkCapture':
+        """Procesa los eventos nuevos del log y retorna la propia captura."""
+        self.feed(self._read_log(driver))
+        return self
+
+    def feed(self, entries: List[Dict]):
+        for entry in entries:
+            raw = entry.get('message') or ''
+            # Filtrado por texto: solo se parsean eventos de red relevantes
+            if 'Network.' not in raw:
+                continue
+            if self.webview:
+                webview = entry_webview(entry)
+                if webview and webview != self.webview:
+                    continue
+            if 'Network.requestWillBeSent' in raw:
+                if not any(snippet in raw for snippet in _VIDEO_SNIPPETS + _IMAGE_SNIPPETS):
+                    continue
+            else:
+                match = _REQUEST_ID_RE.search(raw)
+                if not match or match.group(1) not in self.requests:
+                    continue
+            try:
+                msg = json.loads(raw)['message']
+            except (ValueError, KeyError):
+                continue
+            method = msg.get('method', '')
+            if method in _TRACKED_METHODS:
+                self._handle(method, msg.get('params', {}))
+
+    def _handle(self, method: str, params: Dict):
+        request_id = params.get('requestId')
+        if method == 'Network.requestWillBeSent':
+            req = params.get('request', {})
+            url = req.get('url')
+            kind = classify_resource_url(url)
+            if kind is None:
+                return
+            hdrs = req.get('headers', {}) or {}
+            headers = {k: str(v) for k, v in hdrs.items()} if isinstance(hdrs, dict) else {}
+            self.requests[request_id] = CapturedRequest(request_id, url, kind, headers)
+            return
+
+        captured = self.requests.get(request_id)
+        if captured is None:
+            return
+        if method == 'Network.responseReceived':
+            response = params.get('response', {})
+            captured.status = response.get('status')
+            captured.mime_type = response.get('mimeType')
+            # Redirecciones: quedarse con la URL final
+            if response.get('url') and classify_resource_url(response['url']) == captured.kind:
+                captured.url = response['url']
+        elif method == 'Network.loadingFinished':
+            captured.encoded_length = params.get('encodedDataLength')
+            captured.finished = True
+        elif method == 'Network.loadingFailed':
+            del self.requests[request_id]
+
+    def urls(self, kind: str) -> List[str]:
+        seen = []
+        for captured in self.requests.values():
+            if captured.kind == kind and captured.url not in seen:
+                seen.append(captured.url)
+        return seen
+
+    def headers_by_url(self) -> Dict[str, Dict[str, str]]:
+        return {captured.url: captured.headers for captured in self.requests.values() if captured.headers}
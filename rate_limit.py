@@ -0,0 +1,51 @@
+"""Limitador de ritmo por host.
+
+Reemplaza las pausas fijas (``time.sleep``) entre navegaciones: cada host
+admite como máximo una petición cada ``min_interval`` segundos, sin importar
+cuántos hilos o navegadores la hagan. Las reservas se reparten en orden de
+llegada, así que los hilos no compiten por el mismo hueco.
+"""
+import threading
+import time
+from typing import Dict
+from urllib.parse import urlparse
+
+
+class HostRateLimiter:
+    """Espaciado mínimo entre peticiones al mismo host, compartido entre hilos."""
+
+    def __init__(self, min_interval: float = 1.0):
+        self.min_interval = max(0.0, min_interval)
+        self._next_slot: Dict[str, float] = {}
+        self._lock = threading.Lock()
+        self.waits_total = 0
+        self.waited_seconds_total = 0.0
+
+    def reserve(self, url: str) -> float:
+        """Reserva el próximo hueco del host de ``url`` y retorna cuántos segundos esperar."""
+        host = (urlparse(url).hostname or '').lower()
+        now = time.monotonic()
+        with self._lock:
+            slot = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + self.min_interval
+            delay = slot - now
+            if delay > 0:
+                self.waits_total += 1
+                self.waited_seconds_total += delay
+        return delay
+
+    def wait(self, url: str) -> float:
+        """Bloquea hasta que se pueda hacer una petición a ese host; retorna lo esperado."""
+        delay = self.reserve(url) if self.min_interval else 0.0
+        if delay > 0:
+            time.sleep(delay)
+        return delay
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "min_interval": self.min_interval,
+                "hosts": len(self._next_slot),
+                "waits_total": self.waits_total,
+                "waited_seconds_total": round(self.waited_seconds_total, 3),
+            }
@@ -0,0 +1,178 @@
+"""Cachés LRU en memoria para resultados de scraping.
+
+Las URLs de fbcdn llevan su propia expiración en el parámetro ``oe`` (epoch en
+hexadecimal). Cada entrada de ``VideoResultCache`` vive hasta esa expiración
+menos un margen de seguridad, de modo que nunca se devuelve un enlace ya caducado.
+
+``NegativeResultCache`` guarda los fallos deterministas (post borrado, privado,
+sin video) con un TTL corto por categoría, para no gastar otra vez varios
+segundos de navegador en la misma respuesta.
+"""
+import copy
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+from urllib.parse import parse_qsl, urlparse
+
+from failures import DETERMINISTIC, category_of
+
+
+def video_url_expiry(video_url: Optional[str]) -> Optional[float]:
+    """Epoch de expiración del parámetro ``oe`` de una URL de fbcdn, si existe."""
+    if not video_url:
+        return None
+    try:
+        for key, value in parse_qsl(urlparse(video_url).query):
+            if key == 'oe':
+                return float(int(value, 16))
+    except ValueError:
+        return None
+    return None
+
+
+class VideoResultCache:
+    """LRU acotado con TTL por entrada derivado de la expiración del video."""
+
+    def __init__(self, max_entries: int = 1000, safety_margin: float = 300.0, default_ttl: float = 0.0):
+        self.max_entries = max(0, max_entries)
+        self.safety_margin = safety_margin
+        self.default_ttl = default_ttl
+        self._entries: "OrderedDict[str, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def _ttl_for(self, result: Dict) -> float:
+        expiry = video_url_expiry(result.get('video_url'))
+        if expiry is None:
+            return self.default_ttl
+        return expiry - time.time() - self.safety_margin
+
+    def get(self, key: str) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.time():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            result = copy.deepcopy(entry[1])
+        result['cached'] = True
+        return result
+
+    def put(self, key: str, result: Dict) -> bool:
+        """Guarda un resultado exitoso; retorna False si no es cacheable."""
+        if not self.max_entries or not result.get('success') or not result.get('video_url'):
+            return False
+        ttl = self._ttl_for(result)
+        if ttl <= 0:
+            return False
+
+        stored = copy.deepcopy(result)
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, stored)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return True
+
+    def discard(self, key: str):
+        """Olvida una entrada (p. ej. si la URL de fbcdn dejó de responder antes de tiempo)."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
+
+
+class NegativeResultCache:
+    """LRU de resultados fallidos con TTL según ``error_category``.
+
+    Solo se guardan categorías deterministas con TTL > 0; los fallos transitorios
+    (timeout, errores del driver o de red) nunca se cachean.
+    """
+
+    def __init__(self, ttls: Dict[str, float], max_entries: int = 1000):
+        self.ttls = {category: ttl for category, ttl in ttls.items() if category in DETERMINISTIC and ttl > 0}
+        self.max_entries = max(0, max_entries)
+        self._entries: "OrderedDict[Hashable, Tuple[float, Dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.stored_by_category: Dict[str, int] = {}
+
+    def get(self, key: Hashable) -> Optional[Dict]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] <= time.time():
+                del self._entries[key]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            result = copy.deepcopy(entry[1])
+        result['cached'] = True
+        return result
+
+    def put(self, key: Hashable, result: Dict) -> bool:
+        """Guarda un resultado fallido determinista; retorna False si no es cacheable."""
+        if not self.max_entries or result.get('success'):
+            return False
+        category = category_of(result)
+        ttl = self.ttls.get(category)
+        if not ttl:
+            return False
+
+        stored = {k: v for k, v in result.items() if not k.startswith('_')}
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, copy.deepcopy(stored))
+            self._entries.move_to_end(key)
+            self.stored_by_category[category] = self.stored_by_category.get(category, 0) + 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return True
+
+    def discard(self, key: Hashable):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttls": dict(self.ttls),
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "stored_by_category": dict(self.stored_by_category),
+                "hit_ratio": round(self.hits / lookups, 3) if lookups else 0.0,
+            }
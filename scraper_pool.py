@@ -0,0 +1,551 @@
+"""Pool de navegadores Chrome reutilizables.
+
+Cada slot del pool mantiene un ``FacebookSeleniumScraper`` propio (un driver por
+slot). Con ``tabs_per_browser > 1`` los slots son pestañas: cada navegador
+(``BrowserHost``) atiende ese número de slots a la vez, así que la capacidad
+crece con las pestañas y no con procesos de Chrome. Las solicitudes toman
+prestado un slot con ``lease()`` y lo devuelven al terminar; si no hay slots
+libres esperan en una cola acotada en lugar de fallar de inmediato.
+
+El bloqueo de recursos se decide por préstamo (``profile``, ver
+``BLOCK_PROFILES``) y se aplica vía CDP antes de cada navegación, así que
+cualquier navegador del pool sirve cualquier tipo de solicitud sin relanzar Chrome.
+
+La captura de red (log ``performance`` de chromedriver) no se puede apagar por
+préstamo: se fija al lanzar Chrome y ``Network.setBlockedURLs`` necesita el dominio
+Network activo, así que Chrome envía todos sus eventos aunque nadie los lea. Solo
+los primeros ``capture_browsers`` navegadores se lanzan con captura; los préstamos
+que la aprovechan (``captures_network``) prefieren esos y los demás (perfiles
+``text-only`` e ``images``) el resto. Si no hay uno libre del tipo pedido se usa
+cualquiera: un scrape de video sin captura se queda con el DOM y las performance entries.
+
+Cada navegador se supervisa (``RecyclePolicy``): al pasar los límites de
+navegaciones, edad, memoria o errores seguidos, o si deja de responder, se lanza
+un reemplazo en segundo plano y se intercambia cuando sus slots quedan libres.
+"""
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from browser_supervisor import RecyclePolicy, driver_pid, ping_driver, process_tree_rss
+from browser_tabs import BrowserHost, TabScraper
+from metrics import observe_stage
+from scraper_selenium import BLOCK_PROFILES, FacebookSeleniumScraper, captures_network
+
+logger = logging.getLogger(__name__)
+
+
+class PoolBusyError(Exception):
+    """No hay navegadores libres y la cola está llena o se agotó la espera."""
+
+
+class _PoolSlot:
+    def __init__(self, index: int, host: Optional[BrowserHost] = None):
+        self.index = index
+        self.host = host
+        self.group: Optional['_BrowserGroup'] = None
+        self.scraper: Optional[FacebookSeleniumScraper] = None
+        self.in_use = False
+        self.leases = 0
+
+
+class _BrowserGroup:
+    """Slots que comparten un proceso de Chrome: un slot, o las pestañas de un ``BrowserHost``."""
+
+    def __init__(self, index: int, slots: List[_PoolSlot], host: Optional[BrowserHost] = None,
+                 network_capture: bool = True):
+        self.index = index
+        self.slots = slots
+        self.host = host
+        self.network_capture = network_capture
+        for slot in slots:
+            slot.group = self
+        # draining: sus slots no se prestan; se intercambia en cuanto quedan libres
+        self.draining = False
+        self.replacing = False
+        self.replacement_ready = False
+        self.replacement = None
+        self.reason: Optional[str] = None
+
+    def driver(self):
+        if self.host is not None:
+            return self.host.driver
+        scraper = self.slots[0].scraper
+        return scraper.driver if scraper is not None else None
+
+    def idle(self) -> bool:
+        return not any(slot.in_use for slot in self.slots)
+
+
+def _process_alive(driver) -> bool:
+    """False si el proceso de chromedriver ya terminó (Chrome murió o se cerró)."""
+    try:
+        return driver.service.process.poll() is None
+    except AttributeError:
+        return True
+
+
+class ScraperPool:
+    """Pool de N scrapers con préstamo exclusivo y cola de espera acotada."""
+
+    def __init__(self, size: int = 1, max_waiting: int = 8, acquire_timeout: float = 30.0, headless: bool = True,
+                 tabs_per_browser: int = 1, recycle_policy: Optional[RecyclePolicy] = None,
+                 supervise_interval: float = 30.0, capture_browsers: Optional[int] = None):
+        self.size = max(1, size)
+        self.tabs_per_browser = max(1, tabs_per_browser)
+        self.slot_count = self.size * self.tabs_per_browser
+        self.max_waiting = max(0, max_waiting)
+        self.acquire_timeout = max(0.0, acquire_timeout)
+        self.headless = headless
+        self.recycle_policy = recycle_policy or RecyclePolicy()
+        self.supervise_interval = max(0.0, supervise_interval)
+        # Navegadores con captura de red (None = todos)
+        self.capture_browsers = self.size if capture_browsers is None else min(max(0, capture_browsers), self.size)
+        self._cond = threading.Condition()
+        self._slots: List[_PoolSlot] = []
+        self._groups: List[_BrowserGroup] = []
+        for i in range(self.size):
+            network_capture = i < self.capture_browsers
+            host = BrowserHost(i, headless=headless, network_capture=network_capture) if self.tabs_per_browser > 1 else None
+            slots = [_PoolSlot(i * self.tabs_per_browser + t, host) for t in range(self.tabs_per_browser)]
+            self._slots.extend(slots)
+            self._groups.append(_BrowserGroup(i, slots, host, network_capture))
+        self._waiting = 0
+        self._closed = False
+        self._leases_total = 0
+        self._rejected_total = 0
+        self._timeouts_total = 0
+        self._wait_seconds_total = 0.0
+        self._recycled: Dict[str, int] = {}
+        self._stop = threading.Event()
+        self._supervisor: Optional[threading.Thread] = None
+
+    @property
+    def capacity(self) -> int:
+        """Solicitudes que el pool admite a la vez, contando las que esperan en cola."""
+        return self.slot_count + self.max_waiting
+
+    def _pick_slot(self, profile: Optional[str]) -> Optional[_PoolSlot]:
+        idle = []
+        for slot in self._slots:
+            if slot.in_use or slot.group.draining:
+                continue
+            driver = slot.group.driver()
+            if driver is not None and not _process_alive(driver):
+                # Chrome murió: no prestarlo y reemplazarlo en segundo plano
+                self._begin_recycle(slot.group, 'dead')
+                continue
+            idle.append(slot)
+        if not idle:
+            return None
+        # Preferir navegadores con (o sin) captura de red según el perfil; si no hay, cualquiera
+        need_capture = captures_network(profile)
+        idle = [slot for slot in idle if slot.group.network_capture == need_capture] or idle
+        # Preferir un navegador ya lanzado (y con el mismo perfil), luego un slot vacío
+        warm = [slot for slot in idle if slot.scraper is not None and slot.scraper.driver is not None]
+        if self.tabs_per_browser > 1:
+            # Repartir la carga: primero las pestañas del navegador menos ocupado
+            busy = {group.index: sum(1 for s in group.slots if s.in_use) for group in self._groups}
+            warm.sort(key=lambda slot: busy[slot.group.index])
+            idle.sort(key=lambda slot: busy[slot.group.index])
+        for slot in warm:
+            if slot.scraper.block_profile == profile:
+                return slot
+        return warm[0] if warm else idle[0]
+
+    def acquire(self, profile: Optional[str] = None, timeout: Optional[float] = None,
+                enforce_queue_limit: bool = True) -> _PoolSlot:
+        """Reserva un slot libre, esperando como máximo ``timeout`` segundos.
+
+        ``profile`` es el perfil de bloqueo (``BLOCK_PROFILES``) para las navegaciones
+        del préstamo. ``enforce_queue_limit=False`` permite esperar aunque la cola esté
+        llena; lo usan consumidores que ya están acotados por su cuenta (p. ej. los
+        hilos de trabajos).
+        """
+        if profile is not None and profile not in BLOCK_PROFILES:
+            raise ValueError(f"Perfil de bloqueo desconocido: {profile}")
+        wait_limit = self.acquire_timeout if timeout is None else max(0.0, timeout)
+        started = time.monotonic()
+
+        with self._cond:
+            if self._closed:
+                raise PoolBusyError("El pool de navegadores está cerrado")
+
+            slot = self._pick_slot(profile)
+            if slot is None:
+                if enforce_queue_limit and self._waiting >= self.max_waiting:
+                    self._rejected_total += 1
+                    raise PoolBusyError("Todos los navegadores están ocupados y la cola de espera está llena")
+
+                self._waiting += 1
+                try:
+                    deadline = started + wait_limit
+                    while slot is None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0 or self._closed:
+                            self._timeouts_total += 1
+                            raise PoolBusyError(f"No se liberó ningún navegador en {wait_limit:.0f}s")
+                        self._cond.wait(remaining)
+                        slot = self._pick_slot(profile)
+                finally:
+                    self._waiting -= 1
+
+            self._claim(slot, profile, started)
+
+        return slot
+
+    def _claim(self, slot: _PoolSlot, profile: Optional[str], started: float):
+        # Llamar con self._cond tomado
+        slot.in_use = True
+        slot.leases += 1
+        self._leases_total += 1
+        waited = time.monotonic() - started
+        self._wait_seconds_total += waited
+        observe_stage('pool_wait', waited, slot=slot.index)
+
+        if slot.scraper is None:
+            if slot.host is not None:
+                slot.scraper = TabScraper(slot.host)
+            else:
+                # Imágenes habilitadas en Chrome: el bloqueo lo decide el perfil de cada préstamo
+                slot.scraper = FacebookSeleniumScraper(headless=self.headless, block_images=False,
+                                                       network_capture=slot.group.network_capture)
+        slot.scraper.block_profile = profile
+
+        if self._supervisor is None and self.supervise_interval:
+            self._supervisor = threading.Thread(target=self._supervise, name="pool-supervisor", daemon=True)
+            self._supervisor.start()
+
+    def try_acquire(self, profile: Optional[str] = None) -> Optional[_PoolSlot]:
+        """Reserva un slot solo si hay uno libre ahora mismo; nunca espera ni hace cola."""
+        if profile is not None and profile not in BLOCK_PROFILES:
+            raise ValueError(f"Perfil de bloqueo desconocido: {profile}")
+        with self._cond:
+            if self._closed:
+                return None
+            slot = self._pick_slot(profile)
+            if slot is None:
+                return None
+            self._claim(slot, profile, time.monotonic())
+            return slot
+
+    def release(self, slot: _PoolSlot):
+        """Devuelve un slot al pool y despierta a quien esté esperando."""
+        with self._cond:
+            slot.in_use = False
+            group = slot.group
+            if not self._closed and not group.draining and not group.replacing:
+                reason = self.recycle_policy.reason(self._group_stats(group, with_rss=False))
+                if reason:
+                    self._begin_recycle(group, reason)
+            stale = self._try_swap(group) if group.draining else []
+            if stale:
+                # Tras un intercambio pueden quedar libres varios slots (pestañas)
+                self._cond.notify_all()
+            else:
+                self._cond.notify()
+        self._dispose(stale)
+
+    # -- supervisión y reciclaje --------------------------------------------------
+
+    def _group_stats(self, group: _BrowserGroup, with_rss: bool = True) -> Dict:
+        scrapers = [slot.scraper for slot in group.slots if slot.scraper is not None and slot.scraper.driver is not None]
+        driver = group.driver()
+        if group.host is not None:
+            started_at = group.host.launched_at
+        else:
+            started_at = scrapers[0].driver_started_at if scrapers else None
+        return {
+            'navigations': sum(scraper.navigations for scraper in scrapers),
+            'errors': max((scraper.consecutive_errors for scraper in scrapers), default=0),
+            'started_at': started_at,
+            'rss_bytes': process_tree_rss(driver_pid(driver)) if with_rss and driver is not None else None,
+        }
+
+    def _begin_recycle(self, group: _BrowserGroup, reason: str):
+        """Lanza el reemplazo de un navegador en segundo plano (llamar con self._cond tomado).
+
+        Si el navegador sigue sano (límites de navegaciones, edad o memoria) atiende
+        hasta que el reemplazo está listo; si murió o acumula errores deja de prestarse ya.
+        """
+        if group.replacing or group.replacement_ready or self._closed:
+            return
+        group.replacing = True
+        group.reason = reason
+        if reason in ('dead', 'errors'):
+            group.draining = True
+        logger.info(f"♻️ Reemplazando navegador {group.index} ({reason})")
+        threading.Thread(target=self._build_replacement, args=(group,), name=f"pool-recycle-{group.index}",
+                         daemon=True).start()
+
+    def _build_replacement(self, group: _BrowserGroup):
+        replacement = None
+        failed = False
+        try:
+            if group.host is not None:
+                replacement = BrowserHost(group.index, headless=self.headless, network_capture=group.network_capture)
+                replacement.ensure_launched()
+            else:
+                replacement = FacebookSeleniumScraper(headless=self.headless, block_images=False,
+                                                      network_capture=group.network_capture)
+                replacement.setup_driver()
+        except Exception as e:
+            logger.error(f"❌ No se pudo lanzar el reemplazo del navegador {group.index}: {e}")
+            failed = True
+
+        with self._cond:
+            group.replacing = False
+            if self._closed:
+                stale = [replacement] if replacement is not None else []
+            elif failed and not group.draining:
+                # El navegador actual sigue sano: seguir usándolo y reintentar más adelante
+                stale = [replacement] if replacement is not None else []
+                group.reason = None
+            else:
+                # Si falló con el navegador muerto, los slots se relanzan en el próximo préstamo
+                group.replacement = None if failed else replacement
+                group.replacement_ready = True
+                group.draining = True
+                stale = self._try_swap(group)
+            self._cond.notify_all()
+        self._dispose(stale)
+
+    def _try_swap(self, group: _BrowserGroup) -> List:
+        """Intercambia el navegador por su reemplazo si ya está listo y nadie lo usa (con self._cond tomado)."""
+        if not group.replacement_ready or not group.idle():
+            return []
+        stale = []
+        if group.host is not None:
+            stale.append(group.host)
+            new_host = group.replacement or BrowserHost(group.index, headless=self.headless,
+                                                        network_capture=group.network_capture)
+            group.host = new_host
+            for slot in group.slots:
+                # Las pestañas viejas se cierran con su navegador
+                slot.host = new_host
+                slot.scraper = None
+        else:
+            slot = group.slots[0]
+            if slot.scraper is not None:
+                stale.append(slot.scraper)
+            slot.scraper = group.replacement
+        self._recycled[group.reason] = self._recycled.get(group.reason, 0) + 1
+        logger.info(f"♻️ Navegador {group.index} reciclado ({group.reason})")
+        group.draining = False
+        group.replacement_ready = False
+        group.replacement = None
+        group.reason = None
+        return stale
+
+    @staticmethod
+    def _dispose(stale: List):
+        for item in stale:
+            try:
+                item.quit() if isinstance(item, BrowserHost) else item.close()
+            except Exception as e:
+                logger.warning(f"Error cerrando navegador reemplazado: {e}")
+
+    def _inspect(self, group: _BrowserGroup):
+        """Revisión periódica: memoria, edad y si la sesión sigue respondiendo."""
+        probe_slot = None
+        with self._cond:
+            if self._closed or group.draining or group.replacing or group.driver() is None:
+                return
+            if group.host is None:
+                slot = group.slots[0]
+                if slot.in_use:
+                    return
+                # Reservar el slot mientras se le hace ping (WebDriver no admite comandos concurrentes)
+                slot.in_use = True
+                probe_slot = slot
+
+        alive, stats = True, None
+        try:
+            driver = group.driver()
+            if group.host is not None:
+                with group.host.lock:
+                    alive = driver is not None and ping_driver(driver)
+            else:
+                alive = driver is not None and ping_driver(driver)
+            stats = self._group_stats(group)
+        finally:
+            with self._cond:
+                if probe_slot is not None:
+                    probe_slot.in_use = False
+                if not self._closed and not group.draining and not group.replacing:
+                    reason = 'dead' if not alive else (self.recycle_policy.reason(stats) if stats else None)
+                    if reason:
+                        self._begin_recycle(group, reason)
+                self._cond.notify()
+
+    def _supervise(self):
+        while not self._stop.wait(self.supervise_interval):
+            for group in self._groups:
+                try:
+                    self._inspect(group)
+                except Exception as e:
+                    logger.warning(f"Error supervisando navegador {group.index}: {e}")
+
+    @contextmanager
+    def lease(self, profile: Optional[str] = None, timeout: Optional[float] = None,
+              enforce_queue_limit: bool = True):
+        """Préstamo exclusivo de un scraper durante el bloque ``with``."""
+        slot = self.acquire(profile=profile, timeout=timeout, enforce_queue_limit=enforce_queue_limit)
+        try:
+            yield slot.scraper
+        finally:
+            self.release(slot)
+
+    @contextmanager
+    def try_lease(self, profile: Optional[str] = None):
+        """Como ``lease()``, pero entrega ``None`` si no hay navegador libre en este momento."""
+        slot = self.try_acquire(profile=profile)
+        try:
+            yield slot.scraper if slot is not None else None
+        finally:
+            if slot is not None:
+                self.release(slot)
+
+    def warm(self) -> int:
+        """Lanza en paralelo el navegador de cada slot que aún no lo tenga.
+
+        Retorna cuántos navegadores quedaron listos; los errores se registran y se
+        propagan si ningún slot pudo arrancar.
+        """
+        errors: List[Exception] = []
+
+        def _warm_one():
+            try:
+                with self.lease(enforce_queue_limit=False) as scraper:
+                    if scraper.driver is None:
+                        scraper.setup_driver()
+            except Exception as e:
+                logger.error(f"❌ No se pudo precalentar un navegador: {e}")
+                errors.append(e)
+
+        threads = [threading.Thread(target=_warm_one, name=f"pool-warm-{i}", daemon=True) for i in range(self.slot_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        with self._cond:
+            warm = sum(1 for slot in self._slots if slot.scraper is not None and slot.scraper.driver is not None)
+        if warm == 0 and errors:
+            raise errors[0]
+        logger.info(f"🔥 Pool precalentado: {warm}/{self.slot_count} slots listos ({self.size} navegadores)")
+        return warm
+
+    def usage(self) -> Dict[str, int]:
+        """Slots por estado sin métricas de procesos (barato, para ``/metrics``)."""
+        with self._cond:
+            counts = {"in_use": 0, "idle": 0, "recycling": 0}
+            for slot in self._slots:
+                if slot.in_use:
+                    counts["in_use"] += 1
+                elif slot.group.draining:
+                    counts["recycling"] += 1
+                else:
+                    counts["idle"] += 1
+            counts["waiting"] = self._waiting
+            return counts
+
+    def snapshot(self) -> Dict:
+        drivers = []
+        with self._cond:
+            in_use = sum(1 for slot in self._slots if slot.in_use)
+            warm = sum(1 for slot in self._slots if slot.scraper is not None and slot.scraper.driver is not None)
+            leases = self._leases_total
+            browsers = []
+            for group in self._groups:
+                # La RSS recorre /proc: se calcula después de soltar el lock, como en _inspect
+                stats = self._group_stats(group, with_rss=False)
+                started_at = stats['started_at']
+                driver = group.driver()
+                drivers.append(driver)
+                browsers.append({
+                    "index": group.index,
+                    "state": "recycling" if group.draining or group.replacing else (
+                        "running" if driver is not None else "idle"),
+                    "navigations": stats['navigations'],
+                    "age_seconds": round(time.time() - started_at) if started_at else None,
+                    "rss_mb": None,
+                    "consecutive_errors": stats['errors'],
+                    "network_capture": group.network_capture,
+                })
+            snapshot = {
+                "size": self.size,
+                "tabs_per_browser": self.tabs_per_browser,
+                "capture_browsers": self.capture_browsers,
+                "slots": self.slot_count,
+                "in_use": in_use,
+                "idle": self.slot_count - in_use,
+                "warm": warm,
+                "waiting": self._waiting,
+                "max_waiting": self.max_waiting,
+                "acquire_timeout": self.acquire_timeout,
+                "leases_total": leases,
+                "rejected_total": self._rejected_total,
+                "timeouts_total": self._timeouts_total,
+                "avg_wait_ms": round(self._wait_seconds_total * 1000 / leases, 1) if leases else 0.0,
+                "recycled_total": sum(self._recycled.values()),
+                "recycled_by_reason": dict(self._recycled),
+                "browsers": browsers,
+            }
+
+        for browser, driver in zip(browsers, drivers):
+            rss_bytes = process_tree_rss(driver_pid(driver)) if driver is not None else None
+            browser["rss_mb"] = round(rss_bytes / (1024 * 1024), 1) if rss_bytes else None
+        return snapshot
+
+    def close(self):
+        """Cierra todos los navegadores del pool."""
+        self._stop.set()
+        with self._cond:
+            self._closed = True
+            stale = [slot.scraper for slot in self._slots if slot.scraper is not None]
+            for slot in self._slots:
+                slot.scraper = None
+            for group in self._groups:
+                if group.host is not None:
+                    stale.append(group.host)
+                if group.replacement is not None:
+                    stale.append(group.replacement)
+                    group.replacement = None
+            self._cond.notify_all()
+
+        self._dispose(stale)
+
+
+_pool: Optional[ScraperPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_scraper_pool() -> ScraperPool:
+    """Obtiene (o crea) el pool global configurado por variables de entorno."""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ScraperPool(
+                size=int(os.environ.get('SCRAPER_POOL_SIZE', '1')),
+                max_waiting=int(os.environ.get('SCRAPER_POOL_MAX_WAITING', '8')),
+                acquire_timeout=float(os.environ.get('SCRAPER_POOL_ACQUIRE_TIMEOUT', '30')),
+                tabs_per_browser=int(os.environ.get('SCRAPER_TABS_PER_BROWSER', '1')),
+                recycle_policy=RecyclePolicy.from_env(),
+                supervise_interval=float(os.environ.get('SCRAPER_SUPERVISOR_INTERVAL', '30')),
+                capture_browsers=int(os.environ['SCRAPER_CAPTURE_BROWSERS']) if os.environ.get('SCRAPER_CAPTURE_BROWSERS') else None,
+            )
+        return _pool
+
+
+def close_scraper_pool():
+    """Cierra el pool global (si existe)."""
+    global _pool
+    with _pool_lock:
+        pool = _pool
+        _pool = None
+    if pool is not None:
+        pool.close()
@@ -5,6 +5,7 @@ from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.service import Service
 from selenium.webdriver.chrome.options import Options
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from webdriver_manager.chrome import ChromeDriverManager
 try:
     from webdriver_manager.core.utils import ChromeType
@@ -15,13 +16,22 @@ except Exception:
         ChromeType = None
 import subprocess
 from bs4 import BeautifulSoup
+from html_extract import PageExtract, extract_page
+from network_capture import NetworkCapture
+from metrics import VALIDATION_BYTES_TOTAL, VIDEO_CANDIDATES, stage_timer, timed
+from tracing import annotate, bind, record, span, traced
+from failures import LOGIN_WALL, NOT_FOUND, TIMEOUT, classify_exception, failure, is_login_wall
 import json
 import time
 import logging
-import requests
+import threading
 import os
-from typing import Dict, List, Optional, Tuple
+from http_client import HttpClient
+from rate_limit import HostRateLimiter
+import queue
+from typing import Callable, ContextManager, Dict, List, Optional, Tuple
 import re
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError, wait as futures_wait
 from urllib.parse import urlparse, urlunparse, parse_qsl, urlencode
 
 logging.basicConfig(level=logging.INFO)
@@ -69,6 +79,506 @@ def _extract_meta_image_candidates(soup: BeautifulSoup) -> List[str]:
     return candidates
 
 
+# Condiciones de espera evaluadas en el navegador (una llamada por sondeo)
+_JS_DOCUMENT_READY = "return document.readyState === 'complete' && !!document.body;"
+
+_JS_POST_CONTENT_READY = """
+    if (document.readyState !== 'complete' || !document.body) return false;
+    return !!document.querySelector('img, meta[property="og:image"], div[data-ft]');
+"""
+
+_JS_MEDIA_RESOURCE_SEEN = """
+    return performance.getEntriesByType('resource').some(function (e) {
+        var n = (e.name || '').toLowerCase();
+        return n.indexOf('.mp4') >= 0 || n.indexOf('.m3u8') >= 0 || n.indexOf('video.fsci') >= 0;
+    });
+"""
+
+_JS_VIDEO_SIGNAL = """
+    if (document.querySelector('video, meta[property="og:video"], meta[property="og:video:url"]')) return true;
+""" + _JS_MEDIA_RESOURCE_SEEN
+
+# Tras intentar reproducir: listo si ya hay recursos de video o si no hay nada que reproducir
+_JS_PLAYBACK_SETTLED = """
+    if (!document.querySelector('video')) return true;
+""" + _JS_MEDIA_RESOURCE_SEEN
+
+_JS_HIDE_WEBDRIVER = """
+    Object.defineProperty(navigator, 'webdriver', {
+        get: () => undefined
+    })
+"""
+
+# Nombre de etapa (métricas) de cada condición de espera
+_WAIT_STAGES = {
+    _JS_DOCUMENT_READY: 'wait_document_ready',
+    _JS_POST_CONTENT_READY: 'wait_post_content',
+    _JS_VIDEO_SIGNAL: 'wait_video_signal',
+    _JS_PLAYBACK_SETTLED: 'wait_playback',
+}
+
+_JS_RESOURCE_COUNT = "return performance.getEntriesByType('resource').length;"
+_JS_SCROLL_HEIGHT = "return document.body ? document.body.scrollHeight : 0;"
+
+# Recolector de enlaces en la página: un MutationObserver anota los <a> nuevos a
+# posts/fotos y cada scroll drena solo los pendientes (sin page_source ni reparseo)
+_JS_INSTALL_LINK_COLLECTOR = """
+    if (window.__postLinks) return true;
+    var state = {seen: new Set(), pending: []};
+    function add(a) {
+        var href = a.getAttribute('href');
+        if (!href || state.seen.has(href)) return;
+        if (href.indexOf('/posts/') < 0 && href.indexOf('/photo') < 0) return;
+        state.seen.add(href);
+        state.pending.push(href);
+    }
+    function scan(node) {
+        if (node.nodeType !== 1) return;
+        if (node.tagName === 'A') add(node);
+        var anchors = node.querySelectorAll('a[href]');
+        for (var i = 0; i < anchors.length; i++) add(anchors[i]);
+    }
+    scan(document.documentElement);
+    new MutationObserver(function (mutations) {
+        mutations.forEach(function (m) {
+            if (m.type === 'attributes') { if (m.target.tagName === 'A') add(m.target); return; }
+            m.addedNodes.forEach(scan);
+        });
+    }).observe(document.documentElement, {childList: true, subtree: true, attributes: true, attributeFilter: ['href']});
+    window.__postLinks = state;
+    return true;
+"""
+
+_JS_DRAIN_NEW_LINKS = """
+    var state = window.__postLinks;
+    if (!state) return null;
+    var links = state.pending;
+    state.pending = [];
+    return links;
+"""
+
+
+# Parámetros de seguimiento que no cambian el contenido del post
+_TRACKING_PARAMS = {
+    'fbclid', 'mibextid', 'rdid', 'share_url', 'ref', 'refid', 'refsrc', '_rdr', '_rdc',
+    '__tn__', 'paipv', 'eav', 'sfnsn', 'wtsid', 'hc_ref', 'hc_location', 'notif_id',
+    'notif_t', 'extid', 'app', 's', 'sfns', 'ref_page_id', 'acontext'
+}
+_TRACKING_PARAM_PREFIXES = ('utm_', '__cft__', '__xts__')
+
+
+def to_mobile_url(url: str) -> str:
+    """Convierte URL a versión móvil (más fácil de scrapear)"""
+    # Asegurarse de tener esquema
+    if not url.startswith('http'):
+        url = 'https://' + url
+
+    parsed = urlparse(url)
+    netloc = parsed.netloc.lower()
+
+    # Quitar prefijo www. si existe
+    if netloc.startswith('www.'):
+        netloc = netloc[4:]
+
+    # Añadir subdominio móvil solo si no está presente
+    if not netloc.startswith('m.'):
+        netloc = 'm.' + netloc
+
+    mobile_parsed = parsed._replace(netloc=netloc)
+    return urlunparse(mobile_parsed)
+
+
+def canonical_post_url(url: str) -> str:
+    """URL móvil normalizada de un post, sin parámetros de seguimiento ni fragmento.
+
+    Sirve como clave estable para cachés: dos enlaces al mismo post compartidos desde
+    sitios distintos producen la misma clave.
+    """
+    parsed = urlparse(to_mobile_url(url.strip()))
+    qs = [
+        (k, v) for (k, v) in parse_qsl(parsed.query, keep_blank_values=True)
+        if k.lower() not in _TRACKING_PARAMS and not k.lower().startswith(_TRACKING_PARAM_PREFIXES)
+    ]
+    path = parsed.path.rstrip('/') or '/'
+    return urlunparse(parsed._replace(scheme='https', path=path, query=urlencode(sorted(qs)), fragment=''))
+
+
+_http_client: Optional[HttpClient] = None
+_fast_path_client: Optional[HttpClient] = None
+_http_client_lock = threading.Lock()
+
+
+def get_http_client() -> HttpClient:
+    """Cliente HTTP compartido para todo el tráfico saliente que no pasa por Chrome."""
+    global _http_client
+    with _http_client_lock:
+        if _http_client is None:
+            _http_client = HttpClient(
+                pool_hosts=int(os.environ.get('SCRAPER_HTTP_POOL_HOSTS', '10')),
+                pool_maxsize=int(os.environ.get('SCRAPER_HTTP_POOL_MAXSIZE', '20')),
+                retries=int(os.environ.get('SCRAPER_HTTP_RETRIES', '2')),
+                backoff_factor=float(os.environ.get('SCRAPER_HTTP_BACKOFF', '0.3')),
+                proxy=os.environ.get('SCRAPER_UPSTREAM_PROXY') or None,
+            )
+        return _http_client
+
+
+def get_fast_path_client() -> HttpClient:
+    """Cliente del tier 0 para las páginas de Facebook: sin reintentos, el plazo lo acota ``FAST_PATH_DEADLINE``."""
+    global _fast_path_client
+    with _http_client_lock:
+        if _fast_path_client is None:
+            _fast_path_client = HttpClient(
+                pool_hosts=2,
+                pool_maxsize=int(os.environ.get('SCRAPER_HTTP_POOL_MAXSIZE', '20')),
+                retries=0,
+                proxy=os.environ.get('SCRAPER_UPSTREAM_PROXY') or None,
+            )
+        return _fast_path_client
+
+
+_rate_limiter: Optional[HostRateLimiter] = None
+
+
+def get_rate_limiter() -> HostRateLimiter:
+    """Limitador por host compartido por los navegadores que recorren posts de una página."""
+    global _rate_limiter
+    with _http_client_lock:
+        if _rate_limiter is None:
+            _rate_limiter = HostRateLimiter(float(os.environ.get('SCRAPER_HOST_MIN_INTERVAL', '1.0')))
+        return _rate_limiter
+
+
+def _total_length(response) -> Optional[int]:
+    """Tamaño total del recurso: de Content-Range en respuestas 206, si no Content-Length."""
+    content_range = response.headers.get('Content-Range') or ''
+    match = re.search(r'/(\d+)\s*$', content_range)
+    if match:
+        return int(match.group(1))
+    cl = response.headers.get('Content-Length')
+    if cl and cl.isdigit() and response.status_code != 206:
+        return int(cl)
+    return None
+
+
+def _span_url(url: str) -> str:
+    """Host y ruta de ``url`` para los spans (las queries firmadas de fbcdn son enormes)."""
+    parsed = urlparse(url)
+    return f"{parsed.netloc}{parsed.path}"
+
+
+def stream_probe(url: str, headers: Optional[Dict[str, str]] = None, cookies: Optional[Dict[str, str]] = None,
+                 max_bytes: int = 16001, timeout: float = 8) -> Dict:
+    """GET por rango en streaming que lee como máximo ``max_bytes`` y cierra.
+
+    Retorna status, content_type, content_length (tamaño total del recurso si se
+    conoce), accept_ranges y bytes_read, para que ranking y probe compartan una
+    sola descarga por URL.
+    """
+    req_headers = dict(headers) if headers else {}
+    req_headers['Range'] = f'bytes=0-{max_bytes - 1}'
+    result = {
+        "ok": False,
+        "status": None,
+        "content_type": None,
+        "content_length": None,
+        "accept_ranges": None,
+        "bytes_read": 0,
+        "error": None,
+    }
+    try:
+        with span('range_get', url=_span_url(url)), \
+                get_http_client().get(url, headers=req_headers, cookies=cookies, timeout=timeout, stream=True) as r:
+            result["status"] = r.status_code
+            result["content_type"] = r.headers.get("Content-Type")
+            total = _total_length(r)
+            result["content_length"] = str(total) if total is not None else None
+            accept_ranges = r.headers.get("Accept-Ranges")
+            result["accept_ranges"] = accept_ranges or ("bytes" if r.status_code == 206 else None)
+
+            # Un 206 del tamaño pedido se lee completo para devolver la conexión al pool
+            cl = r.headers.get('Content-Length')
+            drain = r.status_code == 206 and cl is not None and cl.isdigit() and int(cl) <= max_bytes
+            read = 0
+            for chunk in r.iter_content(chunk_size=8192):
+                read += len(chunk)
+                if read >= max_bytes and not drain:
+                    break
+            result["bytes_read"] = read
+            VALIDATION_BYTES_TOTAL.inc(read)
+            annotate(status=r.status_code, bytes=read)
+            result["ok"] = r.status_code in (200, 206)
+    except Exception as e:
+        result["error"] = str(e)
+    return result
+
+
+def _extract(html: Optional[str]) -> PageExtract:
+    with stage_timer('extract'):
+        return extract_page(html)
+
+
+def _unescape_json_url(value: str) -> str:
+    """Deshace el escapado JSON/HTML típico de URLs embebidas en el HTML de Facebook."""
+    return value.replace('\\/', '/').replace('\\u0025', '%').replace('&amp;', '&')
+
+
+def _looks_like_video_url(url: Optional[str]) -> bool:
+    """URL de video por su forma (.mp4, .m3u8 o host ``video.*``); cualquier fbcdn no basta (imágenes de scontent)."""
+    if not url or url.startswith('blob:'):
+        return False
+    parsed = urlparse(url)
+    path = parsed.path.lower()
+    return path.endswith(('.mp4', '.m3u8')) or (parsed.hostname or '').lower().startswith('video')
+
+
+def _is_video_content_type(content_type: Optional[str]) -> bool:
+    low = (content_type or '').split(';')[0].strip().lower()
+    return low.startswith('video/') or low in ('application/vnd.apple.mpegurl', 'application/x-mpegurl')
+
+
+# User-agents para el camino HTTP sin navegador (tier 0)
+_FAST_PATH_USER_AGENTS = (
+    "Mozilla/5.0 (Linux; Android 10; Pixel 5) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Mobile Safari/537.36",
+    "facebookexternalhit/1.1 (+http://www.facebook.com/externalhit_uatext.php)",
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
+)
+
+
+def _install_chromedriver(chrome_bin: str) -> Tuple[str, Optional[str]]:
+    """Detecta la versión del navegador y obtiene un chromedriver compatible (lento)."""
+    # Detect Chrome/Chromium binary and try to download matching chromedriver
+    chrome_version = None
+    try:
+        out = subprocess.check_output([chrome_bin, '--version'], stderr=subprocess.STDOUT, text=True)
+        chrome_version = out.strip()
+        logger.info(f"Detected browser version: {chrome_version}")
+    except Exception:
+        logger.debug("Could not detect chrome binary version via subprocess")
+
+    # Use webdriver-manager specifying Chromium type to better match binary
+    try:
+        driver_path = None
+        attempts = []
+
+        # Extract full and major versions if possible
+        full_ver = None
+        major_ver = None
+        try:
+            if chrome_version:
+                m_full = re.search(r'(\d+\.\d+\.\d+\.\d+)', chrome_version)
+                if m_full:
+                    full_ver = m_full.group(1)
+                m_maj = re.search(r'(\d+)', chrome_version)
+                if m_maj:
+                    major_ver = m_maj.group(1)
+        except Exception:
+            pass
+
+        # Try matching driver by full version, then major version, with Chromium hint
+        if ChromeType is not None:
+            if full_ver:
+                attempts.append(f"chrome_type=ChromeType.CHROMIUM, version={full_ver}")
+                try:
+                    driver_path = ChromeDriverManager(chrome_type=ChromeType.CHROMIUM, version=full_ver).install()
+                except Exception:
+                    driver_path = None
+            if not driver_path and major_ver:
+                attempts.append(f"chrome_type=ChromeType.CHROMIUM, version_prefix={major_ver}")
+                try:
+                    driver_path = ChromeDriverManager(chrome_type=ChromeType.CHROMIUM, version=major_ver).install()
+                except Exception:
+                    driver_path = None
+
+        # Try with string hint for chromium
+        if not driver_path:
+            try:
+                if full_ver:
+                    attempts.append(f"chrome_type='chromium', version={full_ver}")
+                    driver_path = ChromeDriverManager(chrome_type='chromium', version=full_ver).install()
+                if not driver_path and major_ver:
+                    attempts.append(f"chrome_type='chromium', version_prefix={major_ver}")
+                    driver_path = ChromeDriverManager(chrome_type='chromium', version=major_ver).install()
+            except Exception:
+                driver_path = None
+
+        # Final fallback: default manager
+        if not driver_path:
+            attempts.append('default')
+            driver_path = ChromeDriverManager().install()
+
+        logger.info(f"Using chromedriver at: {driver_path} (attempts: {attempts})")
+    except Exception as e:
+        logger.warning(f"webdriver-manager failed to install chromedriver with Chromium hint: {e}; falling back to default manager")
+        driver_path = ChromeDriverManager().install()
+
+    if not driver_path or not os.path.exists(driver_path):
+        logger.warning("chromedriver path missing; downloading default via webdriver-manager")
+        driver_path = ChromeDriverManager().install()
+    return driver_path, chrome_version
+
+
+def _driver_cache_path() -> str:
+    return os.environ.get(
+        'SCRAPER_DRIVER_CACHE',
+        os.path.join(os.path.expanduser('~'), '.cache', 'video-downloader', 'chromedriver.json')
+    )
+
+
+def _browser_fingerprint(chrome_bin: str) -> Optional[str]:
+    """Identifica el binario del navegador por ruta, mtime y tamaño (cambia al actualizarlo)."""
+    try:
+        st = os.stat(chrome_bin)
+    except OSError:
+        return None
+    return f"{os.path.realpath(chrome_bin)}:{int(st.st_mtime)}:{st.st_size}"
+
+
+def _read_driver_cache(fingerprint: str) -> Optional[Dict[str, str]]:
+    try:
+        with open(_driver_cache_path(), 'r', encoding='utf-8') as fh:
+            entry = json.load(fh).get(fingerprint)
+    except (OSError, ValueError):
+        return None
+    if entry and entry.get('driver_path') and os.path.exists(entry['driver_path']):
+        return entry
+    return None
+
+
+def _write_driver_cache(fingerprint: str, entry: Dict[str, Optional[str]]):
+    path = _driver_cache_path()
+    try:
+        try:
+            with open(path, 'r', encoding='utf-8') as fh:
+                data = json.load(fh)
+        except (OSError, ValueError):
+            data = {}
+        data[fingerprint] = entry
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as fh:
+            json.dump(data, fh, indent=2)
+        os.replace(tmp_path, path)
+    except OSError as e:
+        logger.debug(f"No se pudo guardar la caché de chromedriver: {e}")
+
+
+_resolved_driver: Optional[Tuple[str, Optional[str]]] = None
+_resolved_driver_lock = threading.Lock()
+
+
+def resolve_chromedriver() -> Tuple[str, Optional[str]]:
+    """Ruta de chromedriver y versión del navegador, resueltas una sola vez.
+
+    ``CHROMEDRIVER_PATH`` tiene prioridad. Si no, se consulta una caché en disco
+    indexada por el binario del navegador (ruta, mtime, tamaño), de modo que la
+    detección con ``--version`` y webdriver-manager solo se repite al cambiar Chrome.
+    """
+    global _resolved_driver
+    with _resolved_driver_lock:
+        if _resolved_driver is not None and os.path.exists(_resolved_driver[0]):
+            return _resolved_driver
+
+        chrome_bin = os.environ.get('CHROME_BIN', '/usr/bin/chromium')
+        driver_override = os.environ.get('CHROMEDRIVER_PATH')
+        if driver_override and os.path.exists(driver_override):
+            logger.info(f"Using chromedriver at: {driver_override} (env.CHROMEDRIVER_PATH)")
+            _resolved_driver = (driver_override, None)
+            return _resolved_driver
+
+        fingerprint = _browser_fingerprint(chrome_bin)
+        cached = _read_driver_cache(fingerprint) if fingerprint else None
+        if cached:
+            logger.info(f"Using cached chromedriver at: {cached['driver_path']} ({cached.get('browser_version')})")
+            _resolved_driver = (cached['driver_path'], cached.get('browser_version'))
+            return _resolved_driver
+
+        driver_path, chrome_version = _install_chromedriver(chrome_bin)
+        if fingerprint:
+            _write_driver_cache(fingerprint, {'driver_path': driver_path, 'browser_version': chrome_version})
+        _resolved_driver = (driver_path, chrome_version)
+        return _resolved_driver
+
+
+# Claves JSON con la URL del video, en orden de preferencia
+_EMBEDDED_VIDEO_KEYS = (
+    'playable_url',
+    'playable_url_quality_hd',
+    'playable_url_quality_sd',
+    'hd_src',
+    'sd_src',
+    'sd_src_no_ratelimit',
+    'hd_src_no_ratelimit',
+    'fallback_playable_url',
+)
+_EMBEDDED_VIDEO_RE = re.compile(
+    r'"(' + '|'.join(_EMBEDDED_VIDEO_KEYS) + r')":"(https:[^"]+)"|src\\":"(https://video[^"]+)'
+)
+_FBCDN_URL_RE = re.compile(r'(https://[a-z0-9.\-]*fbcdn\.net[^"\'>\s]+)')
+
+
+def _search_embedded_video_urls(page_source: str) -> Optional[str]:
+    """Busca todas las variantes de URL de video embebida en una sola pasada de regex.
+
+    Conserva la prioridad de ``_EMBEDDED_VIDEO_KEYS``: gana la primera aparición de la
+    clave más preferida, igual que buscar cada patrón por separado.
+    """
+    first_by_key: Dict[str, str] = {}
+    for match in _EMBEDDED_VIDEO_RE.finditer(page_source):
+        key = match.group(1) or 'src'
+        if key not in first_by_key:
+            first_by_key[key] = match.group(2) or match.group(3)
+            if key == _EMBEDDED_VIDEO_KEYS[0]:
+                break
+    for key in _EMBEDDED_VIDEO_KEYS + ('src',):
+        if key in first_by_key:
+            return _unescape_json_url(first_by_key[key])
+    return None
+
+
+# Perfiles de bloqueo de recursos aplicados por navegación (CDP Network.setBlockedURLs)
+# setBlockedURLs solo admite '*' y también bloquea el documento principal y los XHR: las
+# extensiones se anclan al final de la ruta o al inicio de la query ('*.css', '*.css?*'), no
+# '*.css*', que bloquearía cualquier URL que contenga el texto (?next=/x.png, /page.icons/...).
+
+
+def _extension_patterns(*extensions: str) -> Tuple[str, ...]:
+    return tuple(pattern for ext in extensions for pattern in (f'*.{ext}', f'*.{ext}?*'))
+
+
+_BLOCK_FONTS = _extension_patterns('woff', 'woff2', 'ttf', 'otf', 'eot')
+_BLOCK_CSS = _extension_patterns('css')
+# El píxel es /tr? o /tr/, no /tr* (/travel..., /trending)
+_BLOCK_TRACKING = (
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*',
+    '*connect.facebook.net*', '*facebook.com/tr?*', '*facebook.com/tr/*', '*pixel.facebook.com*',
+    '*/ajax/bz*', '*/ajax/logging*', '*/logging/falco*', '*/security/hsts-pixel*',
+)
+_BLOCK_IMAGES = _extension_patterns('jpg', 'jpeg', 'png', 'gif', 'webp', 'svg', 'ico')
+_BLOCK_MEDIA = _extension_patterns('mp4', 'm3u8', 'webm', 'm4a', 'mp3') + ('*://video.fsci*',)
+
+BLOCK_PROFILES: Dict[str, Tuple[str, ...]] = {
+    # Resolver video: se necesitan los requests de media, no imágenes ni estilos
+    'video': _BLOCK_FONTS + _BLOCK_CSS + _BLOCK_TRACKING + _BLOCK_IMAGES,
+    # Extraer imágenes del post: se dejan cargar (lazy-load), sin media
+    'images': _BLOCK_FONTS + _BLOCK_CSS + _BLOCK_TRACKING + _BLOCK_MEDIA,
+    # Solo HTML/texto y enlaces
+    'text-only': _BLOCK_FONTS + _BLOCK_CSS + _BLOCK_TRACKING + _BLOCK_IMAGES + _BLOCK_MEDIA,
+    # Páginas /share/: necesitan imágenes y estilos para resolver la vista previa
+    'share': _BLOCK_FONTS + _BLOCK_TRACKING,
+    'none': (),
+}
+# Perfiles que bloquean la media no necesitan captura de red: los requests de video fallan bloqueados
+NETWORK_CAPTURE_PROFILES = frozenset(
+    name for name, patterns in BLOCK_PROFILES.items() if not set(_BLOCK_MEDIA) <= set(patterns)
+)
+
+
+def captures_network(profile: Optional[str]) -> bool:
+    """True si las navegaciones con ``profile`` aprovechan la captura de red (sin perfil: sí)."""
+    return profile is None or profile in NETWORK_CAPTURE_PROFILES
+
+
 def _default_block_images() -> bool:
     return os.environ.get('SCRAPER_BLOCK_IMAGES', 'false').lower() == 'true'
 
@@ -79,12 +589,42 @@ def _resolve_block_images_flag(flag: Optional[bool]) -> bool:
 
 class FacebookSeleniumScraper:
     """Scraper de Facebook usando Selenium - SIN LOGIN requerido"""
+
+    # Límites superiores (segundos) de las esperas adaptativas; antes eran sleeps fijos
+    PAGE_READY_TIMEOUT = 3.0
+    SCROLL_SETTLE_TIMEOUT = 2.0
+    PLAYBACK_TIMEOUT = 3.0
+    FALLBACK_PLAYBACK_TIMEOUT = 4.0
+    WAIT_POLL_INTERVAL = 0.2
+    # Ranking concurrente de candidatos de video
+    RANK_MAX_WORKERS = 8
+    RANK_DEADLINE = 12.0
+    # Bytes que debe devolver un candidato para considerarlo video válido
+    VALIDATION_MIN_BYTES = 16000
+    # Timeout de cada petición del camino HTTP sin navegador (tier 0) y tope total antes de pasar a Chrome
+    FAST_PATH_TIMEOUT = 6.0
+    FAST_PATH_DEADLINE = float(os.environ.get('SCRAPER_HTTP_FAST_PATH_DEADLINE', '8'))
+    # Navegadores adicionales (prestados) que scrapean posts de una página en paralelo
+    PAGE_MAX_WORKERS = 3
+    # Tope de seguridad para feeds infinitos (el scroll normalmente para cuando la página deja de crecer)
+    MAX_PAGE_SCROLLS = 100
+    NETWORK_QUIET_PERIOD = 0.5
     
-    def __init__(self, headless: bool = True, block_images: Optional[bool] = None):
+    def __init__(self, headless: bool = True, block_images: Optional[bool] = None, network_capture: bool = True):
         self.headless = headless
         self.driver = None
         self.block_images = _resolve_block_images_flag(block_images)
+        # Log performance de chromedriver (captura de red); se decide al lanzar Chrome
+        self.network_capture = network_capture
+        # Perfil de BLOCK_PROFILES para la próxima navegación (None = no tocar el bloqueo)
+        self.block_profile: Optional[str] = None
+        self._applied_block_profile: Optional[str] = None
+        # Salud del driver actual (la usa el supervisor del pool para reciclarlo)
+        self.driver_started_at: Optional[float] = None
+        self.navigations = 0
+        self.consecutive_errors = 0
         
+    @timed('setup_driver')
     def setup_driver(self):
         """Configura el driver de Chrome"""
         chrome_options = Options()
@@ -98,7 +638,15 @@ class FacebookSeleniumScraper:
         chrome_options.add_argument("--disable-dev-shm-usage")
         chrome_options.add_argument("--disable-gpu")
         chrome_options.add_argument("--window-size=1920,1080")
+        # Pestañas en segundo plano (modo pestañas): sin frenar timers ni renderizado
+        chrome_options.add_argument("--disable-background-timer-throttling")
+        chrome_options.add_argument("--disable-backgrounding-occluded-windows")
+        chrome_options.add_argument("--disable-renderer-backgrounding")
         chrome_options.add_argument("user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36")
+        # Proxy de salida (también lo usa el cliente HTTP); p. ej. el servidor de fixtures de benchmarks/
+        upstream_proxy = os.environ.get('SCRAPER_UPSTREAM_PROXY')
+        if upstream_proxy:
+            chrome_options.add_argument(f"--proxy-server={upstream_proxy}")
         
         # Deshabilitar notificaciones
         image_policy = 2 if self.block_images else 1
@@ -116,84 +664,14 @@ class FacebookSeleniumScraper:
             chrome_options.binary_location = chrome_bin
         
         try:
-            # Habilitar logging de performance para capturar requests de red
-            chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
-
-            # Detect Chrome/Chromium binary and try to download matching chromedriver
-            chrome_bin = os.environ.get('CHROME_BIN', '/usr/bin/chromium')
-            chrome_version = None
-            try:
-                out = subprocess.check_output([chrome_bin, '--version'], stderr=subprocess.STDOUT, text=True)
-                chrome_version = out.strip()
-                logger.info(f"Detected browser version: {chrome_version}")
-            except Exception:
-                logger.debug("Could not detect chrome binary version via subprocess")
-
-            # Use webdriver-manager specifying Chromium type to better match binary
-            driver_override = os.environ.get('CHROMEDRIVER_PATH')
-            try:
-                driver_path = None
-                attempts = []
-
-                # Extract full and major versions if possible
-                full_ver = None
-                major_ver = None
-                try:
-                    if chrome_version:
-                        m_full = re.search(r'(\d+\.\d+\.\d+\.\d+)', chrome_version)
-                        if m_full:
-                            full_ver = m_full.group(1)
-                        m_maj = re.search(r'(\d+)', chrome_version)
-                        if m_maj:
-                            major_ver = m_maj.group(1)
-                except Exception:
-                    pass
-
-                # Try matching driver by full version, then major version, with Chromium hint
-                if ChromeType is not None:
-                    if full_ver:
-                        attempts.append(f"chrome_type=ChromeType.CHROMIUM, version={full_ver}")
-                        try:
-                            driver_path = ChromeDriverManager(chrome_type=ChromeType.CHROMIUM, version=full_ver).install()
-                        except Exception:
-                            driver_path = None
-                    if not driver_path and major_ver:
-                        attempts.append(f"chrome_type=ChromeType.CHROMIUM, version_prefix={major_ver}")
-                        try:
-                            driver_path = ChromeDriverManager(chrome_type=ChromeType.CHROMIUM, version=major_ver).install()
-                        except Exception:
-                            driver_path = None
-
-                # Try with string hint for chromium
-                if not driver_path:
-                    try:
-                        if full_ver:
-                            attempts.append(f"chrome_type='chromium', version={full_ver}")
-                            driver_path = ChromeDriverManager(chrome_type='chromium', version=full_ver).install()
-                        if not driver_path and major_ver:
-                            attempts.append(f"chrome_type='chromium', version_prefix={major_ver}")
-                            driver_path = ChromeDriverManager(chrome_type='chromium', version=major_ver).install()
-                    except Exception:
-                        driver_path = None
-
-                if driver_override and os.path.exists(driver_override):
-                    driver_path = driver_override
-                    attempts.insert(0, 'env.CHROMEDRIVER_PATH')
-
-                # Final fallback: default manager
-                if not driver_path:
-                    attempts.append('default')
-                    driver_path = ChromeDriverManager().install()
-
-                logger.info(f"Using chromedriver at: {driver_path} (attempts: {attempts})")
-            except Exception as e:
-                logger.warning(f"webdriver-manager failed to install chromedriver with Chromium hint: {e}; falling back to default manager")
-                driver_path = ChromeDriverManager().install()
+            if self.network_capture:
+                # Habilitar logging de performance para capturar requests de red
+                chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
+                # Solo eventos de red: Chrome no acumula eventos de Page/trazas en el buffer
+                chrome_options.add_experimental_option('perfLoggingPrefs', {'enableNetwork': True, 'enablePage': False})
 
             try:
-                if not driver_path or not os.path.exists(driver_path):
-                    logger.warning("chromedriver path missing; downloading default via webdriver-manager")
-                    driver_path = ChromeDriverManager().install()
+                driver_path, _ = resolve_chromedriver()
                 service = Service(driver_path)
             except Exception as service_err:
                 logger.error(f"Failed to initialize chromedriver service: {service_err}")
@@ -212,19 +690,120 @@ class FacebookSeleniumScraper:
                 self.driver = webdriver.Chrome(service=service, options=chrome_options)
             
             # Ocultar webdriver
-            self.driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {
-                "source": """
-                    Object.defineProperty(navigator, 'webdriver', {
-                        get: () => undefined
-                    })
-                """
-            })
+            self.driver.execute_cdp_cmd("Page.addScriptToEvaluateOnNewDocument", {"source": _JS_HIDE_WEBDRIVER})
             
+            self._reset_driver_stats()
             logger.info("✅ Driver de Chrome configurado correctamente")
             
         except Exception as e:
             logger.error(f"❌ Error configurando driver: {e}")
             raise
+
+    def _reset_driver_stats(self):
+        self._applied_block_profile = None
+        self.driver_started_at = time.time()
+        self.navigations = 0
+        self.consecutive_errors = 0
+
+    def _note_failure(self, error: Exception):
+        """Cuenta errores del driver (no de la página) seguidos; una navegación exitosa los reinicia."""
+        if isinstance(error, WebDriverException):
+            self.consecutive_errors += 1
+
+    def apply_block_profile(self, profile: Optional[str]):
+        """Aplica un perfil de BLOCK_PROFILES al navegador vía CDP (solo si cambió)."""
+        if profile is None or profile == self._applied_block_profile:
+            return
+        if profile not in BLOCK_PROFILES:
+            raise ValueError(f"Perfil de bloqueo desconocido: {profile}")
+        try:
+            if self._applied_block_profile is None:
+                self.driver.execute_cdp_cmd('Network.enable', {})
+            self.driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(BLOCK_PROFILES[profile])})
+            self._applied_block_profile = profile
+        except Exception as e:
+            logger.warning(f"No se pudo aplicar el perfil de bloqueo '{profile}': {e}")
+
+    def _navigate(self, url: str) -> Optional[NetworkCapture]:
+        """Navega a ``url`` empezando una captura de red limpia para esta navegación.
+
+        Retorna None si el navegador se lanzó sin captura de red.
+        """
+        self.apply_block_profile(self.block_profile)
+        capture = None
+        if self.network_capture:
+            # En modo pestañas, solo los eventos de la pestaña de este scraper
+            capture = NetworkCapture(webview=getattr(self.driver, 'webview', None))
+            # Descarta lo acumulado aunque esta navegación no use la captura (el buffer no crece)
+            capture.begin(self.driver)
+        self.navigations += 1
+        with stage_timer('driver_get'):
+            self.driver.get(url)
+        self.consecutive_errors = 0
+        return capture
+
+    def wait_for(self, script: str, timeout: float) -> bool:
+        """Espera hasta que ``script`` (JS que retorna bool) sea verdadero.
+
+        Retorna False al agotar ``timeout``; el tiempo es un límite superior, no una pausa fija.
+        """
+        def _condition(driver):
+            try:
+                return bool(driver.execute_script(script))
+            except WebDriverException:
+                return False
+
+        try:
+            with stage_timer(_WAIT_STAGES.get(script, 'wait')):
+                WebDriverWait(self.driver, timeout, poll_frequency=self.WAIT_POLL_INTERVAL).until(_condition)
+            return True
+        except TimeoutException:
+            return False
+
+    def _document_complete(self) -> bool:
+        try:
+            return bool(self.driver.execute_script(_JS_DOCUMENT_READY))
+        except WebDriverException:
+            return False
+
+    def wait_for_network_idle(self, timeout: float, quiet_period: Optional[float] = None) -> bool:
+        """Espera a que no aparezcan nuevos recursos de red durante ``quiet_period`` segundos."""
+        quiet = self.NETWORK_QUIET_PERIOD if quiet_period is None else quiet_period
+        state = {'count': -1, 'since': time.monotonic()}
+
+        def _idle(driver):
+            try:
+                count = driver.execute_script(_JS_RESOURCE_COUNT)
+            except WebDriverException:
+                return False
+            now = time.monotonic()
+            if count != state['count']:
+                state['count'] = count
+                state['since'] = now
+                return False
+            return now - state['since'] >= quiet
+
+        try:
+            with stage_timer('wait_network_idle'):
+                WebDriverWait(self.driver, timeout, poll_frequency=self.WAIT_POLL_INTERVAL).until(_idle)
+            return True
+        except TimeoutException:
+            return False
+
+    def wait_for_height_change(self, previous_height: int, timeout: float) -> bool:
+        """Espera a que la página crezca tras un scroll (carga de más contenido)."""
+        def _grew(driver):
+            try:
+                return (driver.execute_script(_JS_SCROLL_HEIGHT) or 0) > previous_height
+            except WebDriverException:
+                return False
+
+        try:
+            with stage_timer('wait_scroll'):
+                WebDriverWait(self.driver, timeout, poll_frequency=self.WAIT_POLL_INTERVAL).until(_grew)
+            return True
+        except TimeoutException:
+            return False
     
     def parse_facebook_url(self, url: str) -> Dict[str, Optional[str]]:
         """Parsea una URL de Facebook"""
@@ -258,23 +837,7 @@ class FacebookSeleniumScraper:
     
     def convert_to_mobile_url(self, url: str) -> str:
         """Convierte URL a versión móvil (más fácil de scrapear)"""
-        # Asegurarse de tener esquema
-        if not url.startswith('http'):
-            url = 'https://' + url
-
-        parsed = urlparse(url)
-        netloc = parsed.netloc.lower()
-
-        # Quitar prefijo www. si existe
-        if netloc.startswith('www.'):
-            netloc = netloc[4:]
-
-        # Añadir subdominio móvil solo si no está presente
-        if not netloc.startswith('m.'):
-            netloc = 'm.' + netloc
-
-        mobile_parsed = parsed._replace(netloc=netloc)
-        return urlunparse(mobile_parsed)
+        return to_mobile_url(url)
 
     def normalize_video_url(self, url: str) -> str:
         """Remove bytestart/byteend query params to attempt a full video URL."""
@@ -314,11 +877,12 @@ class FacebookSeleniumScraper:
         for target in targets:
             for hdrs in headers_variants:
                 try:
-                    resp = requests.get(target, headers=hdrs, timeout=8, allow_redirects=True)
+                    with span('share_preview_get', url=_span_url(target)):
+                        resp = get_http_client().get(target, headers=hdrs, timeout=8)
+                        annotate(status=resp.status_code, bytes=len(resp.content))
                     if resp.status_code != 200 or not resp.text:
                         continue
-                    soup = BeautifulSoup(resp.text, 'html.parser')
-                    for img in _extract_meta_image_candidates(soup):
+                    for img in _extract(resp.text).meta_image_candidates():
                         if (_is_candidate_image_src(img) or img.startswith('http')) and img not in discovered:
                             discovered.append(img)
                     if discovered:
@@ -328,6 +892,7 @@ class FacebookSeleniumScraper:
                     continue
         return discovered
     
+    @traced('scrape_post')
     def scrape_post_by_url(self, post_url: str) -> Dict:
         """
         Extrae información de un post usando su URL completa
@@ -346,60 +911,49 @@ class FacebookSeleniumScraper:
             mobile_url = self.convert_to_mobile_url(post_url)
             
             logger.info(f"🔍 Accediendo a: {mobile_url}")
-            self.driver.get(mobile_url)
-            time.sleep(3)
+            self._navigate(mobile_url)
+            if is_login_wall(self.driver.current_url):
+                logger.info(f"🔒 Muro de login: {post_url}")
+                return failure('El post requiere iniciar sesión', LOGIN_WALL, url=post_url, post=None)
+            self.wait_for(_JS_POST_CONTENT_READY, self.PAGE_READY_TIMEOUT)
             
             # Scroll para cargar contenido
             self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-            time.sleep(2)
+            self.wait_for_network_idle(self.SCROLL_SETTLE_TIMEOUT)
             
-            # Obtener HTML
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
+            # Obtener HTML (una sola pasada sobre el documento)
+            page = _extract(self.driver.page_source)
             
-            # Extraer imágenes
+            # Extraer imágenes (src y luego data-src)
             images = []
-            img_tags = soup.find_all('img')
-            
-            for img in img_tags:
-                src = img.get('src')
-                if _is_candidate_image_src(src) and src not in images:
-                    images.append(src)
-            
-            # También buscar en atributos data-src
-            for img in soup.find_all('img', attrs={'data-src': True}):
-                src = img.get('data-src')
-                if _is_candidate_image_src(src) and src not in images:
+            seen = set()
+            for src in page.img_srcs + page.img_data_srcs:
+                if src not in seen and _is_candidate_image_src(src):
+                    seen.add(src)
                     images.append(src)
 
             # Fallback: og:image / link rel="image_src" para rutas /share
             if not images:
-                for candidate in _extract_meta_image_candidates(soup):
-                    if candidate not in images:
-                        images.append(candidate)
+                images = page.meta_image_candidates()
+                seen = set(images)
 
             # Último recurso: descargar la página /share como lo haría facebookexternalhit
             if not images and '/share/' in post_url.lower():
                 share_images = self._fetch_share_preview_images(post_url, mobile_url)
                 for candidate in share_images:
-                    if candidate not in images:
+                    if candidate not in seen:
+                        seen.add(candidate)
                         images.append(candidate)
             
             # Extraer texto del post
             post_text = ""
             try:
                 # En móvil, el texto suele estar en divs específicos
-                text_divs = soup.find_all('div', {'data-ft': True})
-                for div in text_divs:
-                    text = div.get_text(strip=True)
-                    if len(text) > 20 and len(text) > len(post_text):
-                        post_text = text
+                post_text = page.longest_data_ft_text(20)
                 
                 # Si no se encontró, buscar en cualquier div
                 if not post_text:
-                    all_text = soup.get_text()
-                    lines = [line.strip() for line in all_text.split('\n') if len(line.strip()) > 30]
-                    if lines:
-                        post_text = lines[0]
+                    post_text = page.first_long_line(30)
                         
             except Exception as e:
                 logger.warning(f"No se pudo extraer texto: {e}")
@@ -426,67 +980,48 @@ class FacebookSeleniumScraper:
             
         except Exception as e:
             logger.error(f"❌ Error scrapeando post: {e}")
-            return {
-                'success': False,
-                'error': str(e),
-                'url': post_url,
-                'post': None
-            }
+            self._note_failure(e)
+            return failure(str(e), classify_exception(e), url=post_url, post=None)
 
     def extract_video_url(self, soup, page_source: Optional[str] = None) -> Optional[str]:
         """Intentos heurísticos para extraer la URL del video de una publicación.
 
         Busca meta tags `og:video`, tags `<video>` y patrones en el HTML como `playable_url`.
+        ``soup`` es el ``PageExtract`` de ``extract_page``; por compatibilidad también se
+        acepta un BeautifulSoup (se vuelve a extraer de su HTML).
         """
         try:
+            page = soup if isinstance(soup, PageExtract) else _extract(page_source or str(soup))
+
             # 1) Meta tags og:video
-            meta = soup.find('meta', property='og:video') or soup.find('meta', property='og:video:url')
-            if meta and meta.get('content'):
-                return meta.get('content')
+            meta_video = page.meta_property.get('og:video') or page.meta_property.get('og:video:url')
+            if meta_video:
+                return meta_video
 
             # 2) Video tag directo
-            video_tag = soup.find('video')
-            if video_tag:
-                src = video_tag.get('src') or video_tag.get('data-src')
-                if src:
-                    return src
+            if page.has_video:
+                if page.video_src:
+                    return page.video_src
 
                 # <source> dentro de <video>
-                source = video_tag.find('source') if video_tag else None
-                if source and source.get('src'):
-                    return source.get('src')
+                if page.video_source_src:
+                    return page.video_source_src
 
-            # 3) Buscar atributos data-store o JSON con playable_url en el HTML
+            # 3) Buscar atributos data-store o JSON con playable_url en el HTML (una sola pasada)
             if page_source:
-                m = re.search(r'"playable_url":"(https:[^\"]+)"', page_source)
-                if m:
-                    return m.group(1).replace('\\u0025','%')
-
-                # Variantes comunes que Facebook usa
-                for pattern in [
-                    r'"playable_url_quality_hd":"(https:[^\"]+)"',
-                    r'"playable_url_quality_sd":"(https:[^\"]+)"',
-                    r'"hd_src":"(https:[^\"]+)"',
-                    r'"sd_src":"(https:[^\"]+)"',
-                    r'"sd_src_no_ratelimit":"(https:[^\"]+)"',
-                    r'"hd_src_no_ratelimit":"(https:[^\"]+)"',
-                    r'"fallback_playable_url":"(https:[^\"]+)"',
-                    r'src\\":\"(https://video[^\"]+)'
-                ]:
-                    mm = re.search(pattern, page_source)
-                    if mm:
-                        return mm.group(1).replace('\\u0025','%')
+                found = _search_embedded_video_urls(page_source)
+                if found:
+                    return found
 
             # 4) Buscar enlaces que indiquen video en href
-            for a in soup.find_all('a', href=True):
-                href = a['href']
+            for href in page.hrefs:
                 if 'video.php' in href or ('play' in href and 'fbcdn' in href):
                     if href.startswith('/'):
                         return 'https://m.facebook.com' + href
                     return href
 
             # 5) Buscar directamente URLs fbcdn en el HTML
-            m_fbcdn = re.search(r'(https://[a-z0-9.\-]*fbcdn\.net[^"\'>\s]+)', page_source or '')
+            m_fbcdn = _FBCDN_URL_RE.search(page_source or '')
             if m_fbcdn:
                 return m_fbcdn.group(1)
 
@@ -495,7 +1030,56 @@ class FacebookSeleniumScraper:
 
         return None
 
-    def rank_video_candidates(self, candidates: List[str], referer: Optional[str] = None, cookies: Optional[Dict[str, str]] = None) -> Optional[str]:
+    def _score_video_candidate(self, url: str) -> float:
+        score = 0
+        low = url.lower()
+        if '.mp4' in low or '.m3u8' in low:
+            score += 100
+        if 'video.fsci' in low:
+            score += 50
+        if 'fbcdn.net' in low:
+            score += 30
+        if '_nc_ht=video' in low or 'nc_ht=video' in low:
+            score += 20
+        # Penalizar URLs de segmentos parciales
+        if 'bytestart=' in low or 'byteend=' in low:
+            score -= 40
+        return score
+
+    def order_video_candidates(self, candidates: List[str], bonuses: Optional[Dict[str, float]] = None) -> List[str]:
+        """Candidatos únicos de mayor a menor puntaje (heurística + ``bonuses`` por URL, p. ej. tamaño).
+
+        Es la parte pura de ``rank_video_candidates``: sin red, la usa también el corpus de benchmarks/.
+        """
+        bonuses = bonuses or {}
+        unique = list(dict.fromkeys(candidates))
+        return sorted(unique, key=lambda url: (self._score_video_candidate(url) + bonuses.get(url, 0.0), len(url)),
+                      reverse=True)
+
+    def _head_size_bonus(self, url: str, headers: Dict[str, str], cookies: Optional[Dict[str, str]],
+                         timeout: float = 5) -> float:
+        with span('candidate_head', url=_span_url(url)):
+            try:
+                r = get_http_client().head(url, headers=headers, cookies=cookies, timeout=timeout)
+                cl = r.headers.get('Content-Length')
+                annotate(status=r.status_code, content_length=int(cl) if cl and cl.isdigit() else None)
+                if cl and cl.isdigit():
+                    return min(50, int(cl) / (1024 * 1024))
+            except Exception:
+                pass
+            return 0.0
+
+    def _validate_video_range(self, url: str, headers: Dict[str, str], cookies: Optional[Dict[str, str]],
+                              timeout: float = 8) -> Dict:
+        probe = stream_probe(url, headers=headers, cookies=cookies, max_bytes=self.VALIDATION_MIN_BYTES + 1, timeout=timeout)
+        # Heuristics: accept if we retrieved a reasonable chunk (>16KB) or server reports large content-length
+        total = int(probe["content_length"]) if probe["content_length"] else 0
+        probe["validated"] = probe["ok"] and (probe["bytes_read"] > self.VALIDATION_MIN_BYTES or total > self.VALIDATION_MIN_BYTES)
+        return probe
+
+    @timed('rank_candidates')
+    def rank_video_candidates(self, candidates: List[str], referer: Optional[str] = None, cookies: Optional[Dict[str, str]] = None,
+                              probe_results: Optional[Dict[str, Dict]] = None, deadline: Optional[float] = None) -> Optional[str]:
         """Rank and pick the best video URL from candidates.
 
         Scoring rules (simple heuristics):
@@ -504,64 +1088,64 @@ class FacebookSeleniumScraper:
         - +30 if contains 'fbcdn.net'
         - +20 if contains '_nc_ht=video' or 'nc_ht=video'
         - +size_in_MB (from Content-Length via HEAD) as tie-breaker
+
+        HEADs and range validations run concurrently on a bounded thread pool under an
+        overall deadline (RANK_DEADLINE). The highest-scored candidate that validates
+        wins as soon as its own check finishes, without waiting for lower-ranked ones.
+
+        If ``probe_results`` is given, the streamed validation result of each checked
+        URL is stored there so ``probe_video_url`` can reuse it instead of refetching.
+        ``deadline`` (``time.monotonic()``) tightens RANK_DEADLINE and the per-request
+        timeouts for callers with their own budget (tier 0).
         """
         if not candidates:
             return None
 
-        scores = {}
+        unique = list(dict.fromkeys(candidates))
+        VIDEO_CANDIDATES.observe(len(unique))
+        own_deadline = time.monotonic() + self.RANK_DEADLINE
+        deadline = own_deadline if deadline is None else min(deadline, own_deadline)
+        bonuses: Dict[str, float] = {}
+
         headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)"}
         if referer:
             headers["Referer"] = referer
 
-        for url in set(candidates):
-            score = 0
-            low = url.lower()
-            if '.mp4' in low or '.m3u8' in low:
-                score += 100
-            if 'video.fsci' in low:
-                score += 50
-            if 'fbcdn.net' in low:
-                score += 30
-            if '_nc_ht=video' in low or 'nc_ht=video' in low:
-                score += 20
-            # Penalizar URLs de segmentos parciales
-            if 'bytestart=' in low or 'byteend=' in low:
-                score -= 40
-
-            size_mb = 0.0
-            try:
-                r = requests.head(url, headers=headers, cookies=cookies, allow_redirects=True, timeout=5)
-                cl = r.headers.get('Content-Length')
-                if cl and cl.isdigit():
-                    size_mb = int(cl) / (1024 * 1024)
-                    score += min(50, size_mb)
-            except Exception:
-                pass
-
-            scores[url] = score
-
-        # Order candidates by score desc
-        ordered = sorted(scores.items(), key=lambda kv: (kv[1], len(kv[0])), reverse=True)
-
-        # Validate candidates by fetching a small range to ensure it's not an empty/segment resource
-        headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)", 'Range': 'bytes=0-200000'}
-        if referer:
-            headers["Referer"] = referer
-        for url, sc in ordered:
-            try:
-                r = requests.get(url, headers=headers, cookies=cookies, allow_redirects=True, timeout=8)
-                content_len = len(r.content) if r.content is not None else 0
-                # Heuristics: accept if we retrieved a reasonable chunk (>16KB) or server reports large content-length
-                cl = r.headers.get('Content-Length')
-                cl_val = int(cl) if cl and cl.isdigit() else 0
-                if content_len > 16000 or cl_val > 16000:
+        executor = ThreadPoolExecutor(max_workers=min(self.RANK_MAX_WORKERS, len(unique)))
+        try:
+            head_timeout = max(0.1, min(5.0, deadline - time.monotonic()))
+            head_futures = {executor.submit(bind(self._head_size_bonus), url, headers, cookies, head_timeout): url
+                            for url in unique}
+            done, _ = futures_wait(head_futures, timeout=max(0.0, deadline - time.monotonic()))
+            for future in done:
+                bonuses[head_futures[future]] = future.result()
+
+            # Order candidates by score desc
+            ordered = self.order_video_candidates(unique, bonuses)
+
+            # Validate candidates by fetching a small range to ensure it's not an empty/segment resource
+            validation_timeout = max(0.1, min(8.0, deadline - time.monotonic()))
+            validations = [
+                (url, executor.submit(bind(self._validate_video_range), url, headers, cookies, validation_timeout))
+                for url in ordered
+            ]
+            for url, future in validations:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    probe = future.result(timeout=remaining)
+                except FuturesTimeoutError:
+                    break
+                if probe_results is not None:
+                    probe_results[url] = probe
+                if probe["validated"]:
                     return url
-            except Exception:
-                continue
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
 
         # Fallback: return highest scored even if validation failed
-        best = max(scores.items(), key=lambda kv: (kv[1], len(kv[0])))
-        return best[0]
+        return ordered[0]
 
     def _get_requests_cookies(self) -> Dict[str, str]:
         """Convierte cookies del navegador a formato requests."""
@@ -576,10 +1160,14 @@ class FacebookSeleniumScraper:
         except Exception:
             return {}
 
-    def probe_video_url(self, url: str, referer: Optional[str] = None, cookies: Optional[Dict[str, str]] = None, extra_headers: Optional[Dict[str, str]] = None) -> Dict:
+    @timed('probe')
+    def probe_video_url(self, url: str, referer: Optional[str] = None, cookies: Optional[Dict[str, str]] = None, extra_headers: Optional[Dict[str, str]] = None,
+                        prefetched: Optional[Dict] = None, timeout: float = 8) -> Dict:
         """Verifica si la URL de video es accesible y retorna metadatos básicos.
 
         Intenta HEAD y luego GET con Range=bytes=0-1. Retorna status, content-type y content-length.
+        Si ``prefetched`` (resultado de ``stream_probe`` durante el ranking) ya fue exitoso,
+        se reutiliza sin volver a pedir la URL.
         """
         headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
@@ -594,36 +1182,116 @@ class FacebookSeleniumScraper:
             "status": None,
             "content_type": None,
             "content_length": None,
+            "accept_ranges": None,
             "used_referer": referer or None,
             "error": None,
         }
 
+        if prefetched and prefetched.get("ok"):
+            for key in ("ok", "status", "content_type", "content_length", "accept_ranges"):
+                result[key] = prefetched.get(key)
+            return result
+
         try:
-            r = requests.head(url, headers=headers, cookies=cookies, allow_redirects=True, timeout=8)
+            with span('probe_head', url=_span_url(url)):
+                r = get_http_client().head(url, headers=headers, cookies=cookies, timeout=timeout)
+                annotate(status=r.status_code)
             result["status"] = r.status_code
             result["content_type"] = r.headers.get("Content-Type")
             result["content_length"] = r.headers.get("Content-Length")
+            result["accept_ranges"] = r.headers.get("Accept-Ranges")
             if r.status_code in (200, 206):
                 result["ok"] = True
                 return result
         except Exception as e:
             result["error"] = str(e)
 
-        try:
-            headers_range = dict(headers)
-            headers_range["Range"] = "bytes=0-200000"
-            r = requests.get(url, headers=headers_range, cookies=cookies, allow_redirects=True, timeout=8)
-            result["status"] = r.status_code
-            result["content_type"] = r.headers.get("Content-Type")
-            result["content_length"] = r.headers.get("Content-Length")
-            if r.status_code in (200, 206):
-                result["ok"] = True
-        except Exception as e:
-            if not result.get("error"):
-                result["error"] = str(e)
+        ranged = stream_probe(url, headers=headers, cookies=cookies, max_bytes=2, timeout=timeout)
+        if ranged["status"] is not None:
+            for key in ("ok", "status", "content_type", "content_length", "accept_ranges"):
+                result[key] = ranged[key]
+        if ranged["error"] and not result.get("error"):
+            result["error"] = ranged["error"]
 
         return result
 
+    @timed('http_fast_path')
+    def scrape_video_over_http(self, post_url: str) -> Optional[Dict]:
+        """Tier 0: resuelve el video sin navegador, con HTTP simple y los mismos heurísticos.
+
+        Descarga el post (m. y mbasic.) con varios user-agents y aplica
+        ``extract_video_url``. Solo retorna un resultado si la URL encontrada tiene
+        forma de video (o viene de ``playable_url``/``hd_src``/``sd_src``) y el probe
+        responde con un ``Content-Type`` de video; si no, retorna None y el llamador
+        debe usar Chrome (tier 1). Todo el intento se corta a los
+        ``FAST_PATH_DEADLINE`` segundos. No usa ``self.driver``.
+        """
+        deadline = time.monotonic() + self.FAST_PATH_DEADLINE
+        mobile_url = self.convert_to_mobile_url(post_url)
+        targets = [mobile_url]
+        if '://m.' in mobile_url:
+            targets.append(mobile_url.replace('://m.', '://mbasic.', 1))
+
+        for target in targets:
+            for user_agent in _FAST_PATH_USER_AGENTS:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    logger.info(f"Tier 0 agotó {self.FAST_PATH_DEADLINE:.0f}s, usando navegador: {post_url}")
+                    return None
+                try:
+                    with span('http_get', url=_span_url(target)):
+                        resp = get_fast_path_client().get(target, headers={"User-Agent": user_agent},
+                                                          timeout=min(self.FAST_PATH_TIMEOUT, remaining))
+                        annotate(status=resp.status_code, bytes=len(resp.content))
+                except Exception as exc:
+                    # Un error de red no depende del user-agent: pasar al siguiente host
+                    logger.debug(f"Tier 0 falló para {target}: {exc}")
+                    break
+                # Muro de login o página vacía: probar la siguiente variante
+                if resp.status_code != 200 or not resp.text or is_login_wall(resp.url):
+                    continue
+
+                page_source = resp.text
+                video_url = self.extract_video_url(_extract(page_source), page_source=page_source)
+                # El paso 5 de extract_video_url acepta cualquier URL de fbcdn (también imágenes)
+                if not (_looks_like_video_url(video_url) or
+                        (video_url and video_url == _search_embedded_video_urls(page_source))):
+                    continue
+                if time.monotonic() >= deadline:
+                    return None
+
+                candidates = [video_url]
+                normalized = self.normalize_video_url(video_url)
+                if normalized != video_url:
+                    candidates.append(normalized)
+                probe_results: Dict[str, Dict] = {}
+                best = self.rank_video_candidates(candidates, referer=post_url, probe_results=probe_results,
+                                                  deadline=deadline)
+                validated = probe_results.get(best) if best else None
+                if not validated or not validated.get('validated'):
+                    # Al agotar el plazo el ranking devuelve el mejor puntaje sin validar: no sirve en tier 0
+                    if time.monotonic() >= deadline:
+                        return None
+                    continue
+                probe = self.probe_video_url(best, referer=post_url, prefetched=validated,
+                                             timeout=max(0.1, deadline - time.monotonic()))
+                if not probe.get('ok') or not _is_video_content_type(probe.get('content_type')):
+                    continue
+
+                logger.info(f"⚡ Video resuelto sin navegador (tier 0): {target}")
+                return {
+                    'success': True,
+                    'url': post_url,
+                    'mobile_url': mobile_url,
+                    'video_url': best,
+                    'probe': probe,
+                    'probe_mobile': None,
+                    'tier': 0,
+                    '_fetch_context': {'referer': post_url, 'headers': {}, 'cookies': {}}
+                }
+        return None
+
+    @traced('scrape_video')
     def scrape_video_by_url(self, post_url: str) -> Dict:
         """Extrae la URL del video (si existe) de una publicación de Facebook."""
         if not self.driver:
@@ -632,18 +1300,20 @@ class FacebookSeleniumScraper:
         try:
             mobile_url = self.convert_to_mobile_url(post_url)
             logger.info(f"🔍 Accediendo (video): {mobile_url}")
-            self.driver.get(mobile_url)
-            time.sleep(3)
+            capture = self._navigate(mobile_url)
+            if is_login_wall(self.driver.current_url):
+                logger.info(f"🔒 Muro de login: {post_url}")
+                return failure('El video requiere iniciar sesión', LOGIN_WALL, url=post_url, video_url=None)
+            has_video_signal = self.wait_for(_JS_VIDEO_SIGNAL, self.PAGE_READY_TIMEOUT)
 
             # Cargar HTML y usar heurísticos
             page_source = self.driver.page_source
-            soup = BeautifulSoup(page_source, 'html.parser')
+            page = _extract(page_source)
 
-            video_url = self.extract_video_url(soup, page_source=page_source)
+            video_url = self.extract_video_url(page, page_source=page_source)
 
             # Collect candidates set (from initial extract if non-blob)
             candidates = set()
-            network_headers = {}
             if video_url and not str(video_url).startswith('blob:'):
                 candidates.add(video_url)
 
@@ -653,7 +1323,7 @@ class FacebookSeleniumScraper:
                     self.driver.execute_script("var v=document.querySelector('video'); if(v){v.play();}")
                 except Exception:
                     pass
-                time.sleep(3)
+                self.wait_for(_JS_PLAYBACK_SETTLED, self.PLAYBACK_TIMEOUT)
                 try:
                     entries = self.driver.execute_script("return performance.getEntriesByType('resource').map(e => e.name);")
                 except Exception:
@@ -674,8 +1344,10 @@ class FacebookSeleniumScraper:
             except Exception:
                 pass
 
-            # Intentar reproducir el video para forzar la carga de recursos y luego revisar performance entries
-            if not video_url:
+            # Intentar reproducir el video para forzar la carga de recursos y luego revisar performance entries.
+            # Si el documento ya cargó completo y no hay <video>, og:video ni recursos de media, no hay
+            # nada que reproducir: FALLBACK_PLAYBACK_TIMEOUT solo retrasaría el "no encontrado".
+            if not video_url and (has_video_signal or not self._document_complete()):
                 try:
                     # intentar play por JS
                     try:
@@ -683,7 +1355,7 @@ class FacebookSeleniumScraper:
                     except Exception:
                         pass
 
-                    time.sleep(4)
+                    self.wait_for(_JS_MEDIA_RESOURCE_SEEN, self.FALLBACK_PLAYBACK_TIMEOUT)
 
                     # obtener recursos cargados
                     try:
@@ -701,140 +1373,192 @@ class FacebookSeleniumScraper:
                 except Exception as e:
                     logger.debug(f"No se pudo obtener performance entries: {e}")
 
-                # Finalmente intentar leer los performance logs (CDP) para capturar requests network
-                try:
-                    logs = self.driver.get_log('performance')
-                    for entry in logs:
-                        try:
-                            msg = json.loads(entry['message'])['message']
-                            method = msg.get('method', '')
-                            params = msg.get('params', {})
-                            if method == 'Network.requestWillBeSent':
-                                req = params.get('request', {})
-                                url_seen = req.get('url')
-                                if url_seen and not url_seen.startswith('blob:'):
-                                    low = url_seen.lower()
-                                    if '.mp4' in low or '.m3u8' in low or 'video.fsci' in low:
-                                        candidates.add(url_seen)
-                                        normalized = self.normalize_video_url(url_seen)
-                                        if normalized != url_seen:
-                                            candidates.add(normalized)
-                                    hdrs = req.get('headers', {}) or {}
-                                    if isinstance(hdrs, dict):
-                                        network_headers[url_seen] = {k: str(v) for k, v in hdrs.items()}
-                            elif method == 'Network.responseReceived':
-                                url_seen = params.get('response', {}).get('url')
-                                if url_seen and not url_seen.startswith('blob:'):
-                                    low = url_seen.lower()
-                                    if '.mp4' in low or '.m3u8' in low or 'video.fsci' in low:
-                                        candidates.add(url_seen)
-                                        normalized = self.normalize_video_url(url_seen)
-                                        if normalized != url_seen:
-                                            candidates.add(normalized)
-                        except Exception:
-                            continue
-                except Exception as e:
-                    logger.debug(f"No se pudo leer performance logs: {e}")
+            # Requests de red de esta navegación (eventos CDP Network.*), con sus cabeceras
+            network_headers: Dict[str, Dict[str, str]] = {}
+            if capture is not None:
+                capture.collect(self.driver)
+                for url_seen in capture.urls('video'):
+                    candidates.add(url_seen)
+                    normalized = self.normalize_video_url(url_seen)
+                    if normalized != url_seen:
+                        candidates.add(normalized)
+                network_headers = capture.headers_by_url()
 
             # Si tenemos candidatos, rankear y devolver mejor
             if candidates:
                 cookie_jar = self._get_requests_cookies()
-                best = self.rank_video_candidates(list(candidates), referer=post_url, cookies=cookie_jar)
+                probe_results: Dict[str, Dict] = {}
+                best = self.rank_video_candidates(list(candidates), referer=post_url, cookies=cookie_jar, probe_results=probe_results)
                 if best:
                     extra_headers = network_headers.get(best)
-                    probe = self.probe_video_url(best, referer=post_url, cookies=cookie_jar, extra_headers=extra_headers)
+                    probe = self.probe_video_url(best, referer=post_url, cookies=cookie_jar, extra_headers=extra_headers,
+                                                 prefetched=probe_results.get(best))
                     if not probe.get('ok'):
                         probe_mobile = self.probe_video_url(best, referer=mobile_url, cookies=cookie_jar, extra_headers=extra_headers)
                     else:
                         probe_mobile = None
+                    working_referer = mobile_url if probe_mobile and probe_mobile.get('ok') else post_url
                     return {
                         'success': True,
                         'url': post_url,
                         'mobile_url': mobile_url,
                         'video_url': best,
                         'probe': probe,
-                        'probe_mobile': probe_mobile
+                        'probe_mobile': probe_mobile,
+                        'tier': 1,
+                        # Privado (no se expone en la API): lo que necesita /download para pedir el video
+                        '_fetch_context': {'referer': working_referer, 'headers': extra_headers or {}, 'cookies': cookie_jar}
                     }
 
             if not video_url:
-                return {'success': False, 'error': 'Video no encontrado', 'url': post_url, 'video_url': None}
+                if not self._document_complete():
+                    # Página a medio cargar: no es un "no encontrado" confiable (se reintenta, no se cachea)
+                    return failure('La página no terminó de cargar', TIMEOUT, url=post_url, video_url=None)
+                return failure('Video no encontrado', NOT_FOUND, url=post_url, video_url=None)
 
-            return {'success': True, 'url': post_url, 'mobile_url': mobile_url, 'video_url': video_url}
+            return {
+                'success': True, 'url': post_url, 'mobile_url': mobile_url, 'video_url': video_url, 'tier': 1,
+                '_fetch_context': {'referer': post_url, 'headers': {}, 'cookies': self._get_requests_cookies()}
+            }
 
         except Exception as e:
             logger.error(f"❌ Error scrapando video: {e}")
-            return {'success': False, 'error': str(e), 'url': post_url, 'video_url': None}
+            self._note_failure(e)
+            return failure(str(e), classify_exception(e), url=post_url, video_url=None)
     
-    def scrape_page_posts(self, page_url: str, num_posts: int = 10) -> Dict:
+    def _drain_new_links(self) -> List[str]:
+        """hrefs de posts/fotos aparecidos desde la última llamada (instala el recolector si falta)."""
+        links = self.driver.execute_script(_JS_DRAIN_NEW_LINKS)
+        if links is None:
+            # Primera llamada o la página se recargó: el recolector recorre el documento actual
+            self.driver.execute_script(_JS_INSTALL_LINK_COLLECTOR)
+            links = self.driver.execute_script(_JS_DRAIN_NEW_LINKS)
+        return links or []
+
+    def _discover_post_links(self, mobile_url: str, num_posts: int, emit: Callable[[str], None]) -> int:
+        """Hace scroll en la página y llama ``emit(url)`` por cada post nuevo, en orden de aparición.
+
+        Se detiene al reunir ``num_posts`` enlaces o cuando un scroll ya no hace
+        crecer la página.
+        """
+        logger.info(f"🔍 Accediendo a página: {mobile_url}")
+        self._navigate(mobile_url)
+        self.wait_for(_JS_DOCUMENT_READY, self.PAGE_READY_TIMEOUT)
+
+        posts_found = set()
+
+        def take_new_links():
+            for href in self._drain_new_links():
+                # Construir URL completa y limpiarla
+                full_url = f"https://m.facebook.com{href}" if href.startswith('/') else href
+                clean_url = full_url.split('?')[0]
+                if clean_url in posts_found:
+                    continue
+                posts_found.add(clean_url)
+                emit(clean_url)
+                if len(posts_found) >= num_posts:
+                    return
+
+        take_new_links()
+        scrolls = 0
+        while len(posts_found) < num_posts and scrolls < self.MAX_PAGE_SCROLLS:
+            previous_height = self.driver.execute_script(_JS_SCROLL_HEIGHT) or 0
+            self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
+            grew = self.wait_for_height_change(previous_height, self.SCROLL_SETTLE_TIMEOUT)
+            scrolls += 1
+            take_new_links()
+            if not grew:
+                logger.info(f"📜 La página dejó de crecer tras {scrolls} scrolls")
+                break
+
+        return len(posts_found)
+
+    @traced('scrape_page')
+    def scrape_page_posts(self, page_url: str, num_posts: int = 10,
+                          borrow_scraper: Optional[Callable[[], ContextManager]] = None) -> Dict:
         """
         Extrae múltiples posts de una página
-        
+
+        Los enlaces se scrapean mientras el scroll sigue descubriendo más: cada URL
+        encontrada va a una cola que consumen otros navegadores (si ``borrow_scraper``
+        presta alguno libre) y, al terminar el scroll, este mismo navegador. Los
+        posts se devuelven en el orden en que aparecen en la página.
+
         Args:
             page_url: URL de la página o nombre de la página
             num_posts: Número de posts a extraer
-            
+            borrow_scraper: Callable que retorna un context manager con otro scraper
+                libre, o ``None`` si no hay (p. ej. ``ScraperPool.try_lease``)
+
         Returns:
             Dict con lista de posts
         """
         if not self.driver:
             self.setup_driver()
-        
+
+        pending: "queue.Queue[Optional[Tuple[int, str]]]" = queue.Queue()
+        discovered: List[str] = []
+        results: Dict[int, Optional[Dict]] = {}
+        helpers: List[threading.Thread] = []
+        limiter = get_rate_limiter()
+
+        def consume(scraper: 'FacebookSeleniumScraper'):
+            while True:
+                item = pending.get()
+                if item is None:
+                    # Propagar el fin de la cola al resto de consumidores
+                    pending.put(None)
+                    return
+                idx, post_url = item
+                with span('page_post', index=idx):
+                    waited = limiter.wait(post_url)
+                    if waited:
+                        record('rate_limit_wait', waited)
+                    logger.info(f"📥 Scrapeando post {idx + 1}/{num_posts}")
+                    try:
+                        post_result = scraper.scrape_post_by_url(post_url)
+                        results[idx] = post_result['post'] if post_result['success'] else None
+                    except Exception as e:
+                        logger.warning(f"Error en post {post_url}: {e}")
+                        results[idx] = None
+
+        def helper():
+            try:
+                with borrow_scraper() as scraper:
+                    if scraper is not None:
+                        consume(scraper)
+            except Exception as e:
+                logger.warning(f"No se pudo usar un navegador adicional: {e}")
+
+        def emit(post_url: str):
+            discovered.append(post_url)
+            pending.put((len(discovered) - 1, post_url))
+            # Un navegador adicional por cada enlace en espera, hasta PAGE_MAX_WORKERS
+            if borrow_scraper is not None and len(helpers) < self.PAGE_MAX_WORKERS and pending.qsize() > len(helpers):
+                thread = threading.Thread(target=bind(helper), name=f"page-post-{len(helpers)}", daemon=True)
+                helpers.append(thread)
+                thread.start()
+
         try:
             # Convertir a URL móvil
             if not page_url.startswith('http'):
                 mobile_url = f"https://m.facebook.com/{page_url}"
             else:
                 mobile_url = self.convert_to_mobile_url(page_url)
-            
-            logger.info(f"🔍 Accediendo a página: {mobile_url}")
-            self.driver.get(mobile_url)
-            time.sleep(3)
-            
-            # Scroll para cargar más posts
-            posts_found = set()
-            scroll_attempts = 0
-            max_scrolls = num_posts // 2 + 2
-            
-            while len(posts_found) < num_posts and scroll_attempts < max_scrolls:
-                self.driver.execute_script("window.scrollTo(0, document.body.scrollHeight);")
-                time.sleep(2)
-                scroll_attempts += 1
-                
-                # Buscar enlaces a posts
-                soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-                links = soup.find_all('a', href=True)
-                
-                for link in links:
-                    href = link['href']
-                    if '/posts/' in href or '/photo' in href:
-                        # Construir URL completa
-                        if href.startswith('/'):
-                            full_url = f"https://m.facebook.com{href}"
-                        else:
-                            full_url = href
-                        
-                        # Limpiar URL
-                        clean_url = full_url.split('?')[0]
-                        posts_found.add(clean_url)
-                        
-                        if len(posts_found) >= num_posts:
-                            break
-            
-            logger.info(f"📝 Encontrados {len(posts_found)} enlaces a posts")
-            
-            # Scrapear cada post
-            posts_data = []
-            for idx, post_url in enumerate(list(posts_found)[:num_posts]):
-                logger.info(f"📥 Scrapeando post {idx + 1}/{num_posts}")
-                try:
-                    post_result = self.scrape_post_by_url(post_url)
-                    if post_result['success']:
-                        posts_data.append(post_result['post'])
-                    time.sleep(2)  # Delay entre posts
-                except Exception as e:
-                    logger.warning(f"Error en post {post_url}: {e}")
-                    continue
-            
+
+            try:
+                found = self._discover_post_links(mobile_url, num_posts, emit)
+            finally:
+                pending.put(None)
+            logger.info(f"📝 Encontrados {found} enlaces a posts")
+
+            # Terminado el scroll, este navegador también scrapea lo que quede
+            consume(self)
+            for thread in helpers:
+                thread.join()
+
+            posts_data = [results[idx] for idx in range(len(discovered)) if results.get(idx)]
+
             return {
                 'success': True,
                 'page_url': page_url,
@@ -844,39 +1568,17 @@ class FacebookSeleniumScraper:
             
         except Exception as e:
             logger.error(f"❌ Error scrapeando página: {e}")
-            return {
-                'success': False,
-                'error': str(e),
-                'page_url': page_url,
-                'posts': []
-            }
+            self._note_failure(e)
+            return failure(str(e), classify_exception(e), page_url=page_url, posts=[])
     
     def close(self):
-        """Cierra el navegador"""
-        if self.driver:
-            self.driver.quit()
-            logger.info("🔒 Navegador cerrado")
-
-
-# Singleton para reutilizar el scraper (separado por configuración)
-_scraper_instances: Dict[Tuple[bool, bool], FacebookSeleniumScraper] = {}
-
-
-def get_scraper_instance(headless: bool = True, block_images: Optional[bool] = None) -> FacebookSeleniumScraper:
-    """Obtiene o crea una instancia del scraper"""
-    global _scraper_instances
-    resolved_block = _resolve_block_images_flag(block_images)
-    key = (headless, resolved_block)
-    scraper = _scraper_instances.get(key)
-    if scraper is None:
-        scraper = FacebookSeleniumScraper(headless=headless, block_images=resolved_block)
-        _scraper_instances[key] = scraper
-    return scraper
-
-
-def close_scraper_instance():
-    """Cierra todas las instancias del scraper"""
-    global _scraper_instances
-    for scraper in _scraper_instances.values():
-        scraper.close()
-    _scraper_instances = {}
+        """Cierra el navegador (aunque ya no responda) y olvida el driver."""
+        driver = self.driver
+        self.driver = None
+        if driver:
+            try:
+                driver.quit()
+                logger.info("🔒 Navegador cerrado")
+            except Exception as e:
+                logger.warning(f"No se pudo cerrar el navegador limpiamente: {e}")
+
@@ -0,0 +1,90 @@
+"""Una sola ejecución por clave en vuelo (``singleflight``).
+
+Cuando un post se vuelve viral llegan decenas de solicitudes por la misma URL
+en el mismo segundo. La primera ejecuta el scrape; las que llegan mientras
+tanto con la misma clave (operación + URL canónica) esperan y reciben el mismo
+resultado, o la misma excepción. Al terminar, la clave se libera: la siguiente
+solicitud vuelve a ejecutar (la caché de resultados es otra capa).
+
+Sumarse o ejecutar se decide bajo un mismo lock; el control de admisión
+(``admit``) solo lo toma quien ejecuta, así que nadie ejecuta sin pasar por él.
+"""
+import threading
+from typing import Any, Callable, ContextManager, Dict, Hashable, Optional, Tuple, Type
+
+
+class _Call:
+    __slots__ = ('done', 'result', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Agrupa llamadas concurrentes con la misma clave en una sola ejecución."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+        self.executions_total = 0
+        self.coalesced_total = 0
+
+    def do(self, key: Hashable, func: Callable[[], Any],
+           admit: Optional[Callable[[], ContextManager]] = None,
+           retry_on: Tuple[Type[BaseException], ...] = ()) -> Tuple[Any, bool]:
+        """Ejecuta ``func`` o se suma a la ejecución en curso de ``key``.
+
+        Retorna ``(resultado, sumada)``: ``sumada`` es True si esta llamada esperó
+        a otra en vez de ejecutar. Si ``func`` lanza, todas las llamadas lanzan.
+        ``admit`` (p. ej. ``RequestTracker.track``) envuelve solo la ejecución: las
+        llamadas que se suman no lo toman, y si rechaza (lanza) las sumadas
+        reciben la misma excepción. Una llamada sumada que recibe una excepción de
+        ``retry_on`` (p. ej. "ocupado" de un líder con límites más estrictos que los
+        suyos) vuelve a intentarlo: ejecuta ella o se suma a la siguiente ejecución.
+        """
+        while True:
+            with self._lock:
+                call = self._calls.get(key)
+                if call is not None:
+                    call.waiters += 1
+                    self.coalesced_total += 1
+                    leader = False
+                else:
+                    call = self._calls[key] = _Call()
+                    self.executions_total += 1
+                    leader = True
+
+            if leader:
+                break
+            call.done.wait()
+            if call.error is None:
+                return call.result, True
+            if not isinstance(call.error, retry_on):
+                raise call.error
+
+        try:
+            if admit is None:
+                call.result = func()
+            else:
+                with admit():
+                    call.result = func()
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+        return call.result, False
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            return {
+                "in_flight": len(self._calls),
+                "waiting": sum(call.waiters for call in self._calls.values()),
+                "executions_total": self.executions_total,
+                "coalesced_total": self.coalesced_total,
+            }
@@ -0,0 +1,294 @@
+"""Desglose de tiempos por solicitud (``?debug=timings``) y perfil de las más lentas.
+
+Un ``Trace`` es el árbol de spans de una solicitud: espera del pool, navegación,
+cada espera, parseo, cada HEAD/GET de candidatos y el probe. El span actual vive
+en un ``ContextVar``, así que los métodos del scraper solo abren ``span(...)``
+sin recibir nada extra; fuera de un trace, ``span`` no registra nada. Los hilos
+auxiliares (ranking, helpers de páginas) heredan el span con ``bind``.
+
+``SlowRequestProfiler`` muestrea (``sys._current_frames``) los hilos que están
+dentro de un span de una solicitud trazada y guarda en disco el perfil de las N
+solicitudes más lentas: pilas colapsadas (``.folded``, para flamegraph.pl o
+speedscope) y el árbol de spans (``.json``).
+"""
+import functools
+import heapq
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+
+class Span:
+    __slots__ = ('name', 'attrs', 'started', 'duration', 'children', 'trace')
+
+    def __init__(self, name: str, trace: 'Trace', attrs: Optional[Dict] = None, started: Optional[float] = None):
+        self.name = name
+        self.trace = trace
+        self.attrs = dict(attrs or {})
+        self.started = time.perf_counter() if started is None else started
+        self.duration: Optional[float] = None
+        self.children: List['Span'] = []
+
+    def finish(self):
+        if self.duration is None:
+            self.duration = time.perf_counter() - self.started
+
+    def to_dict(self, origin: float) -> Dict:
+        duration = self.duration if self.duration is not None else time.perf_counter() - self.started
+        node = {
+            'name': self.name,
+            'start_ms': round((self.started - origin) * 1000, 2),
+            'duration_ms': round(duration * 1000, 2),
+        }
+        if self.duration is None:
+            node['unfinished'] = True
+        node.update(self.attrs)
+        with self.trace.lock:
+            children = list(self.children)
+        if children:
+            node['children'] = [child.to_dict(origin) for child in children]
+        return node
+
+
+class Trace:
+    """Spans de una solicitud; se comparte entre los hilos que trabajan para ella."""
+
+    def __init__(self, name: str, profiler: Optional['SlowRequestProfiler'] = None, **attrs):
+        self.id = uuid.uuid4().hex[:12]
+        self.lock = threading.Lock()
+        self.root = Span(name, self, attrs)
+        self.profiler = profiler
+        self.samples: Counter = Counter()
+        self._thread_depth: Dict[int, int] = {}
+
+    @property
+    def duration(self) -> float:
+        return self.root.duration if self.root.duration is not None else time.perf_counter() - self.root.started
+
+    def to_dict(self) -> Dict:
+        return self.root.to_dict(self.root.started)
+
+    def server_timing(self) -> str:
+        """Cabecera ``Server-Timing`` con los spans de primer nivel (visible en devtools)."""
+        with self.lock:
+            children = list(self.root.children)
+        parts = [f"{re.sub(r'[^A-Za-z0-9_-]', '_', span.name)};dur={(span.duration or 0) * 1000:.1f}"
+                 for span in children]
+        parts.append(f"total;dur={self.duration * 1000:.1f}")
+        return ', '.join(parts)
+
+    def _enter_thread(self):
+        if self.profiler is None:
+            return
+        tid = threading.get_ident()
+        with self.lock:
+            depth = self._thread_depth.get(tid, 0)
+            self._thread_depth[tid] = depth + 1
+        if depth == 0:
+            self.profiler.watch(tid, self)
+
+    def _exit_thread(self):
+        if self.profiler is None:
+            return
+        tid = threading.get_ident()
+        with self.lock:
+            depth = self._thread_depth.get(tid, 1) - 1
+            if depth:
+                self._thread_depth[tid] = depth
+            else:
+                self._thread_depth.pop(tid, None)
+        if not depth:
+            self.profiler.unwatch(tid, self)
+
+
+_current: ContextVar[Optional[Span]] = ContextVar('scraper_current_span', default=None)
+
+
+def current_trace() -> Optional[Trace]:
+    span_ = _current.get()
+    return span_.trace if span_ is not None else None
+
+
+@contextmanager
+def start_trace(name: str, profiler: Optional['SlowRequestProfiler'] = None, **attrs):
+    """Activa un trace nuevo en el contexto actual y lo cierra al salir."""
+    trace = Trace(name, profiler, **attrs)
+    token = _current.set(trace.root)
+    try:
+        yield trace
+    finally:
+        trace.root.finish()
+        _current.reset(token)
+
+
+@contextmanager
+def span(name: str, **attrs):
+    """Span hijo del actual; sin trace activo no hace nada (costo de un ``ContextVar.get``)."""
+    parent = _current.get()
+    if parent is None:
+        yield None
+        return
+    trace = parent.trace
+    child = Span(name, trace, attrs)
+    with trace.lock:
+        parent.children.append(child)
+    token = _current.set(child)
+    trace._enter_thread()
+    try:
+        yield child
+    except BaseException as e:
+        child.attrs.setdefault('error', type(e).__name__)
+        raise
+    finally:
+        child.finish()
+        trace._exit_thread()
+        _current.reset(token)
+
+
+def traced(name: str):
+    """Decorador equivalente a ``span`` para una función completa."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record(name: str, seconds: float, **attrs):
+    """Agrega un span ya terminado de ``seconds`` (p. ej. una espera medida aparte)."""
+    parent = _current.get()
+    if parent is None:
+        return
+    child = Span(name, parent.trace, attrs, started=time.perf_counter() - seconds)
+    child.duration = seconds
+    with parent.trace.lock:
+        parent.children.append(child)
+
+
+def annotate(**attrs):
+    """Agrega atributos (status, bytes, ...) al span actual."""
+    current = _current.get()
+    if current is not None:
+        current.attrs.update(attrs)
+
+
+def bind(func):
+    """Envuelve ``func`` para que corra bajo el span actual en otro hilo (ThreadPoolExecutor, Thread)."""
+    parent = _current.get()
+    if parent is None:
+        return func
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        token = _current.set(parent)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            _current.reset(token)
+    return wrapper
+
+
+def _collapse(frame) -> str:
+    stack = []
+    while frame is not None:
+        code = frame.f_code
+        stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return ';'.join(reversed(stack))
+
+
+class SlowRequestProfiler:
+    """Perfil por muestreo de las ``keep`` solicitudes trazadas más lentas."""
+
+    def __init__(self, keep: int = 5, directory: str = 'profiles', interval: float = 0.005):
+        self.keep = max(1, keep)
+        self.directory = directory
+        self.interval = max(0.001, interval)
+        self._lock = threading.Lock()
+        self._watched: Dict[int, Trace] = {}
+        self._slowest: List[Tuple[float, str]] = []  # heap (duración, prefijo de archivos)
+        self._thread: Optional[threading.Thread] = None
+        self.samples_total = 0
+
+    def watch(self, tid: int, trace: Trace):
+        with self._lock:
+            self._watched[tid] = trace
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._sample_loop, name="request-profiler", daemon=True)
+                self._thread.start()
+
+    def unwatch(self, tid: int, trace: Trace):
+        with self._lock:
+            if self._watched.get(tid) is trace:
+                del self._watched[tid]
+
+    def _sample_loop(self):
+        own = threading.get_ident()
+        while True:
+            time.sleep(self.interval)
+            with self._lock:
+                watched = list(self._watched.items())
+            if not watched:
+                continue
+            frames = sys._current_frames()
+            for tid, trace in watched:
+                frame = frames.get(tid)
+                if frame is None or tid == own:
+                    continue
+                stack = _collapse(frame)
+                with trace.lock:
+                    trace.samples[stack] += 1
+                self.samples_total += 1
+
+    def finish(self, trace: Trace) -> Optional[str]:
+        """Guarda el perfil si ``trace`` está entre las más lentas; retorna el prefijo de archivos."""
+        duration = trace.duration
+        with self._lock:
+            if len(self._slowest) >= self.keep and duration <= self._slowest[0][0]:
+                return None
+            prefix = os.path.join(self.directory, f"{int(duration * 1000):07d}ms-{trace.id}")
+            evicted = heapq.heappushpop(self._slowest, (duration, prefix)) if len(self._slowest) >= self.keep else None
+            if evicted is None:
+                heapq.heappush(self._slowest, (duration, prefix))
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with trace.lock:
+                samples = sorted(trace.samples.items())
+            with open(f"{prefix}.folded", 'w', encoding='utf-8') as fh:
+                fh.writelines(f"{stack} {count}\n" for stack, count in samples)
+            with open(f"{prefix}.json", 'w', encoding='utf-8') as fh:
+                json.dump(trace.to_dict(), fh, ensure_ascii=False, indent=2)
+            if evicted is not None:
+                for suffix in ('.folded', '.json'):
+                    try:
+                        os.remove(evicted[1] + suffix)
+                    except OSError:
+                        pass
+            logger.info(f"🐢 Perfil de solicitud lenta ({duration:.2f}s) guardado en {prefix}.folded")
+        except OSError as e:
+            logger.warning(f"No se pudo guardar el perfil de {trace.id}: {e}")
+            return None
+        return prefix
+
+    def snapshot(self) -> Dict:
+        with self._lock:
+            slowest = sorted(self._slowest, reverse=True)
+        return {
+            "keep": self.keep,
+            "directory": self.directory,
+            "samples_total": self.samples_total,
+            "slowest_seconds": [round(duration, 3) for duration, _ in slowest],
+        }